@@ -2,6 +2,9 @@
 Django settings for circular_clock_colombia project. / Configuraciones de Django para proyecto circular_clock_colombia.
 """
 
+import hashlib
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'. / Construir rutas dentro del proyecto como esta: BASE_DIR / 'subdir'.
@@ -59,13 +62,48 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "circular_clock_colombia.wsgi.application"  # WSGI application / Aplicación WSGI
+ASGI_APPLICATION = "circular_clock_colombia.asgi.application"  # ASGI application / Aplicación ASGI
 
 # Database / Base de datos
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",  # SQLite database engine / Motor de base de datos SQLite
-        "NAME": BASE_DIR / "db.sqlite3",  # Database file path / Ruta del archivo de base de datos
+        "NAME": os.environ.get("CLOCK_DB_NAME", BASE_DIR / "db.sqlite3"),  # Database file path / Ruta del archivo de base de datos
+    }
+}
+
+# Database profile: "default" keeps Django's SQLite defaults, "production" tunes it for concurrent workers / Perfil de base de datos: "default" mantiene los valores de Django, "production" lo ajusta para workers concurrentes
+CLOCK_DB_PROFILE = os.environ.get("CLOCK_DB_PROFILE", "default")
+
+# PRAGMAs run on every new SQLite connection by clock.db / PRAGMAs ejecutados en cada nueva conexión SQLite por clock.db
+CLOCK_SQLITE_PRAGMAS = {}
+
+if CLOCK_DB_PROFILE == "production":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": 600,  # Reuse connections across requests / Reutilizar conexiones entre solicitudes
+        "CONN_HEALTH_CHECKS": True,
+        # Take the write lock at BEGIN so WAL readers never fail upgrading it / Tomar el bloqueo de escritura en BEGIN para que los lectores WAL nunca fallen al promoverlo
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+    })
+    CLOCK_SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",  # Readers no longer block the writer / Los lectores ya no bloquean al escritor
+        "synchronous": "NORMAL",  # Durable at checkpoints, safe with WAL / Durable en los checkpoints, seguro con WAL
+        "busy_timeout": 5000,  # Wait up to 5 s for the write lock / Esperar hasta 5 s por el bloqueo de escritura
+        "cache_size": -20000,  # 20 MB page cache / Caché de páginas de 20 MB
+        "mmap_size": 268435456,  # Map up to 256 MB of the file / Mapear hasta 256 MB del archivo
+        "temp_store": "MEMORY",
+    }
+
+# Route the polling endpoints (current time, alarm checks, alarm list, configuration) to their async views; enable under ASGI / Dirigir los endpoints de sondeo a sus vistas asíncronas; activar bajo ASGI
+CLOCK_ASYNC_VIEWS = os.environ.get("CLOCK_ASYNC_VIEWS", "0") == "1"
+
+# Cache shared by all workers on this host (holds cross-worker version stamps) / Caché compartida por todos los workers de este host (guarda marcas de versión entre workers)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        # One directory per database file, so bench and scratch databases never share stamps or series with the server / Un directorio por archivo de base de datos, así las bases de benchmark y temporales nunca comparten marcas ni series con el servidor
+        "LOCATION": Path(tempfile.gettempdir()) / "circular_clock_cache" / hashlib.sha1(str(Path(DATABASES["default"]["NAME"]).resolve()).encode()).hexdigest()[:12],
     }
 }
 
@@ -83,3 +121,31 @@ STATIC_URL = "/static/"  # URL for static files / URL para archivos estáticos
 # Default primary key field type / Tipo de campo de clave primaria por defecto
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Alarm log write-behind buffer (opt-in) / Búfer de escritura diferida de registros de alarmas (opcional)
+# Queued rows are flushed when MAX_SIZE is reached or every FLUSH_INTERVAL seconds / Las filas en cola se vuelcan al alcanzar MAX_SIZE o cada FLUSH_INTERVAL segundos
+# At most MAX_QUEUE rows stay in memory; rows that overflow or fail MAX_RETRIES flushes and a row-by-row insert go to DEAD_LETTER_PATH / Como máximo MAX_QUEUE filas quedan en memoria; las que desbordan o fallan MAX_RETRIES volcados y una inserción fila por fila van a DEAD_LETTER_PATH
+CLOCK_LOG_BUFFER = {
+    "ENABLED": False,
+    "MAX_SIZE": 100,
+    "FLUSH_INTERVAL": 1.0,
+    "MAX_QUEUE": 10_000,
+    "MAX_RETRIES": 3,
+    "DEAD_LETTER_PATH": BASE_DIR / "archive" / "dead_letter_logs.jsonl",
+}
+
+# Server-side alarm dispatch: `manage.py run_alarm_dispatcher` fires alarms and check_alarms only reads what it fired / Despacho de alarmas en el servidor: `manage.py run_alarm_dispatcher` dispara las alarmas y check_alarms solo lee lo disparado
+CLOCK_SERVER_DISPATCH = os.environ.get("CLOCK_SERVER_DISPATCH", "0") == "1"
+
+# Shared clock state (opt-in, POSIX only) / Estado del reloj compartido (opcional, solo POSIX)
+# One worker per host publishes the clock snapshot, format flag and version stamps into a memory-mapped file that every worker reads without locks / Un worker por host publica la instantánea del reloj, el formato y las marcas de versión en un archivo mapeado en memoria que todos los workers leen sin bloqueos
+CLOCK_SHARED_STATE = {
+    "ENABLED": os.environ.get("CLOCK_SHARED_STATE", "0") == "1",
+    "PATH": Path(tempfile.gettempdir()) / "circular_clock_state",
+    "STALE_AFTER": 3.0,  # Seconds before readers elect a new publisher / Segundos antes de que los lectores elijan un nuevo publicador
+}
+
+# Alarm log retention / Retención de registros de alarmas
+# prune_alarm_logs moves rows older than this into per-month columnar files under CLOCK_ARCHIVE_DIR / prune_alarm_logs mueve las filas más antiguas a archivos columnares mensuales en CLOCK_ARCHIVE_DIR
+CLOCK_LOG_RETENTION_DAYS = 90
+CLOCK_ARCHIVE_DIR = BASE_DIR / "archive"
@@ -0,0 +1,173 @@
+"""
+Alarm Event Recording / Registro de Eventos de Alarmas
+Batched trigger bookkeeping and AlarmLog writes / Contabilidad de disparos y escrituras de AlarmLog por lotes
+
+
+"""
+
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from . import rollups, timeseries
+from .log_buffer import get_log_buffer
+from .models import Alarm, AlarmLog
+from .scheduling import next_occurrence
+
+
+def not_silenced_q(now):
+    """Alarms that are not temporarily silenced at `now` / Alarmas que no están silenciadas temporalmente en `now`"""
+    return Q(silenced_until__isnull=True) | Q(silenced_until__lte=now)
+
+
+def write_logs(logs, buffered=True):
+    """Persist AlarmLog rows, through the write-behind buffer when enabled / Persistir filas AlarmLog, mediante el búfer de escritura diferida si está habilitado
+
+    buffered=False inserts them in the caller's transaction even with the buffer on, for rows
+    that must be readable as soon as it commits. / buffered=False las inserta en la transacción
+    de quien llama aun con el búfer activo, para filas que deben poder leerse en cuanto se
+    confirma.
+    """
+    logs = list(logs)
+    if not logs:
+        return logs
+    buffer = get_log_buffer() if buffered else None
+    if buffer is not None:
+        # Queued only once the rows' transaction commits, so a rollback leaves no log behind / En cola solo cuando la transacción de las filas se confirma, así un rollback no deja registros
+        transaction.on_commit(lambda: buffer.add(logs))
+    else:
+        AlarmLog.objects.bulk_create(logs)
+        timeseries.note_logs_written(log.triggered_at for log in logs)
+    return logs
+
+
+# Above this many distinct values, write_next_fire_at() switches to one prepared statement / Por encima de esta cantidad de valores distintos, write_next_fire_at() usa una sola sentencia preparada
+ADVANCE_GROUP_LIMIT = 8
+
+
+def write_next_fire_at(pairs, **updates):
+    """Store (alarm id, next_fire_at) pairs, applying `updates` to all of those alarms / Guardar pares (id de alarma, next_fire_at), aplicando `updates` a todas esas alarmas
+
+    Alarms firing together share a time of day, so they usually share the next occurrence too
+    and one UPDATE per distinct value is enough. A backlog of unrelated alarms has a different
+    value per row; those go through executemany, far cheaper than bulk_update's per-row CASE. /
+    Las alarmas que suenan juntas comparten la hora del día, así que casi siempre comparten la
+    siguiente ocurrencia y basta un UPDATE por valor distinto. Un atraso de alarmas no
+    relacionadas tiene un valor por fila; esas van por executemany, mucho más barato que el CASE
+    por fila de bulk_update.
+    """
+    groups = defaultdict(list)
+    for alarm_id, next_fire_at in pairs:
+        groups[next_fire_at].append(alarm_id)
+    if len(groups) <= ADVANCE_GROUP_LIMIT:
+        for next_fire_at, ids in groups.items():
+            Alarm.objects.filter(id__in=ids).update(next_fire_at=next_fire_at, **updates)
+        return
+
+    if updates:
+        Alarm.objects.filter(id__in=[alarm_id for alarm_id, _ in pairs]).update(**updates)
+    field = Alarm._meta.get_field('next_fire_at')
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {quote(Alarm._meta.db_table)} SET {quote(field.column)} = %s WHERE {quote(Alarm._meta.pk.column)} = %s',
+            [(field.get_db_prep_value(next_fire_at, connection), alarm_id) for alarm_id, next_fire_at in pairs],
+        )
+
+
+def insert_rows(model, field_names, rows, ignore_conflicts=False):
+    """INSERT plain value tuples with one executemany, without building model instances / INSERT de tuplas de valores con un solo executemany, sin construir instancias del modelo
+
+    For large backfills bulk_create spends most of its time creating objects and adapting each
+    value; here each distinct value is adapted once. / En recuperaciones grandes bulk_create pasa
+    la mayor parte del tiempo creando objetos y adaptando cada valor; aquí cada valor distinto se
+    adapta una sola vez.
+    """
+    if not rows:
+        return
+    db = transaction.get_connection()
+    fields = [model._meta.get_field(name) for name in field_names]
+    on_conflict = OnConflict.IGNORE if ignore_conflicts else None
+    quote = db.ops.quote_name
+    sql = (
+        f"{db.ops.insert_statement(on_conflict=on_conflict)} {quote(model._meta.db_table)} "
+        f"({', '.join(quote(field.column) for field in fields)}) VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"{db.ops.on_conflict_suffix_sql(fields, on_conflict, None, None)}"
+    )
+    adapted = [{} for _ in fields]
+
+    def adapt(position, value):
+        if value is None or isinstance(value, (int, str)):
+            return value  # Passed to the driver as is / Se pasan al driver tal cual
+        if isinstance(value, (list, dict)):
+            return fields[position].get_db_prep_save(value, db)  # JSON values cannot be cache keys / Los valores JSON no pueden ser claves de caché
+        cache = adapted[position]
+        if value not in cache:
+            cache[value] = fields[position].get_db_prep_save(value, db)
+        return cache[value]
+
+    with db.cursor() as cursor:
+        cursor.executemany(sql.rstrip(), [
+            tuple(adapt(position, value) for position, value in enumerate(row))
+            for row in rows
+        ])
+
+
+def _advance(alarms, now, **updates):
+    """Move alarms to their following occurrence after `now` / Mover las alarmas a su siguiente ocurrencia después de `now`"""
+    for alarm in alarms:
+        alarm.next_fire_at = next_occurrence(alarm, now) if alarm.is_active else None
+    write_next_fire_at([(alarm.id, alarm.next_fire_at) for alarm in alarms], **updates)
+
+
+# A regular occurrence starts a fresh snooze allowance; a snooze re-fire keeps counting / Una ocurrencia regular reinicia los snoozes permitidos; un re-disparo pospuesto sigue contando
+_SNOOZE_COUNT_AFTER_FIRE = Case(When(snoozed_until__isnull=True, then=Value(0)), default=F('snooze_count'))
+
+
+def fire_alarms(alarms, now=None, user_action='auto-trigger', scheduled_at=None, buffered=True):
+    """Mark alarms as triggered and log them in a few batched queries / Marcar alarmas como disparadas y registrarlas con pocas consultas por lotes
+
+    `scheduled_at` maps alarm ids to the occurrence being fired, logged next to the fire
+    instant so the firing lag can be measured. / `scheduled_at` asocia ids de alarma con la
+    ocurrencia que se dispara, registrada junto al instante del disparo para poder medir el
+    retraso.
+    """
+    alarms = list(alarms)
+    if not alarms:
+        return alarms
+    now = now or timezone.now()
+    scheduled_at = scheduled_at or {}
+
+    with transaction.atomic():
+        # Counters and the following occurrence, one UPDATE per distinct next_fire_at / Contadores y siguiente ocurrencia, un UPDATE por next_fire_at distinto
+        _advance(alarms, now, times_triggered=F('times_triggered') + 1, last_triggered=now, updated_at=now,
+                 snooze_count=_SNOOZE_COUNT_AFTER_FIRE, snoozed_until=None)
+        # One INSERT for all the log rows (or queued when buffered) / Un INSERT para todas las filas de registro (o en cola si hay búfer)
+        write_logs([
+            AlarmLog(alarm=alarm, alarm_title=alarm.title, status='triggered', user_action=user_action,
+                     triggered_at=now, scheduled_at=scheduled_at.get(alarm.id))
+            for alarm in alarms
+        ], buffered=buffered)
+        # Daily rollup for the statistics page / Acumulado diario para la página de estadísticas
+        rollups.increment(day=timezone.localdate(now), alarms_triggered=len(alarms))
+    return alarms
+
+
+def miss_alarms(alarms, now=None, user_action='dispatcher-late', buffered=True):
+    """Log occurrences found too late to ring and advance the alarms past them / Registrar ocurrencias encontradas demasiado tarde para sonar y avanzar las alarmas más allá de ellas"""
+    alarms = list(alarms)
+    if not alarms:
+        return alarms
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        _advance(alarms, now, snooze_count=0, snoozed_until=None)
+        write_logs([
+            AlarmLog(alarm=alarm, alarm_title=alarm.title, status='missed', user_action=user_action,
+                     triggered_at=now)
+            for alarm in alarms
+        ], buffered=buffered)
+    return alarms
@@ -0,0 +1,192 @@
+"""
+In-memory Active Alarm Index / Índice en Memoria de Alarmas Activas
+Answers "is anything due?" without touching the database / Responde "¿hay algo pendiente?" sin tocar la base de datos
+
+
+"""
+
+import heapq
+import threading
+from collections import defaultdict, namedtuple
+
+from .scheduling import latest_occurrence
+from .version_stamps import bump_version, get_version
+
+
+VERSION_NAME = 'alarms'
+
+INDEX_FIELDS = (
+    'id', 'title', 'hour', 'minute', 'period', 'weekday_mask', 'alarm_date', 'silenced_until', 'snoozed_until',
+)
+
+# Lightweight read-only copy of the fields the schedule checks need / Copia liviana de solo lectura de los campos que necesitan las verificaciones
+AlarmEntry = namedtuple('AlarmEntry', INDEX_FIELDS)
+
+
+class ActiveAlarmIndex:
+    """Active alarms keyed by (hour, minute, period), weekday and date / Alarmas activas indexadas por (hora, minuto, período), día de la semana y fecha"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None  # Stamp the current contents correspond to / Marca a la que corresponde el contenido actual
+        self._entries = {}
+        self._by_time = defaultdict(set)
+        self._by_weekday = defaultdict(set)
+        self._by_date = defaultdict(set)
+        # Pending snooze re-fires as a (snoozed_until, id) heap; stale entries are skipped when reached / Re-disparos pospuestos pendientes como heap (snoozed_until, id); las entradas vencidas se saltan al alcanzarlas
+        self._snoozes = []
+
+    def load(self):
+        """Rebuild the whole index from the Alarm table / Reconstruir todo el índice desde la tabla Alarm"""
+        from .models import Alarm
+
+        version = get_version(VERSION_NAME)
+        rows = Alarm.objects.filter(is_active=True).values_list(*INDEX_FIELDS)
+        with self._lock:
+            self._entries = {}
+            self._by_time = defaultdict(set)
+            self._by_weekday = defaultdict(set)
+            self._by_date = defaultdict(set)
+            self._snoozes = []
+            for row in rows:
+                self._add(AlarmEntry(*row))
+            heapq.heapify(self._snoozes)
+            self._version = version
+
+    def is_current(self):
+        """Whether the contents match the shared stamp (a cache read, no query) / Si el contenido coincide con la marca compartida (una lectura de caché, sin consulta)"""
+        return self._version is not None and self._version == get_version(VERSION_NAME)
+
+    def ensure_current(self):
+        """Reload if another worker changed alarms since the last load / Recargar si otro worker cambió alarmas desde la última carga"""
+        if not self.is_current():
+            self.load()
+
+    def _add(self, entry):
+        self._entries[entry.id] = entry
+        self._by_time[(entry.hour, entry.minute, entry.period)].add(entry.id)
+        for weekday in range(7):
+            if entry.weekday_mask & (1 << weekday):
+                self._by_weekday[weekday].add(entry.id)
+        if entry.alarm_date is not None:
+            self._by_date[entry.alarm_date].add(entry.id)
+        if entry.snoozed_until is not None:
+            heapq.heappush(self._snoozes, (entry.snoozed_until, entry.id))
+
+    def _remove(self, alarm_id):
+        entry = self._entries.pop(alarm_id, None)
+        if entry is None:
+            return
+        buckets = [self._by_time.get((entry.hour, entry.minute, entry.period)), self._by_date.get(entry.alarm_date)]
+        buckets.extend(self._by_weekday.get(weekday) for weekday in range(7))
+        for bucket in buckets:
+            if bucket is not None:
+                bucket.discard(alarm_id)
+
+    def _advance_version(self):
+        """Bump the shared stamp, staying current only if nobody else wrote meanwhile / Incrementar la marca compartida, quedando al día solo si nadie más escribió entretanto"""
+        previous = self._version
+        version = bump_version(VERSION_NAME)
+        self._version = version if previous is not None and version == previous + 1 else None
+
+    def apply(self, alarm):
+        """Incrementally refresh one alarm after it was saved / Actualizar incrementalmente una alarma después de guardarla"""
+        with self._lock:
+            self._remove(alarm.pk)
+            if alarm.is_active:
+                self._add(AlarmEntry(*(getattr(alarm, field) for field in INDEX_FIELDS)))
+            self._advance_version()
+
+    def discard(self, alarm_id):
+        """Incrementally drop one alarm after it was deleted / Quitar incrementalmente una alarma después de eliminarla"""
+        with self._lock:
+            self._remove(alarm_id)
+            self._advance_version()
+
+    def snooze(self, refires):
+        """Record (alarm id, snoozed_until) pairs written with queryset.update() / Registrar pares (id de alarma, snoozed_until) escritos con queryset.update()"""
+        with self._lock:
+            for alarm_id, snoozed_until in refires:
+                entry = self._entries.get(alarm_id)
+                if entry is not None:
+                    self._entries[alarm_id] = entry._replace(snoozed_until=snoozed_until)
+                    heapq.heappush(self._snoozes, (snoozed_until, alarm_id))
+            self._advance_version()
+
+    def invalidate(self):
+        """Force every worker to reload, e.g. after queryset.update() / Forzar la recarga en todos los workers, p. ej. tras queryset.update()"""
+        with self._lock:
+            bump_version(VERSION_NAME)
+            self._version = None
+
+    def _scheduled_ids(self, day):
+        return self._by_date.get(day, set()) | self._by_weekday.get(day.weekday(), set())
+
+    def due(self, hour, minute, period, weekday, day, now=None, refresh=True):
+        """Active alarms due at an exact 12h time / Alarmas activas pendientes a una hora 12h exacta
+
+        With refresh=False the caller has already reloaded the index (async views load it in a
+        worker thread). / Con refresh=False quien llama ya recargó el índice (las vistas
+        asíncronas lo cargan en un hilo).
+        """
+        if refresh:
+            self.ensure_current()
+        with self._lock:
+            ids = self._by_time.get((hour, minute, period), set()) & (
+                self._by_date.get(day, set()) | self._by_weekday.get(weekday, set())
+            )
+            return self._not_silenced([self._entries[i] for i in ids], now)
+
+    def due_in_window(self, segments, now=None, refresh=True):
+        """Active alarms due anywhere in window segments / Alarmas activas pendientes en cualquier parte de los segmentos"""
+        if refresh:
+            self.ensure_current()
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if latest_occurrence(entry, segments)]
+            return self._not_silenced(entries, now)
+
+    def pop_due_snoozes(self, now, refresh=True):
+        """Ids of snooze re-fires due at `now`, each returned once: O(1) when none, O(log n) per re-fire / Ids de re-disparos pospuestos pendientes en `now`, cada uno devuelto una vez: O(1) si no hay, O(log n) por re-disparo
+
+        The database stays authoritative; callers fire only rows still snoozed until `now` or
+        earlier. / La base de datos sigue mandando; quien llama solo dispara filas que sigan
+        pospuestas hasta `now` o antes.
+        """
+        if refresh:
+            self.ensure_current()
+        ids = []
+        with self._lock:
+            while self._snoozes and self._snoozes[0][0] <= now:
+                snoozed_until, alarm_id = heapq.heappop(self._snoozes)
+                entry = self._entries.get(alarm_id)
+                if entry is not None and entry.snoozed_until == snoozed_until:
+                    ids.append(alarm_id)
+        return ids
+
+    @staticmethod
+    def _not_silenced(entries, now):
+        if now is None:
+            return entries
+        return [entry for entry in entries if entry.silenced_until is None or entry.silenced_until <= now]
+
+    def active(self):
+        """Every active alarm ordered by time / Todas las alarmas activas ordenadas por hora"""
+        self.ensure_current()
+        with self._lock:
+            return sorted(self._entries.values(), key=lambda entry: (entry.hour, entry.minute, entry.id))
+
+    def active_count(self):
+        """Number of active alarms / Número de alarmas activas"""
+        self.ensure_current()
+        with self._lock:
+            return len(self._entries)
+
+    def scheduled_count(self, day):
+        """Number of active alarms scheduled on a calendar day / Número de alarmas activas programadas en un día"""
+        self.ensure_current()
+        with self._lock:
+            return len(self._scheduled_ids(day))
+
+
+# Process-wide index / Índice del proceso
+alarm_index = ActiveAlarmIndex()
@@ -12,3 +12,15 @@ class ClockConfig(AppConfig):
     """Clock app configuration / Configuración de la app del reloj"""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clock'  # App name / Nombre de la app
+
+    def ready(self):
+        """Register signal handlers, connection tuning and the alarm index load / Registrar manejadores de señales, ajuste de conexiones y la carga del índice de alarmas"""
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+
+        from . import db, signals
+
+        connection_created.connect(db.apply_sqlite_pragmas, dispatch_uid='clock_sqlite_pragmas')
+
+        # Querying inside ready() is discouraged, so the load runs as the app starts serving / Consultar dentro de ready() no se recomienda, así que la carga ocurre cuando la app empieza a atender
+        request_started.connect(signals.warm_alarm_index, dispatch_uid='clock_alarm_index_warm')
@@ -0,0 +1,147 @@
+"""
+Missed Occurrence Backfill / Recuperación de Ocurrencias Perdidas
+Logs every occurrence that passed while nothing was running, expanded with NumPy / Registra cada ocurrencia que pasó mientras nada corría, expandida con NumPy
+
+An active alarm whose next_fire_at is already behind the cutoff was not fired by anyone, so its
+own next_fire_at marks where its downtime began. Each batch of alarms is expanded against every
+local day of the window at once (an alarms × days matrix), instead of walking the window minute
+by minute. / Una alarma activa cuyo next_fire_at ya quedó detrás del corte no fue disparada por
+nadie, así que su propio next_fire_at marca dónde empezó su inactividad. Cada lote de alarmas se
+expande contra todos los días locales de la ventana a la vez (una matriz alarmas × días), en
+lugar de recorrer la ventana minuto a minuto.
+"""
+
+import datetime
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .alarm_events import insert_rows, write_next_fire_at
+from .timeseries import invalidate_series
+from .dispatcher import claim_occurrences, default_node_id
+from .models import Alarm, AlarmLog
+from .scheduling import next_occurrence
+
+
+# Occurrences older than this are not logged, only skipped / Las ocurrencias más antiguas que esto no se registran, solo se saltan
+MAX_BACKFILL_WINDOW = datetime.timedelta(days=31)
+
+BACKFILL_BATCH_SIZE = 5000
+
+# A weekly pattern always repeats within eight days / Un patrón semanal siempre se repite dentro de ocho días
+_LOOKAHEAD_DAYS = 8
+
+_FIELDS = ('id', 'title', 'hour', 'minute', 'second', 'period', 'weekday_mask', 'alarm_date', 'next_fire_at', 'silenced_until')
+
+
+def _instant(epoch):
+    return datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+
+
+def _day_starts(first, last):
+    """Local dates from first to last with their weekday and midnight epoch / Fechas locales de first a last con su día de la semana y época de medianoche"""
+    days = [first + datetime.timedelta(days=offset) for offset in range((last - first).days + 1)]
+    return (
+        np.array([day.toordinal() for day in days], dtype=np.int64),
+        np.array([day.weekday() for day in days], dtype=np.int64),
+        np.array([timezone.make_aware(datetime.datetime.combine(day, datetime.time.min)).timestamp() for day in days],
+                 dtype=np.int64),
+    )
+
+
+def expand_occurrences(rows, until, max_window=MAX_BACKFILL_WINDOW):
+    """Missed occurrences and next occurrence for a batch of alarm rows / Ocurrencias perdidas y siguiente ocurrencia para un lote de filas de alarmas
+
+    `rows` are tuples in _FIELDS order. Returns (alarm row positions, occurrence epochs) of every
+    occurrence in [start, until), plus one epoch per row for the first occurrence at or after
+    `until` (-1 when none falls in the lookahead). / `rows` son tuplas en el orden de _FIELDS.
+    Devuelve (posiciones de fila, épocas de ocurrencia) de cada ocurrencia en [inicio, until), más
+    una época por fila de la primera ocurrencia en o después de `until` (-1 si ninguna cae en el
+    horizonte).
+    """
+    floor = until - max_window
+    starts = np.array([
+        max(next_fire_at, silenced_until or next_fire_at, floor).timestamp()
+        for *_, next_fire_at, silenced_until in rows
+    ], dtype=np.float64)
+    seconds = np.array([
+        ((hour % 12) + (12 if period == 'PM' else 0)) * 3600 + minute * 60 + (second or 0)
+        for _, _, hour, minute, second, period, *_ in rows
+    ], dtype=np.int64)
+    masks = np.array([row[6] for row in rows], dtype=np.int64)
+    dates = np.array([row[7].toordinal() if row[7] else -1 for row in rows], dtype=np.int64)
+
+    first_day = timezone.localtime(_instant(starts.min())).date()
+    last_day = timezone.localtime(until).date() + datetime.timedelta(days=_LOOKAHEAD_DAYS)
+    day_ordinals, weekdays, midnights = _day_starts(first_day, last_day)
+
+    # alarms × days / alarmas × días
+    fires = ((masks[:, None] >> weekdays[None, :]) & 1).astype(bool) | (dates[:, None] == day_ordinals[None, :])
+    moments = midnights[None, :] + seconds[:, None]
+    until_epoch = until.timestamp()
+
+    missed = fires & (moments >= starts[:, None]) & (moments < until_epoch)
+    positions, columns = np.nonzero(missed)
+
+    upcoming = fires & (moments >= until_epoch)
+    has_next = upcoming.any(axis=1)
+    following = np.where(has_next, moments[np.arange(len(rows)), upcoming.argmax(axis=1)], -1)
+    return positions, moments[positions, columns], following
+
+
+def backfill_missed(until=None, batch_size=BACKFILL_BATCH_SIZE, max_window=MAX_BACKFILL_WINDOW,
+                    user_action='backfill', dry_run=False):
+    """Log occurrences missed before `until` and move those alarms past it; returns (alarms, logs) / Registrar las ocurrencias perdidas antes de `until` y mover esas alarmas más allá; devuelve (alarmas, registros)
+
+    Each batch claims its alarms' current next_fire_at like a dispatcher does, so a dispatcher
+    or another backfill running at the same time never logs the same alarm twice. / Cada lote
+    reclama el next_fire_at actual de sus alarmas como lo hace un despachador, así que un
+    despachador u otra recuperación simultánea nunca registra dos veces la misma alarma.
+    """
+    until = until or timezone.now()
+    behind = Alarm.objects.filter(is_active=True, next_fire_at__lt=until).order_by('id')
+    claimant = f"{default_node_id()}:backfill"
+    total_alarms = total_logs = 0
+    last_id = 0
+    batches = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(behind.filter(id__gt=last_id).values_list(*_FIELDS)[:batch_size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            if not dry_run:
+                batches += 1
+                won = claim_occurrences([(row[0], row[8]) for row in rows], f"{claimant}#{batches}", now=until)
+                rows = [row for row in rows if row[0] in won]
+            if not rows:
+                continue
+
+            positions, moments, following = expand_occurrences(rows, until, max_window)
+            total_alarms += len(rows)
+            total_logs += len(positions)
+            if dry_run:
+                continue
+
+            # Alarms sharing a time of day share their instants / Las alarmas con la misma hora del día comparten sus instantes
+            instants = {moment: _instant(moment) for moment in set(moments.tolist())}
+            insert_rows(AlarmLog, ('alarm', 'alarm_title', 'status', 'user_action', 'triggered_at'), [
+                (rows[position][0], rows[position][1], 'missed', user_action, instants[moment])
+                for position, moment in zip(positions.tolist(), moments.tolist())
+            ])
+            # Missed logs land in past buckets / Los registros perdidos caen en intervalos pasados
+            if len(positions):
+                invalidate_series()
+
+            pairs = []
+            for row, moment in zip(rows, following.tolist()):
+                if moment >= 0:
+                    pairs.append((row[0], _instant(moment)))
+                else:
+                    # One-off alarm already past, or dated beyond the lookahead / Alarma única ya pasada, o con fecha más allá del horizonte
+                    alarm = Alarm(hour=row[2], minute=row[3], second=row[4], period=row[5], weekday_mask=row[6], alarm_date=row[7])
+                    pairs.append((row[0], next_occurrence(alarm, until - datetime.timedelta(microseconds=1))))
+            write_next_fire_at(pairs, snooze_count=0, snoozed_until=None)
+    return total_alarms, total_logs
@@ -0,0 +1,18 @@
+"""
+Database Connection Tuning / Ajuste de Conexiones a la Base de Datos
+Applies the configured SQLite PRAGMAs to each new connection / Aplica los PRAGMAs de SQLite configurados a cada nueva conexión
+
+
+"""
+
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created handler running settings.CLOCK_SQLITE_PRAGMAS / Manejador de connection_created que ejecuta settings.CLOCK_SQLITE_PRAGMAS"""
+    pragmas = getattr(settings, 'CLOCK_SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
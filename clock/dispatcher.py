@@ -0,0 +1,214 @@
+"""
+Server-side Alarm Dispatcher / Despachador de Alarmas en el Servidor
+Fires every due occurrence exactly once, whether or not a browser is open / Dispara cada ocurrencia pendiente exactamente una vez, haya o no un navegador abierto
+
+Several dispatchers may run against one database: each (alarm, occurrence) is claimed with a
+unique AlarmOccurrence row in the same transaction that fires it, and only the claim winner fires.
+/ Varios despachadores pueden correr sobre una misma base: cada (alarma, ocurrencia) se reclama
+con una fila única de AlarmOccurrence en la misma transacción que la dispara, y solo el ganador
+del reclamo la dispara.
+"""
+
+import datetime
+import itertools
+import os
+import socket
+import threading
+import time
+
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .alarm_events import fire_alarms, insert_rows, miss_alarms
+from .models import Alarm, AlarmLog, AlarmOccurrence
+from .reloj_core import CircularClock
+from .version_stamps import bump_version
+
+
+# Stamp bumped after each batch the dispatcher commits; event streams wait on it / Marca incrementada tras cada lote que el despachador confirma; los flujos de eventos la esperan
+VERSION_NAME = 'dispatch'
+
+# Fields fire_alarms() and next_occurrence() need / Campos que necesitan fire_alarms() y next_occurrence()
+DISPATCH_FIELDS = (
+    'id', 'title', 'hour', 'minute', 'second', 'period', 'weekday_mask', 'alarm_date', 'is_active', 'next_fire_at',
+)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Occurrences found later than this are logged as missed instead of ringing / Las ocurrencias encontradas más tarde que esto se registran como perdidas en lugar de sonar
+DEFAULT_GRACE = datetime.timedelta(minutes=5)
+
+# Claims only matter while a node may still hold a stale read of the row / Los reclamos solo importan mientras un nodo pueda tener una lectura vieja de la fila
+CLAIM_RETENTION = datetime.timedelta(days=1)
+CLAIM_PRUNE_INTERVAL = 3600
+
+
+def default_node_id():
+    """Host and process of this dispatcher / Host y proceso de este despachador"""
+    return f"{socket.gethostname()[:60]}:{os.getpid()}"
+
+
+def claim_occurrences(pairs, claimed_by, now=None):
+    """Claim (alarm id, occurrence_at) pairs; returns the alarm ids this call won / Reclamar pares (id de alarma, occurrence_at); devuelve los ids de alarma que ganó esta llamada
+
+    Conflicting claims are dropped by the INSERT itself, so losing costs nothing beyond it and
+    is never retried. / Los reclamos en conflicto los descarta el propio INSERT, así que perder no
+    cuesta más que eso y nunca se reintenta.
+    """
+    if not pairs:
+        return set()
+    now = now or timezone.now()
+    insert_rows(
+        AlarmOccurrence, ('alarm', 'occurrence_at', 'claimed_by', 'claimed_at'),
+        [(alarm_id, occurrence_at, claimed_by, now) for alarm_id, occurrence_at in pairs],
+        ignore_conflicts=True,
+    )
+    return set(AlarmOccurrence.objects.filter(
+        alarm_id__in=[alarm_id for alarm_id, _ in pairs], claimed_by=claimed_by,
+    ).values_list('alarm_id', flat=True))
+
+
+def prune_claims(before):
+    """Delete claims for occurrences older than `before` / Borrar los reclamos de ocurrencias anteriores a `before`"""
+    return AlarmOccurrence.objects.filter(occurrence_at__lt=before).delete()[0]
+
+
+class AlarmDispatcher:
+    """Ticks with a CircularClock and fires due alarms from the next_fire_at index / Avanza con un CircularClock y dispara las alarmas pendientes desde el índice next_fire_at
+
+    Each batch selects due rows, claims them, advances next_fire_at and writes the logs in one
+    transaction, so an occurrence is either fully dispatched by one node or left due for the
+    next tick. / Cada lote selecciona las filas pendientes, las reclama, avanza next_fire_at y
+    escribe los registros en una transacción, así que una ocurrencia queda despachada por
+    completo por un nodo o pendiente para el siguiente tick.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, grace=DEFAULT_GRACE, clock=None, node_id=None):
+        self.batch_size = batch_size
+        self.grace = grace
+        self.clock = clock or CircularClock()
+        self.node_id = node_id or default_node_id()
+        self._batches = itertools.count(1)
+        self.claims_lost = 0  # Rows another node fired first / Filas que otro nodo disparó primero
+        self._stop = threading.Event()
+
+    def select_due(self, now):
+        """Due rows for one batch / Filas pendientes para un lote"""
+        due = Alarm.objects.due(now).only(*DISPATCH_FIELDS)
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent nodes take disjoint batches instead of queueing on the same rows / Los nodos concurrentes toman lotes disjuntos en lugar de esperar por las mismas filas
+            due = due.select_for_update(skip_locked=True)
+        return list(due[:self.batch_size])
+
+    def dispatch(self, due, now):
+        """Claim selected rows and fire or miss the won ones; runs inside the batch transaction / Reclamar las filas seleccionadas y disparar o perder las ganadas; corre dentro de la transacción del lote"""
+        won = claim_occurrences([(alarm.id, alarm.next_fire_at) for alarm in due], f"{self.node_id}#{next(self._batches)}", now=now)
+        self.claims_lost += len(due) - len(won)
+        scheduled = [(alarm, alarm.next_fire_at) for alarm in due if alarm.id in won]
+        # Logs bypass the write-behind buffer: the stamp bumped after commit must find them / Los registros evitan el búfer de escritura diferida: la marca incrementada tras confirmar debe encontrarlos
+        fire_alarms([alarm for alarm, at in scheduled if now - at <= self.grace], now=now, user_action='dispatcher',
+                    scheduled_at={alarm.id: at for alarm, at in scheduled}, buffered=False)
+        miss_alarms([alarm for alarm, at in scheduled if now - at > self.grace], now=now, buffered=False)
+        return [(alarm, at, 'triggered' if now - at <= self.grace else 'missed') for alarm, at in scheduled]
+
+    def dispatch_batch(self, now=None):
+        """Dispatch up to batch_size due occurrences: returns [(alarm, scheduled_at, status)] / Despachar hasta batch_size ocurrencias pendientes: devuelve [(alarma, programada_en, estado)]"""
+        now = now or timezone.now()
+        with transaction.atomic():
+            dispatched = self.dispatch(self.select_due(now), now)
+        if dispatched:
+            bump_version(VERSION_NAME)
+        return dispatched
+
+    def dispatch_due(self, now=None):
+        """Dispatch batches until one fires nothing: all done, or left to another node / Despachar lotes hasta que uno no dispare nada: todo hecho, o cedido a otro nodo"""
+        now = now or timezone.now()
+        dispatched = []
+        while True:
+            batch = self.dispatch_batch(now)
+            if not batch:
+                return dispatched
+            dispatched.extend(batch)
+
+    def run(self, on_dispatch=None, seconds=None):
+        """Dispatch on every second boundary until stop() or for `seconds` / Despachar en cada cambio de segundo hasta stop() o durante `seconds`"""
+        from .backfill import backfill_missed
+
+        deadline = time.monotonic() + seconds if seconds is not None else None
+        try:
+            # Occurrences that passed while no dispatcher was running are logged as missed in bulk / Las ocurrencias que pasaron mientras ningún despachador corría se registran como perdidas en bloque
+            backfill_missed(until=timezone.now() - self.grace)
+        except DatabaseError as e:
+            print(f"Error backfilling missed alarms: {e}")
+        finally:
+            close_old_connections()
+        next_prune = time.monotonic()
+        while not self._stop.is_set() and (deadline is None or time.monotonic() < deadline):
+            self.clock.sync_colombia_time()
+            try:
+                dispatched = self.dispatch_due()
+                if dispatched and on_dispatch:
+                    on_dispatch(dispatched)
+                if time.monotonic() >= next_prune:
+                    prune_claims(timezone.now() - CLAIM_RETENTION)
+                    next_prune = time.monotonic() + CLAIM_PRUNE_INTERVAL
+            except DatabaseError as e:
+                # Lock timeouts under contention: the next tick tries again / Tiempos de espera de bloqueo bajo contención: el siguiente tick lo intenta de nuevo
+                print(f"Error dispatching alarms: {e}")
+            finally:
+                close_old_connections()
+            # Alarm times have whole seconds, so waking just after each boundary is enough / Las horas de alarma tienen segundos enteros, así que despertar justo después de cada cambio basta
+            self._stop.wait(1.0 - time.time() % 1.0)
+
+    def stop(self):
+        self._stop.set()
+
+
+# Fields of a fired event as sent to clients / Campos de un evento disparado tal como se envían a los clientes
+EVENT_FIELDS = (
+    'id', 'alarm_id', 'alarm_title', 'triggered_at', 'scheduled_at', 'alarm__hour', 'alarm__minute', 'alarm__period',
+)
+
+
+def event_payload(row):
+    """Client shape of a triggered log row, like check_alarms entries / Forma para el cliente de una fila disparada, como las entradas de check_alarms"""
+    return {
+        'event_id': row['id'],
+        'id': row['alarm_id'],
+        'title': row['alarm_title'],
+        'time': f"{row['alarm__hour']:02d}:{row['alarm__minute']:02d} {row['alarm__period']}" if row['alarm_id'] else None,
+        'triggered_at': row['triggered_at'].isoformat(),
+        'scheduled_at': row['scheduled_at'].isoformat() if row['scheduled_at'] else None,
+    }
+
+
+# Rows read per events query / Filas leídas por consulta de eventos
+EVENT_PAGE_SIZE = 100
+
+
+def triggered_events(after_id=None, since=None, until=None, limit=EVENT_PAGE_SIZE):
+    """Triggered log rows, oldest first, after an id or within [since, until) / Filas disparadas, de la más antigua a la más reciente, después de un id o dentro de [since, until)"""
+    logs = AlarmLog.objects.filter(status='triggered')
+    if after_id is not None:
+        logs = logs.filter(id__gt=after_id)
+    if since is not None:
+        logs = logs.filter(triggered_at__gte=since)
+    if until is not None:
+        logs = logs.filter(triggered_at__lt=until)
+    return [event_payload(row) for row in logs.order_by('id').values(*EVENT_FIELDS)[:limit]]
+
+
+def all_triggered_events(after_id=None, since=None, until=None, page_size=EVENT_PAGE_SIZE):
+    """Every triggered event, one page at a time until a page comes back short / Todos los eventos disparados, página a página hasta que una venga incompleta"""
+    events = []
+    while True:
+        page = triggered_events(after_id=after_id, since=since, until=until, limit=page_size)
+        events.extend(page)
+        if len(page) < page_size:
+            return events
+        after_id = page[-1]['event_id']
+
+
+def latest_event_id():
+    """Id of the newest log row, where a new event stream starts / Id de la fila más reciente, donde empieza un nuevo flujo de eventos"""
+    return AlarmLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
@@ -0,0 +1,106 @@
+"""
+Alarm Log Export / Exportación de Registros de Alarmas
+Constant-memory CSV and JSON-lines streams over keyset-ordered chunks / Flujos CSV y JSON-lines de memoria constante sobre bloques ordenados por clave
+
+
+"""
+
+import csv
+import json
+import zlib
+
+from .models import AlarmLog
+from .pagination import after_q
+
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+EXPORT_COLUMNS = ('id', 'alarm_id', 'alarm_title', 'status', 'triggered_at', 'user_action', 'response_time', 'scheduled_at')
+
+# Rows fetched per keyset page / Filas obtenidas por página de claves
+EXPORT_CHUNK_SIZE = 5000
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer / Objeto tipo archivo cuyo write() devuelve la línea, para csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def iter_log_rows(start=None, end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield log rows in (triggered_at, id) order, one keyset page at a time / Generar filas en orden (triggered_at, id), una página de claves a la vez
+
+    Each page resumes after the last (triggered_at, id) seen, so the cost per page stays
+    constant instead of growing like OFFSET would. / Cada página continúa después del último
+    (triggered_at, id) visto, así que el costo por página es constante, a diferencia de OFFSET.
+    """
+    queryset = AlarmLog.objects.order_by('triggered_at', 'id')
+    if start is not None:
+        queryset = queryset.filter(triggered_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(triggered_at__lt=end)
+
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(after_q(('triggered_at', 'id'), last))
+        count = 0
+        for row in page.values_list(*EXPORT_COLUMNS)[:chunk_size].iterator(chunk_size=chunk_size):
+            yield row
+            count += 1
+            last = (row[4], row[0])
+        if count < chunk_size:
+            return
+
+
+def _serialize(row):
+    values = dict(zip(EXPORT_COLUMNS, row))
+    values['triggered_at'] = values['triggered_at'].isoformat()
+    if values['scheduled_at'] is not None:
+        values['scheduled_at'] = values['scheduled_at'].isoformat()
+    if values['response_time'] is not None:
+        values['response_time'] = values['response_time'].total_seconds()
+    return values
+
+
+def csv_lines(rows):
+    """CSV header followed by one line per row / Encabezado CSV seguido de una línea por fila"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        values = _serialize(row)
+        yield writer.writerow(['' if values[column] is None else values[column] for column in EXPORT_COLUMNS])
+
+
+def jsonl_lines(rows):
+    """One JSON object per line / Un objeto JSON por línea"""
+    for row in rows:
+        yield json.dumps(_serialize(row), ensure_ascii=False) + '\n'
+
+
+def gzip_stream(lines, flush_bytes=64 * 1024):
+    """Gzip a stream of text lines without buffering the whole output / Comprimir con gzip un flujo de líneas sin acumular toda la salida"""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container / 31 = contenedor gzip
+    pending = flush_bytes  # Flush after the first line so bytes go out at once / Vaciar tras la primera línea para que los bytes salgan de inmediato
+    for line in lines:
+        data = line.encode('utf-8')
+        pending += len(data)
+        chunk = compressor.compress(data)
+        if pending >= flush_bytes:
+            # Push what we have so the client keeps receiving bytes / Enviar lo acumulado para que el cliente siga recibiendo bytes
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def export_stream(export_format, start=None, end=None, compress=False):
+    """Iterator of response chunks for an export / Iterador de fragmentos de respuesta para una exportación"""
+    rows = iter_log_rows(start, end)
+    lines = csv_lines(rows) if export_format == 'csv' else jsonl_lines(rows)
+    if compress:
+        return gzip_stream(lines)
+    return (line.encode('utf-8') for line in lines)
@@ -0,0 +1,71 @@
+"""
+Trigger Heatmap / Mapa de Calor de Disparos
+Hour-of-day × weekday counts accumulated in streaming chunks / Conteos hora del día × día de la semana acumulados en bloques
+
+
+"""
+
+import datetime
+from itertools import islice
+
+import numpy as np
+from django.utils import timezone
+
+from . import log_archive
+from .models import AlarmLog
+
+
+HOURS = 24
+WEEKDAYS = 7
+
+# Rows converted per NumPy batch; memory stays bounded by this, not by the table size / Filas convertidas por lote de NumPy; la memoria queda acotada por esto, no por el tamaño de la tabla
+HEATMAP_CHUNK_SIZE = 20_000
+
+# 1970-01-01 was a Thursday / El 1970-01-01 fue jueves
+_EPOCH_WEEKDAY = 3
+
+
+def empty_matrix():
+    """Zeroed 24×7 matrix (rows are hours, columns weekdays with 0=Monday) / Matriz 24×7 en cero (filas son horas, columnas días con 0=Lunes)"""
+    return np.zeros((HOURS, WEEKDAYS), dtype=np.int64)
+
+
+def accumulate_epochs(matrix, epochs):
+    """Add an array of UTC epoch seconds into the matrix in local time / Sumar un arreglo de segundos epoch UTC a la matriz en hora local
+
+    Colombia has no daylight saving time, so one UTC offset converts the whole chunk. / Colombia
+    no tiene horario de verano, así que un solo desfase UTC convierte todo el bloque.
+    """
+    if not len(epochs):
+        return matrix
+    first = datetime.datetime.fromtimestamp(float(epochs[0]), tz=datetime.timezone.utc)
+    offset = timezone.localtime(first).utcoffset().total_seconds()
+    local = np.floor(np.asarray(epochs, dtype=np.float64) + offset).astype(np.int64)
+    days, seconds = np.divmod(local, 86400)
+    cells = (seconds // 3600) * WEEKDAYS + (days + _EPOCH_WEEKDAY) % WEEKDAYS
+    matrix += np.bincount(cells, minlength=HOURS * WEEKDAYS).reshape(HOURS, WEEKDAYS)
+    return matrix
+
+
+def trigger_heatmap(start=None, end=None, status='triggered', chunk_size=HEATMAP_CHUNK_SIZE):
+    """Stream log timestamps and count them per local hour and weekday / Recorrer las marcas de los registros y contarlas por hora local y día de la semana"""
+    queryset = AlarmLog.objects.filter(status=status)
+    if start is not None:
+        queryset = queryset.filter(triggered_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(triggered_at__lt=end)
+    # No ordering: the server streams rows in whatever order is cheapest / Sin orden: el servidor entrega las filas en el orden más barato
+    rows = queryset.order_by().values_list('triggered_at', flat=True).iterator(chunk_size=chunk_size)
+
+    matrix = empty_matrix()
+    while True:
+        epochs = np.fromiter((moment.timestamp() for moment in islice(rows, chunk_size)), dtype=np.float64)
+        if not len(epochs):
+            break
+        accumulate_epochs(matrix, epochs)
+
+    # Archived rows are already packed, one memory-mapped slice at a time / Las filas archivadas ya están empaquetadas, un segmento mapeado a la vez
+    code = log_archive.STATUS_CODES[status]
+    for stamps, statuses, _ in log_archive.iter_chunks(start, end):
+        accumulate_epochs(matrix, stamps[statuses == code] / 1_000_000)
+    return matrix
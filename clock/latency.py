@@ -0,0 +1,124 @@
+"""
+Alarm Latency Statistics / Estadísticas de Latencia de Alarmas
+Daily percentiles of firing lag and user response time / Percentiles diarios del retraso de disparo y del tiempo de respuesta del usuario
+
+Firing lag is triggered_at - scheduled_at of each 'triggered' log; response time is stored on the
+'dismissed' and 'snoozed' logs. Only live logs carry these columns, so archived months are not
+included. / El retraso de disparo es triggered_at - scheduled_at de cada registro 'triggered'; el
+tiempo de respuesta se guarda en los registros 'dismissed' y 'snoozed'. Solo los registros vivos
+tienen estas columnas, así que los meses archivados no se incluyen.
+"""
+
+import datetime
+
+import numpy as np
+from django.utils import timezone
+
+from .models import AlarmLog
+from .pagination import after_q
+from .scheduling import local_day_bounds
+
+
+PERCENTILES = (50, 95, 99)
+
+DEFAULT_LATENCY_DAYS = 7
+MAX_LATENCY_DAYS = 366
+
+# Dismissing an alarm later than this is not a response to it ringing / Descartar una alarma más tarde que esto no es una respuesta a que sonara
+MAX_RESPONSE_TIME = datetime.timedelta(hours=1)
+
+RESPONSE_STATUSES = ('dismissed', 'snoozed')
+
+# Rows read per keyset page / Filas leídas por página de claves
+LATENCY_CHUNK_SIZE = 20_000
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def response_time(last_triggered, now):
+    """Time the user took to respond to the last trigger, or None / Tiempo que tardó el usuario en responder al último disparo, o None"""
+    if last_triggered is None:
+        return None
+    elapsed = now - last_triggered
+    return elapsed if datetime.timedelta(0) <= elapsed <= MAX_RESPONSE_TIME else None
+
+
+def _pages(queryset, field, seconds, chunk_size):
+    """(event epochs, seconds) float arrays, one keyset page at a time in (triggered_at, id) order / Arreglos float (épocas del evento, segundos), una página de claves a la vez en orden (triggered_at, id)"""
+    queryset = queryset.order_by('triggered_at', 'id').values_list('triggered_at', 'id', field)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(after_q(('triggered_at', 'id'), last))
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        yield (
+            np.fromiter((moment.timestamp() for moment, _, _ in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((seconds(moment, value) for moment, _, value in rows), dtype=np.float64, count=len(rows)),
+        )
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][:2]
+
+
+def _local_days(epochs):
+    """Local day ordinals of UTC epochs; Colombia has no DST, so one offset fits all / Ordinales de día local de épocas UTC; Colombia no tiene horario de verano, así que un desfase sirve para todas"""
+    if not len(epochs):
+        return np.empty(0, dtype=np.int64)
+    offset = timezone.localtime(datetime.datetime.fromtimestamp(float(epochs[0]), tz=datetime.timezone.utc)).utcoffset()
+    return np.floor((epochs + offset.total_seconds()) / 86400).astype(np.int64) + _EPOCH_ORDINAL
+
+
+def _summary(seconds):
+    values = np.percentile(seconds, PERCENTILES)
+    return {'count': len(seconds), **{f'p{p}': round(float(v), 3) for p, v in zip(PERCENTILES, values)}}
+
+
+def _summaries(pages):
+    """{day ordinal: {'count', 'p50', 'p95', 'p99'}} in seconds / {ordinal del día: {'count', 'p50', 'p95', 'p99'}} en segundos
+
+    Pages arrive in time order, so a day is summarized and released as soon as the next one
+    starts: memory holds one day of values plus one page, not the whole range. / Las páginas
+    llegan en orden de tiempo, así que un día se resume y se libera en cuanto empieza el
+    siguiente: la memoria guarda un día de valores más una página, no todo el rango.
+    """
+    summaries = {}
+    day, groups = None, []
+    for epochs, seconds in pages:
+        days = _local_days(epochs)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1))
+        for group_day, group in zip(days[starts].tolist(), np.split(seconds, starts[1:])):
+            if group_day != day:
+                if groups:
+                    summaries[day] = _summary(np.concatenate(groups))
+                day, groups = group_day, []
+            groups.append(group)
+    if groups:
+        summaries[day] = _summary(np.concatenate(groups))
+    return summaries
+
+
+def daily_latency(first_day, last_day, chunk_size=LATENCY_CHUNK_SIZE):
+    """Per local day from first_day to last_day: firing lag and response time percentiles / Por día local de first_day a last_day: percentiles de retraso de disparo y de tiempo de respuesta"""
+    start, _ = local_day_bounds(first_day)
+    _, end = local_day_bounds(last_day)
+    logs = AlarmLog.objects.filter(triggered_at__gte=start, triggered_at__lt=end)
+
+    lag = _summaries(_pages(
+        logs.filter(status='triggered', scheduled_at__isnull=False), 'scheduled_at',
+        lambda fired, scheduled: (fired - scheduled).total_seconds(), chunk_size,
+    ))
+    response = _summaries(_pages(
+        logs.filter(status__in=RESPONSE_STATUSES, response_time__isnull=False), 'response_time',
+        lambda _, elapsed: elapsed.total_seconds(), chunk_size,
+    ))
+
+    empty = {'count': 0, **{f'p{p}': None for p in PERCENTILES}}
+    return [
+        {
+            'date': day.isoformat(),
+            'fire_lag': lag.get(day.toordinal(), empty),
+            'response_time': response.get(day.toordinal(), empty),
+        }
+        for day in (first_day + datetime.timedelta(days=offset) for offset in range((last_day - first_day).days + 1))
+    ]
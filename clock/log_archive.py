@@ -0,0 +1,262 @@
+"""
+Alarm Log Archive / Archivo de Registros de Alarmas
+Append-only, per-month columnar files for logs past the retention window / Archivos columnares por mes, solo de anexado, para registros fuera de la ventana de retención
+
+Each month directory holds one packed array per column, readable with np.memmap:
+    triggered_at.i8  int64  microseconds since the Unix epoch (UTC)
+    status.u1        uint8  index into AlarmLog.STATUS_CHOICES
+    alarm_id.i8      int64  alarm primary key, -1 when the alarm was deleted
+Only the fields aggregates need are kept; titles, actions and response times are dropped.
+manifest.json records the committed row count of every month, so a torn append is truncated
+away on the next run, plus the batch that was archived but maybe not yet deleted. / Cada
+directorio mensual guarda un arreglo empaquetado por columna. Solo se guardan los campos que
+necesitan los agregados. manifest.json registra las filas confirmadas de cada mes, así que un
+anexado interrumpido se trunca en la siguiente ejecución, y el lote archivado que quizá aún no
+se borró.
+"""
+
+import datetime
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import AlarmLog
+
+
+COLUMNS = (
+    ('triggered_at', np.dtype('<i8')),
+    ('status', np.dtype('u1')),
+    ('alarm_id', np.dtype('<i8')),
+)
+
+STATUS_CODES = {value: code for code, (value, _) in enumerate(AlarmLog.STATUS_CHOICES)}
+
+MISSING_ALARM_ID = -1
+
+# Rows read from a memory-mapped month per step / Filas leídas por paso de un mes mapeado en memoria
+READ_CHUNK_SIZE = 100_000
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def archive_root():
+    """Directory holding the archive / Directorio que contiene el archivo"""
+    return Path(getattr(settings, 'CLOCK_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive'))
+
+
+def to_micros(moment):
+    """Exact microseconds since the epoch for an aware datetime / Microsegundos exactos desde el epoch para un datetime consciente"""
+    return (moment - _EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def month_key(moment):
+    """Local 'YYYY-MM' a datetime belongs to / 'YYYY-MM' local al que pertenece un datetime"""
+    return timezone.localtime(moment).strftime('%Y-%m')
+
+
+def _column_path(root, month, name, dtype):
+    return root / month / f'{name}.{dtype.kind}{dtype.itemsize}'
+
+
+def load_manifest(root=None):
+    """Committed state: row count per month and the batch pending deletion / Estado confirmado: filas por mes y el lote pendiente de borrar"""
+    path = (root or archive_root()) / 'manifest.json'
+    if not path.exists():
+        return {'months': {}, 'pending': None}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_manifest(manifest, root=None):
+    """Atomically replace the manifest / Reemplazar el manifiesto de forma atómica"""
+    root = root or archive_root()
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / 'manifest.json.tmp'
+    with open(tmp, 'w') as fh:
+        json.dump(manifest, fh, sort_keys=True)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, root / 'manifest.json')
+
+
+def _batch_months(manifest):
+    """Row counts per month including the pending batch / Filas por mes incluyendo el lote pendiente"""
+    pending = manifest['pending']
+    return pending.get('months', manifest['months']) if pending else manifest['months']
+
+
+def visible_months(manifest):
+    """Row counts per month readers should use / Filas por mes que deben usar los lectores
+
+    A pending batch is in the files and, until its delete commits, still in the table too; it
+    only counts as archived once its rows are gone, so nothing is ever counted twice. / Un lote
+    pendiente está en los archivos y, hasta que su borrado se confirme, también en la tabla;
+    solo cuenta como archivado cuando sus filas ya no están, así que nada se cuenta dos veces.
+    """
+    pending = manifest['pending']
+    if pending and 'months' in pending and not _batch_queryset(pending).exists():
+        return pending['months']
+    return manifest['months']
+
+
+def discard_uncommitted(manifest, root=None):
+    """Truncate bytes appended after the last committed manifest / Truncar bytes anexados después del último manifiesto confirmado"""
+    root = root or archive_root()
+    if not root.exists():
+        return
+    months = _batch_months(manifest)
+    for month_dir in root.iterdir():
+        if not month_dir.is_dir():
+            continue
+        rows = months.get(month_dir.name, 0)
+        for name, dtype in COLUMNS:
+            path = _column_path(root, month_dir.name, name, dtype)
+            if path.exists() and path.stat().st_size > rows * dtype.itemsize:
+                os.truncate(path, rows * dtype.itemsize)
+
+
+def append_rows(rows, months, root=None):
+    """Append (id, triggered_at, status, alarm_id) rows to their month files / Anexar filas (id, triggered_at, status, alarm_id) a sus archivos mensuales
+
+    Updates the `months` row counts in memory only; the caller saves them once the files are
+    durable. / Actualiza los conteos `months` solo en memoria; quien llama los guarda cuando los
+    archivos son durables.
+    """
+    root = root or archive_root()
+    by_month = {}
+    for _, triggered_at, status, alarm_id in rows:
+        by_month.setdefault(month_key(triggered_at), []).append((
+            to_micros(triggered_at),
+            STATUS_CODES[status],
+            MISSING_ALARM_ID if alarm_id is None else alarm_id,
+        ))
+
+    for month, values in by_month.items():
+        (root / month).mkdir(parents=True, exist_ok=True)
+        for position, (name, dtype) in enumerate(COLUMNS):
+            array = np.fromiter((value[position] for value in values), dtype=dtype, count=len(values))
+            with open(_column_path(root, month, name, dtype), 'ab') as fh:
+                fh.write(array.tobytes())
+                fh.flush()
+                os.fsync(fh.fileno())
+        months[month] = months.get(month, 0) + len(values)
+
+
+def load_month(month, months, root=None):
+    """Read-only memory maps of a month's committed rows / Mapas de memoria de solo lectura de las filas confirmadas de un mes"""
+    root = root or archive_root()
+    rows = months.get(month, 0)
+    columns = {}
+    for name, dtype in COLUMNS:
+        if rows:
+            columns[name] = np.memmap(_column_path(root, month, name, dtype), dtype=dtype, mode='r', shape=(rows,))
+        else:
+            columns[name] = np.empty(0, dtype=dtype)
+    return columns
+
+
+def iter_chunks(start=None, end=None, chunk_size=READ_CHUNK_SIZE, root=None):
+    """Yield (triggered_at, status, alarm_id) arrays of archived rows in [start, end) / Generar arreglos (triggered_at, status, alarm_id) de filas archivadas en [start, end)"""
+    months = visible_months(load_manifest(root))
+    first_month = month_key(start) if start is not None else None
+    last_month = month_key(end) if end is not None else None
+    low = to_micros(start) if start is not None else None
+    high = to_micros(end) if end is not None else None
+
+    for month in sorted(months):
+        if (first_month and month < first_month) or (last_month and month > last_month):
+            continue
+        columns = load_month(month, months, root)
+        for offset in range(0, len(columns['triggered_at']), chunk_size):
+            stamps = np.asarray(columns['triggered_at'][offset:offset + chunk_size])
+            mask = np.ones(len(stamps), dtype=bool)
+            if low is not None:
+                mask &= stamps >= low
+            if high is not None:
+                mask &= stamps < high
+            yield (
+                stamps[mask],
+                np.asarray(columns['status'][offset:offset + chunk_size])[mask],
+                np.asarray(columns['alarm_id'][offset:offset + chunk_size])[mask],
+            )
+
+
+def bucket_counts(edges, statuses, root=None):
+    """Archived rows per status between consecutive edges / Filas archivadas por estado entre bordes consecutivos
+
+    `edges` are n+1 ascending aware datetimes; returns an (n, len(statuses)) int64 array. /
+    `edges` son n+1 datetimes ascendentes; devuelve un arreglo int64 de (n, len(statuses)).
+    """
+    buckets = len(edges) - 1
+    counts = np.zeros((max(buckets, 0), len(statuses)), dtype=np.int64)
+    if buckets <= 0 or not visible_months(load_manifest(root)):
+        return counts
+    edge_micros = np.array([to_micros(edge) for edge in edges], dtype=np.int64)
+    codes = [STATUS_CODES[status] for status in statuses]
+    for stamps, status, _ in iter_chunks(edges[0], edges[-1], root=root):
+        positions = np.searchsorted(edge_micros, stamps, side='right') - 1
+        for column, code in enumerate(codes):
+            counts[:, column] += np.bincount(positions[status == code], minlength=buckets)[:buckets]
+    return counts
+
+
+def _batch_queryset(batch):
+    # The id range plus the cutoff selects exactly the archived batch / El rango de ids más el corte selecciona exactamente el lote archivado
+    return AlarmLog.objects.filter(
+        id__gte=batch['first_id'], id__lte=batch['last_id'],
+        triggered_at__lt=datetime.datetime.fromisoformat(batch['cutoff']),
+    )
+
+
+def archive_logs(cutoff, batch_size=10_000, root=None):
+    """Move logs older than `cutoff` into the archive; returns rows moved / Mover registros anteriores a `cutoff` al archivo; devuelve las filas movidas
+
+    Order per batch: append and fsync, save the manifest naming the batch, delete, then save
+    the manifest again with the batch committed. A crash before the first save leaves the rows
+    in the table and the bytes are truncated next run; a crash after it leaves a pending batch
+    that readers count from the table or the files (see visible_months) and the next run
+    finishes. / Orden por lote: anexar y sincronizar, guardar el manifiesto con el lote, borrar
+    y guardar otra vez el manifiesto con el lote confirmado. Un fallo antes del primer guardado
+    deja las filas en la tabla y los bytes se truncan; un fallo después deja un lote pendiente
+    que los lectores cuentan desde la tabla o desde los archivos (ver visible_months) y que la
+    siguiente ejecución termina.
+    """
+    root = root or archive_root()
+    manifest = load_manifest(root)
+    discard_uncommitted(manifest, root)
+    if manifest['pending']:
+        _finish_batch(manifest, root)
+
+    moved = 0
+    while True:
+        rows = list(
+            AlarmLog.objects.filter(triggered_at__lt=cutoff)
+            .order_by('id')
+            .values_list('id', 'triggered_at', 'status', 'alarm_id')[:batch_size]
+        )
+        if not rows:
+            return moved
+        months = dict(manifest['months'])
+        append_rows(rows, months, root)
+        manifest['pending'] = {
+            'first_id': rows[0][0], 'last_id': rows[-1][0], 'cutoff': cutoff.isoformat(), 'months': months,
+        }
+        save_manifest(manifest, root)
+        _finish_batch(manifest, root)
+        moved += len(rows)
+
+
+def _finish_batch(manifest, root):
+    """Delete the pending batch from the table and mark it archived / Borrar el lote pendiente de la tabla y marcarlo como archivado"""
+    from .timeseries import invalidate_series
+
+    _batch_queryset(manifest['pending']).delete()
+    manifest['months'] = _batch_months(manifest)
+    manifest['pending'] = None
+    save_manifest(manifest, root)
+    # These rows are now read from the files instead of the table; recount rather than trust counts cached across the move / Estas filas ahora se leen de los archivos en lugar de la tabla; recontar en vez de confiar en conteos guardados antes del movimiento
+    invalidate_series()
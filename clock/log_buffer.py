@@ -0,0 +1,186 @@
+"""
+Write-behind AlarmLog Buffer / Búfer de Escritura Diferida para AlarmLog
+Queues log rows in memory and inserts them in batches from a background thread / Encola filas de registro en memoria y las inserta por lotes desde un hilo en segundo plano
+
+
+"""
+
+import atexit
+import json
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+
+class AlarmLogBuffer:
+    """In-memory queue of unsaved AlarmLog rows flushed with bulk_create / Cola en memoria de filas AlarmLog sin guardar volcadas con bulk_create"""
+
+    def __init__(self, max_size=100, flush_interval=1.0, max_queue=10_000, max_retries=3, dead_letter_path=None):
+        self.max_size = max_size  # Flush as soon as this many rows are queued / Volcar en cuanto haya esta cantidad de filas en cola
+        self.flush_interval = flush_interval  # Seconds between time-based flushes / Segundos entre volcados por tiempo
+        self.max_queue = max_queue  # Rows held in memory at most / Filas retenidas en memoria como máximo
+        self.max_retries = max_retries  # Failed flushes before rows are written one by one / Volcados fallidos antes de escribir las filas una a una
+        # Rows that cannot be inserted are appended here as JSON lines / Las filas que no se pueden insertar se anexan aquí como líneas JSON
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        self.dead_lettered = 0
+        self._failures = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Serializes concurrent flushes / Serializa volcados concurrentes
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def add(self, logs):
+        """Queue unsaved AlarmLog instances / Encolar instancias de AlarmLog sin guardar"""
+        with self._lock:
+            self._pending.extend(logs)
+            full = len(self._pending) >= self.max_size
+            # While the database refuses writes, the oldest rows leave memory for the dead-letter file / Mientras la base rechaza escrituras, las filas más antiguas salen de memoria hacia el archivo de descartes
+            overflow = self._pending[:max(0, len(self._pending) - self.max_queue)]
+            del self._pending[:len(overflow)]
+        if overflow:
+            self._dead_letter(overflow, "queue full")
+        if full:
+            self._wakeup.set()
+
+    def pending_count(self):
+        """Number of rows waiting to be written / Número de filas esperando ser escritas"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Synchronously write every queued row; returns the number written / Escribir sincrónicamente cada fila en cola; devuelve el número escrito
+
+        A failed batch goes back to the front of the queue for the next flush. After max_retries
+        failures in a row it is written one row at a time instead, so a single bad row cannot
+        block every later log. / Un lote fallido vuelve al frente de la cola para el siguiente
+        volcado. Tras max_retries fallos seguidos se escribe fila por fila, así que una sola fila
+        mala no puede bloquear todos los registros posteriores.
+        """
+        from .models import AlarmLog
+        from .timeseries import note_logs_written
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                AlarmLog.objects.bulk_create(batch, batch_size=500)
+                written = batch
+            except DatabaseError:
+                self._failures += 1
+                if self._failures < self.max_retries:
+                    # Put the rows back so the next flush retries them / Devolver las filas para que el siguiente volcado las reintente
+                    with self._lock:
+                        self._pending[:0] = batch
+                    raise
+                written = self._write_one_by_one(batch)
+            self._failures = 0
+            note_logs_written(log.triggered_at for log in written)
+            return len(written)
+
+    def _write_one_by_one(self, batch):
+        """Insert rows separately, dead-lettering the ones that still fail / Insertar las filas por separado, enviando a descartes las que sigan fallando"""
+        from .models import Alarm, AlarmLog
+
+        # A log outlives its alarm (on_delete=SET_NULL), also when the alarm was deleted before the flush / Un registro sobrevive a su alarma (on_delete=SET_NULL), también si se borró antes del volcado
+        existing = set(Alarm.objects.filter(id__in={log.alarm_id for log in batch if log.alarm_id}).values_list('id', flat=True))
+        written, failed = [], []
+        for log in batch:
+            if log.alarm_id is not None and log.alarm_id not in existing:
+                log.alarm = None
+            try:
+                with transaction.atomic():
+                    AlarmLog.objects.bulk_create([log])
+                written.append(log)
+            except DatabaseError as e:
+                failed.append((log, str(e)))
+        for log, error in failed:
+            self._dead_letter([log], error)
+        return written
+
+    def _dead_letter(self, logs, reason):
+        """Append rows that cannot be written to the dead-letter file / Anexar al archivo de descartes las filas que no se pueden escribir"""
+        self.dead_lettered += len(logs)
+        print(f"Dead-lettering {len(logs)} alarm logs: {reason}")
+        if self.dead_letter_path is None:
+            return
+        self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as fh:
+            for log in logs:
+                fh.write(json.dumps({
+                    'alarm_id': log.alarm_id,
+                    'alarm_title': log.alarm_title,
+                    'status': log.status,
+                    'triggered_at': log.triggered_at.isoformat() if log.triggered_at else None,
+                    'user_action': log.user_action,
+                    'response_time': log.response_time.total_seconds() if log.response_time is not None else None,
+                    'scheduled_at': log.scheduled_at.isoformat() if log.scheduled_at else None,
+                    'error': reason,
+                }, ensure_ascii=False) + '\n')
+
+    def start(self):
+        """Start the background flusher thread / Iniciar el hilo de volcado en segundo plano"""
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='alarm-log-buffer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write whatever is still queued / Detener el volcado y escribir lo que siga en cola"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        """Flush on size or time thresholds until stopped / Volcar por umbral de tamaño o tiempo hasta detenerse"""
+        while self._running:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing alarm logs: {e}")
+            finally:
+                close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_log_buffer():
+    """Process-wide buffer, or None when CLOCK_LOG_BUFFER is not enabled / Búfer del proceso, o None cuando CLOCK_LOG_BUFFER no está habilitado"""
+    global _buffer
+    config = getattr(settings, 'CLOCK_LOG_BUFFER', {})
+    if not config.get('ENABLED'):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                buffer = AlarmLogBuffer(
+                    max_size=config.get('MAX_SIZE', 100),
+                    flush_interval=config.get('FLUSH_INTERVAL', 1.0),
+                    max_queue=config.get('MAX_QUEUE', 10_000),
+                    max_retries=config.get('MAX_RETRIES', 3),
+                    dead_letter_path=config.get('DEAD_LETTER_PATH'),
+                )
+                buffer.start()
+                # Never lose queued rows on interpreter shutdown / Nunca perder filas en cola al cerrar el intérprete
+                atexit.register(buffer.stop)
+                _buffer = buffer
+    return _buffer
+
+
+def flush_alarm_logs():
+    """Synchronously flush the buffer if one is running (used by tests and commands) / Volcar sincrónicamente el búfer si existe (usado por pruebas y comandos)"""
+    if _buffer is None:
+        return 0
+    return _buffer.flush()
@@ -0,0 +1,87 @@
+"""
+Shared Benchmark Helpers / Utilidades Compartidas de Benchmarks
+Data generators and timers used by the bench_* management commands / Generadores de datos y cronómetros usados por los comandos bench_*
+
+
+"""
+
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils import timezone
+
+from clock.models import Alarm, AlarmLog
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run a benchmark inside a transaction that is always discarded / Ejecutar un benchmark dentro de una transacción que siempre se descarta"""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def timed(fn, repeat=5):
+    """Call fn `repeat` times; returns (median seconds, last result) / Llamar fn `repeat` veces; devuelve (mediana en segundos, último resultado)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def generate_alarms(count, seed=0, batch_size=5000):
+    """Insert `count` random alarms with next_fire_at already computed / Insertar `count` alarmas aleatorias con next_fire_at ya calculado"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = timezone.localdate()
+    batch = []
+    for i in range(count):
+        kind = rng.random()
+        alarm = Alarm(
+            title=f"Bench {i}",
+            hour=rng.randint(1, 12),
+            minute=rng.randint(0, 59),
+            period=rng.choice(['AM', 'PM']),
+            day_of_week=rng.randint(0, 6) if 0.4 <= kind < 0.7 else None,
+            alarm_date=today + timezone.timedelta(days=rng.randint(0, 30)) if kind >= 0.9 else None,
+            repeat_daily=kind < 0.2,
+            repeat_weekdays=sorted(rng.sample(range(7), 3)) if 0.7 <= kind < 0.9 else [],
+            is_active=rng.random() < 0.9,
+        )
+        alarm.refresh_schedule(now)
+        batch.append(alarm)
+        if len(batch) >= batch_size:
+            Alarm.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Alarm.objects.bulk_create(batch)
+
+
+def generate_logs(count, days=365, seed=0, batch_size=10_000):
+    """Insert `count` alarm logs spread over the last `days` days / Insertar `count` registros repartidos en los últimos `days` días"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    span = days * 86400
+    statuses = ['triggered'] * 6 + ['dismissed'] * 3 + ['missed']
+    for offset in range(0, count, batch_size):
+        AlarmLog.objects.bulk_create([
+            AlarmLog(
+                alarm_title="Bench",
+                status=rng.choice(statuses),
+                triggered_at=now - timezone.timedelta(seconds=rng.random() * span),
+            )
+            for _ in range(min(batch_size, count - offset))
+        ])
@@ -0,0 +1,37 @@
+"""
+Missed Occurrence Backfill / Recuperación de Ocurrencias Perdidas
+Logs occurrences that passed during downtime as missed / Registra como perdidas las ocurrencias que pasaron durante una inactividad
+
+
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clock.backfill import BACKFILL_BATCH_SIZE, MAX_BACKFILL_WINDOW, backfill_missed
+from clock.dispatcher import DEFAULT_GRACE
+
+
+class Command(BaseCommand):
+    help = "Log every alarm occurrence missed while nothing was running / Registrar cada ocurrencia de alarma perdida mientras nada corría"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=int(DEFAULT_GRACE.total_seconds()),
+                            help="Leave occurrences this recent for the dispatcher / Dejar al despachador las ocurrencias así de recientes")
+        parser.add_argument('--days', type=int, default=MAX_BACKFILL_WINDOW.days,
+                            help="Log at most this many days back / Registrar como máximo esta cantidad de días hacia atrás")
+        parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE, help="Alarms expanded per batch / Alarmas expandidas por lote")
+        parser.add_argument('--dry-run', action='store_true', help="Only count / Solo contar")
+
+    def handle(self, *args, **options):
+        until = timezone.now() - timezone.timedelta(seconds=options['grace'])
+        alarms, logs = backfill_missed(
+            until=until,
+            batch_size=options['batch_size'],
+            max_window=timezone.timedelta(days=options['days']),
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{logs} missed occurrences across {alarms} alarms before {timezone.localtime(until):%Y-%m-%d %H:%M} would be logged")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Logged {logs} missed occurrences across {alarms} alarms"))
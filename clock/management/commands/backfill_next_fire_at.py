@@ -0,0 +1,39 @@
+"""
+Backfill Alarm.next_fire_at / Rellenar Alarm.next_fire_at
+Recomputes the denormalized schedule columns for existing alarms / Recalcula las columnas de programación desnormalizadas de las alarmas existentes
+
+
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clock.models import Alarm
+
+
+class Command(BaseCommand):
+    help = "Recompute next_fire_at and weekday_mask for every alarm / Recalcular next_fire_at y weekday_mask para cada alarma"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Rows written per UPDATE / Filas escritas por UPDATE")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        batch = []
+        updated = 0
+
+        # Stream rows so memory stays flat on large tables / Recorrer filas en flujo para mantener la memoria estable en tablas grandes
+        for alarm in Alarm.objects.order_by('id').iterator(chunk_size=batch_size):
+            alarm.refresh_schedule(now)
+            batch.append(alarm)
+            if len(batch) >= batch_size:
+                Alarm.objects.bulk_update(batch, ['weekday_mask', 'next_fire_at'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Alarm.objects.bulk_update(batch, ['weekday_mask', 'next_fire_at'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"next_fire_at recomputed for {updated} alarms"))
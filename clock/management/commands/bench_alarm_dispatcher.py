@@ -0,0 +1,109 @@
+"""
+Benchmark: Alarm Dispatcher / Benchmark: Despachador de Alarmas
+Dispatch throughput and firing latency with a large alarm table / Rendimiento del despacho y latencia de disparo con una tabla grande de alarmas
+
+
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Benchmark the alarm dispatcher on a scratch database / Medir el despachador de alarmas sobre una base temporal"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alarms', type=int, default=100_000, help="Alarms to generate / Alarmas a generar")
+        parser.add_argument('--burst', type=int, default=5000,
+                            help="Alarms rescheduled into the latency window / Alarmas reprogramadas en la ventana de latencia")
+        parser.add_argument('--window', type=int, default=10, help="Seconds the burst is spread over / Segundos sobre los que se reparte la ráfaga")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Dispatcher batch size / Tamaño de lote del despachador")
+        parser.add_argument('--worker', action='store_true', help="Internal: run in this process / Interno: ejecutar en este proceso")
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_bench(options)))
+            return
+
+        # The dispatcher commits, so it runs against a throwaway database / El despachador confirma, así que corre sobre una base desechable
+        with tempfile.TemporaryDirectory() as scratch:
+            env = dict(os.environ, CLOCK_DB_PROFILE='production', CLOCK_DB_NAME=os.path.join(scratch, 'bench.sqlite3'))
+            completed = subprocess.run(
+                [sys.executable, '-m', 'django', 'bench_alarm_dispatcher', '--worker',
+                 '--alarms', str(options['alarms']), '--burst', str(options['burst']),
+                 '--window', str(options['window']), '--batch-size', str(options['batch_size'])],
+                env=env, capture_output=True, text=True, check=True,
+            )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        self.stdout.write(
+            f"throughput: {result['fired']} occurrences in {result['seconds']:.2f} s "
+            f"= {result['fired'] / result['seconds']:,.0f}/s ({result['queries_per_batch']:.1f} queries per batch)"
+        )
+        self.stdout.write(
+            f"latency:    {result['latency_count']} occurrences  p50 {result['p50_ms']:.1f} ms  "
+            f"p95 {result['p95_ms']:.1f} ms  max {result['max_ms']:.1f} ms  duplicates {result['duplicates']}"
+        )
+
+    def run_bench(self, options):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from clock.dispatcher import AlarmDispatcher
+        from clock.management.commands._bench import generate_alarms
+        from clock.models import Alarm
+
+        call_command('migrate', verbosity=0)
+        generate_alarms(options['alarms'])
+        dispatcher = AlarmDispatcher(batch_size=options['batch_size'])
+
+        # Throughput: every active alarm due at once / Rendimiento: todas las alarmas activas pendientes a la vez
+        now = timezone.now()
+        Alarm.objects.filter(is_active=True).update(next_fire_at=now)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            fired = dispatcher.dispatch_due(now + timezone.timedelta(milliseconds=1))
+            seconds = time.perf_counter() - started
+        batches = -(-len(fired) // options['batch_size'])
+        # Clear anything that came due meanwhile so the latency phase starts idle / Despachar lo que venció mientras tanto para que la fase de latencia empiece sin atraso
+        dispatcher.dispatch_due()
+
+        # Latency: a burst spread over the next seconds, dispatched by the live loop / Latencia: una ráfaga repartida en los próximos segundos, despachada por el bucle en vivo
+        rng = random.Random(0)
+        base = timezone.now().replace(microsecond=0) + timezone.timedelta(seconds=2)
+        burst = rng.sample(list(Alarm.objects.filter(is_active=True).values_list('id', flat=True)), options['burst'])
+        rows = [Alarm(id=alarm_id, next_fire_at=base + timezone.timedelta(seconds=rng.randrange(options['window'])))
+                for alarm_id in burst]
+        Alarm.objects.bulk_update(rows, ['next_fire_at'], batch_size=500)
+        burst = set(burst)
+
+        lags, occurrences = [], []
+
+        def record(dispatched):
+            done = timezone.now()
+            for alarm, scheduled_at, _ in dispatched:
+                if alarm.id in burst:
+                    lags.append((done - scheduled_at).total_seconds())
+                    occurrences.append((alarm.id, scheduled_at))
+
+        dispatcher.run(on_dispatch=record, seconds=options['window'] + 3)
+        lags.sort()
+        return {
+            'fired': len(fired),
+            'seconds': seconds,
+            'queries_per_batch': len(queries) / max(batches, 1),
+            'latency_count': len(lags),
+            'p50_ms': lags[len(lags) // 2] * 1000 if lags else 0.0,
+            'p95_ms': lags[int(len(lags) * 0.95)] * 1000 if lags else 0.0,
+            'max_ms': lags[-1] * 1000 if lags else 0.0,
+            # Each (alarm, occurrence) must be dispatched exactly once / Cada (alarma, ocurrencia) debe despacharse exactamente una vez
+            'duplicates': len(occurrences) - len(set(occurrences)),
+        }
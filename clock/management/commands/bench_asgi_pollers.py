@@ -0,0 +1,206 @@
+"""
+Benchmark: Concurrent Pollers per Worker / Benchmark: Clientes de Sondeo Concurrentes por Worker
+Sync views under WSGI against async views under ASGI, driven in-process / Vistas síncronas bajo WSGI frente a vistas asíncronas bajo ASGI, ejecutadas en el proceso
+
+
+"""
+
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+
+# mode: (entry point, CLOCK_ASYNC_VIEWS) / modo: (punto de entrada, CLOCK_ASYNC_VIEWS)
+MODES = {
+    'wsgi-sync': ('wsgi', '0'),
+    'asgi-sync': ('asgi', '0'),
+    'asgi-async': ('asgi', '1'),
+}
+
+# A level is sustained when at least this share of the target request rate is served / Un nivel se sostiene cuando se atiende al menos esta proporción de la tasa objetivo
+SUSTAINED_SHARE = 0.95
+
+
+class Command(BaseCommand):
+    help = "Find how many 1 Hz pollers one worker process sustains, per server mode / Encontrar cuántos clientes de sondeo de 1 Hz sostiene un proceso worker, por modo de servidor"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pollers', default='50,100,200,400,800',
+                            help="Comma separated poller counts to try / Cantidades de clientes a probar, separadas por comas")
+        parser.add_argument('--seconds', type=float, default=5.0, help="Load duration per level / Duración de la carga por nivel")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds between polls of one client / Segundos entre sondeos de un cliente")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="WSGI server threads in the worker / Hilos del servidor WSGI en el worker")
+        parser.add_argument('--modes', default=','.join(MODES), help="Modes to run / Modos a ejecutar")
+        parser.add_argument('--worker', default='', help="Internal: run one mode in this process / Interno: ejecutar un modo en este proceso")
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(asyncio.run(self.run_levels(options))))
+            return
+
+        # Each mode runs in a fresh process: the URLconf reads CLOCK_ASYNC_VIEWS at import / Cada modo corre en un proceso nuevo: el URLconf lee CLOCK_ASYNC_VIEWS al importarse
+        for mode in options['modes'].split(','):
+            with tempfile.TemporaryDirectory() as scratch:
+                env = dict(
+                    os.environ,
+                    CLOCK_DB_PROFILE='production',
+                    CLOCK_DB_NAME=os.path.join(scratch, 'bench.sqlite3'),
+                    CLOCK_ASYNC_VIEWS=MODES[mode][1],
+                )
+                completed = subprocess.run(
+                    [sys.executable, '-m', 'django', 'bench_asgi_pollers', '--worker', mode,
+                     '--pollers', options['pollers'], '--seconds', str(options['seconds']),
+                     '--interval', str(options['interval']), '--threads', str(options['threads'])],
+                    env=env, capture_output=True, text=True, check=True,
+                )
+            levels = json.loads(completed.stdout.strip().splitlines()[-1])
+            sustained = 0
+            for level in levels:
+                ok = level['achieved'] >= level['target'] * SUSTAINED_SHARE and not level['errors']
+                sustained = level['pollers'] if ok else sustained
+                self.stdout.write(
+                    f"{mode:>10} {level['pollers']:5d} pollers: {level['achieved']:8.1f}/{level['target']:8.1f} req/s  "
+                    f"p50 {level['p50_ms']:8.2f} ms  p95 {level['p95_ms']:8.2f} ms  errors {level['errors']}"
+                    f"{'' if ok else '  (not sustained / no sostenido)'}"
+                )
+            self.stdout.write(f"{mode:>10}: sustains {sustained} pollers / sostiene {sustained} clientes\n")
+
+    async def run_levels(self, options):
+        from asgiref.sync import sync_to_async
+
+        await sync_to_async(self.setup_data)()
+        call = self.asgi_caller() if MODES[options['worker']][0] == 'asgi' else self.wsgi_caller(options['threads'])
+        levels = []
+        for pollers in (int(value) for value in options['pollers'].split(',')):
+            levels.append(await self.run_level(call, pollers, options['seconds'], options['interval']))
+        return levels
+
+    def setup_data(self):
+        from clock.management.commands._bench import generate_alarms
+        from clock.models import ClockConfiguration
+
+        call_command('migrate', verbosity=0)
+        ClockConfiguration.objects.create()
+        generate_alarms(200)
+
+    async def run_level(self, call, pollers, seconds, interval):
+        """Every poller asks for the time and checks alarms once per interval / Cada cliente pide la hora y verifica alarmas una vez por intervalo"""
+        latencies, finished, errors = [], [], [0]
+        started = time.perf_counter()
+        deadline = started + interval + seconds
+
+        async def poller(seed):
+            rng = random.Random(seed)
+            # Spread the clients over the interval like real page loads / Repartir los clientes en el intervalo como cargas de página reales
+            await asyncio.sleep(rng.random() * interval)
+            while time.perf_counter() < deadline:
+                tick = time.perf_counter()
+                now = timezone.localtime()
+                check = json.dumps({
+                    'hour': now.hour % 12 or 12, 'minute': now.minute,
+                    'period': 'AM' if now.hour < 12 else 'PM', 'day': now.weekday(),
+                }).encode()
+                for method, path, body in (('GET', '/api/current-time/', b''), ('POST', '/api/check-alarms/', check)):
+                    start = time.perf_counter()
+                    status, content = await call(method, path, body)
+                    latencies.append(time.perf_counter() - start)
+                    finished.append(time.perf_counter())
+                    if status != 200 or b'"success": false' in content:
+                        errors[0] += 1
+                await asyncio.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+
+        await asyncio.gather(*(poller(i) for i in range(pollers)))
+
+        # Rate over the steady window, after every client has started / Tasa en la ventana estable, cuando todos los clientes ya iniciaron
+        served = sum(1 for moment in finished if started + interval <= moment < deadline)
+        latencies.sort()
+        return {
+            'pollers': pollers,
+            'target': 2 * pollers / interval,
+            'achieved': served / seconds,
+            'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+            'errors': errors[0],
+        }
+
+    @staticmethod
+    def _csrf():
+        # The same unmasked secret in cookie and header passes CsrfViewMiddleware / El mismo secreto sin máscara en cookie y encabezado pasa CsrfViewMiddleware
+        token = get_random_string(32)
+        return f'csrftoken={token}', token
+
+    def asgi_caller(self):
+        """One ASGI application driven with synthetic scopes on this event loop / Una aplicación ASGI invocada con scopes sintéticos en este bucle de eventos"""
+        from django.core.asgi import get_asgi_application
+
+        application = get_asgi_application()
+        cookie, token = self._csrf()
+
+        async def call(method, path, body):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': b'', 'root_path': '',
+                'headers': [
+                    (b'host', b'localhost'), (b'content-type', b'application/json'),
+                    (b'cookie', cookie.encode()), (b'x-csrftoken', token.encode()),
+                ],
+                'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+            }
+            messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            status, chunks = [None], []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # The client never disconnects; Django cancels this wait / El cliente nunca se desconecta; Django cancela esta espera
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status[0] = message['status']
+                else:
+                    chunks.append(message.get('body', b''))
+
+            await application(scope, receive, send)
+            return status[0], b''.join(chunks)
+
+        return call
+
+    def wsgi_caller(self, threads):
+        """The WSGI application on a fixed thread pool, like a threaded WSGI server / La aplicación WSGI en un grupo fijo de hilos, como un servidor WSGI con hilos"""
+        from django.core.wsgi import get_wsgi_application
+
+        application = get_wsgi_application()
+        executor = ThreadPoolExecutor(max_workers=threads)
+        cookie, token = self._csrf()
+
+        def handle(method, path, body):
+            environ = {
+                'REQUEST_METHOD': method, 'PATH_INFO': path, 'HTTP_HOST': 'localhost',
+                'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+                'HTTP_COOKIE': cookie, 'HTTP_X_CSRFTOKEN': token, 'wsgi.input': io.BytesIO(body),
+            }
+            setup_testing_defaults(environ)
+            status = []
+            content = b''.join(application(environ, lambda line, headers, exc_info=None: status.append(line)))
+            return int(status[0].split()[0]), content
+
+        async def call(method, path, body):
+            return await asyncio.get_running_loop().run_in_executor(executor, handle, method, path, body)
+
+        return call
@@ -0,0 +1,135 @@
+"""
+Benchmark: SQLite Concurrency Profiles / Benchmark: Perfiles de Concurrencia de SQLite
+Mixed read/write API load from many threads, per database profile / Carga mixta de lectura/escritura desde muchos hilos, por perfil de base de datos
+
+
+"""
+
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+
+PROFILES = ('default', 'production')
+
+# (weight, method, url) of the simulated read traffic / (peso, método, url) del tráfico de lectura simulado
+READS = [
+    (3, 'get', '/api/alarms/list/'),
+    (2, 'get', '/api/configuration/'),
+    (2, 'get', '/api/logs/'),
+    (1, 'get', '/api/current-time/'),
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark mixed API load against each SQLite profile on a scratch database / Medir carga mixta de la API con cada perfil de SQLite sobre una base temporal"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help="Concurrent clients / Clientes concurrentes")
+        parser.add_argument('--seconds', type=float, default=5.0, help="Load duration per profile / Duración de la carga por perfil")
+        parser.add_argument('--write-ratio', type=float, default=0.4, help="Share of requests that write / Proporción de solicitudes que escriben")
+        parser.add_argument('--worker', action='store_true', help="Internal: run the load in this process / Interno: ejecutar la carga en este proceso")
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_load(options)))
+            return
+
+        # Each profile runs in a fresh process: settings are read at startup / Cada perfil corre en un proceso nuevo: la configuración se lee al iniciar
+        for profile in PROFILES:
+            with tempfile.TemporaryDirectory() as scratch:
+                env = dict(os.environ, CLOCK_DB_PROFILE=profile, CLOCK_DB_NAME=os.path.join(scratch, 'bench.sqlite3'))
+                completed = subprocess.run(
+                    [sys.executable, '-m', 'django', 'bench_db_concurrency', '--worker',
+                     '--threads', str(options['threads']), '--seconds', str(options['seconds']),
+                     '--write-ratio', str(options['write_ratio'])],
+                    env=env, capture_output=True, text=True, check=True,
+                )
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{profile:>10} ({result['journal_mode']}): {result['requests'] / result['seconds']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                f"errors {result['errors']} ({result['locked']} 'database is locked')"
+            )
+
+    def run_load(self, options):
+        from django.db import connection
+
+        from clock.models import Alarm, ClockConfiguration
+
+        call_command('migrate', verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        ClockConfiguration.objects.create()
+        alarm_ids = [
+            Alarm.objects.create(title=f"Bench {i}", hour=(i % 12) + 1, minute=i % 60, period='AM').id
+            for i in range(200)
+        ]
+
+        def write(client, rng):
+            alarm_id = rng.choice(alarm_ids)
+            kind = rng.random()
+            if kind < 0.5:
+                return client.post('/api/alarms/dismiss/', json.dumps({'alarm_id': alarm_id, 'silence_minutes': 1}),
+                                   content_type='application/json')
+            if kind < 0.8:
+                return client.post(f'/api/alarms/{alarm_id}/toggle/')
+            return client.post('/api/check-alarms/', json.dumps({'since': time.time() - 86400, 'until': time.time()}),
+                               content_type='application/json')
+
+        latencies, errors, locked = [], [0], [0]
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+
+        def worker(seed):
+            rng = random.Random(seed)
+            client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+            read_choices = [(method, url) for weight, method, url in READS for _ in range(weight)]
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    if rng.random() < options['write_ratio']:
+                        response = write(client, rng)
+                    else:
+                        method, url = rng.choice(read_choices)
+                        response = getattr(client, method)(url)
+                    body = response.content.decode(errors='replace')
+                    failed = response.status_code >= 500 or '"success": false' in body
+                except Exception as e:  # Unhandled errors count too / Los errores no manejados también cuentan
+                    body, failed = str(e), True
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if failed:
+                        errors[0] += 1
+                        locked[0] += 'locked' in body
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'seconds': seconds,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+            'errors': errors[0],
+            'locked': locked[0],
+            'journal_mode': journal_mode,
+        }
@@ -0,0 +1,128 @@
+"""
+Benchmark: Competing Dispatcher Nodes / Benchmark: Nodos Despachadores en Competencia
+N dispatcher processes drain one database; every occurrence must fire exactly once / N procesos despachadores vacían una misma base; cada ocurrencia debe dispararse exactamente una vez
+
+
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Run competing alarm dispatchers on a scratch database and check for duplicates / Ejecutar despachadores de alarmas en competencia sobre una base temporal y buscar duplicados"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nodes', default='1,2,4', help="Comma separated dispatcher process counts / Cantidades de procesos despachadores, separadas por comas")
+        parser.add_argument('--alarms', type=int, default=50_000, help="Alarms to generate / Alarmas a generar")
+        parser.add_argument('--seconds', type=float, default=20.0, help="How long each node runs / Cuánto corre cada nodo")
+        parser.add_argument('--lead', type=float, default=3.0,
+                            help="Seconds until everything comes due, so all nodes are up / Segundos hasta que todo quede pendiente, para que todos los nodos estén arriba")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Dispatcher batch size / Tamaño de lote del despachador")
+        parser.add_argument('--profile', default='production',
+                            help="CLOCK_DB_PROFILE for every process / CLOCK_DB_PROFILE para cada proceso")
+        parser.add_argument('--role', choices=('setup', 'node', 'check'), default='',
+                            help="Internal: run one step in this process / Interno: ejecutar un paso en este proceso")
+        parser.add_argument('--node-id', default='', help="Internal: node name / Interno: nombre del nodo")
+        parser.add_argument('--out', default='', help="Internal: file for a node's results / Interno: archivo para los resultados de un nodo")
+
+    def handle(self, *args, **options):
+        if options['role']:
+            self.stdout.write(json.dumps(getattr(self, f"run_{options['role']}")(options)))
+            return
+
+        for count in (int(value) for value in options['nodes'].split(',')):
+            result = self.run_cluster(count, options)
+            self.stdout.write(
+                f"{count} node(s): {result['dispatched']} occurrences in {result['seconds']:.2f} s = "
+                f"{result['dispatched'] / result['seconds']:,.0f}/s  per node {result['per_node']}  "
+                f"claims lost {result['claims_lost']}  failed ticks {result['lock_errors']}  "
+                f"duplicates {result['duplicates']}  logs {result['logs']}  left due {result['remaining']}"
+            )
+
+    def run_cluster(self, count, options):
+        """Setup, N concurrent nodes and a final check, each in its own process / Preparación, N nodos concurrentes y una verificación final, cada uno en su propio proceso"""
+        with tempfile.TemporaryDirectory() as scratch:
+            env = dict(os.environ, CLOCK_DB_PROFILE=options['profile'], CLOCK_DB_NAME=os.path.join(scratch, 'bench.sqlite3'))
+
+            def step(role, *extra):
+                return [sys.executable, '-m', 'django', 'bench_dispatcher_nodes', '--role', role,
+                        '--alarms', str(options['alarms']), '--lead', str(options['lead']),
+                        '--seconds', str(options['seconds']), '--batch-size', str(options['batch_size']), *extra]
+
+            def last_json(output):
+                return json.loads(output.strip().splitlines()[-1])
+
+            setup = last_json(subprocess.run(step('setup'), env=env, capture_output=True, text=True, check=True).stdout)
+            outputs = [Path(scratch) / f'node-{i}.json' for i in range(count)]
+            processes = [
+                subprocess.Popen(step('node', '--node-id', f'node-{i}', '--out', str(out)), env=env,
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                for i, out in enumerate(outputs)
+            ]
+            lock_errors = 0
+            for process in processes:
+                output, errors = process.communicate()
+                if process.returncode:
+                    raise RuntimeError(errors)
+                # The dispatcher reports failed ticks and retries on the next one / El despachador informa los ticks fallidos y reintenta en el siguiente
+                lock_errors += output.count('Error dispatching alarms')
+            check = last_json(subprocess.run(step('check'), env=env, capture_output=True, text=True, check=True).stdout)
+            nodes = [json.loads(out.read_text()) for out in outputs]
+
+        occurrences = [tuple(pair) for node in nodes for pair in node['occurrences']]
+        finished = max((node['finished'] for node in nodes if node['occurrences']), default=setup['due_at'])
+        return {
+            'dispatched': len(occurrences),
+            'seconds': max(finished - setup['due_at'], 1e-9),
+            'per_node': [len(node['occurrences']) for node in nodes],
+            'claims_lost': sum(node['claims_lost'] for node in nodes),
+            'lock_errors': lock_errors,
+            # Each (alarm, occurrence) exactly once, in results and in the log table / Cada (alarma, ocurrencia) exactamente una vez, en los resultados y en la tabla de registros
+            'duplicates': len(occurrences) - len(set(occurrences)),
+            'logs': check['logs'],
+            'remaining': check['remaining'],
+        }
+
+    def run_setup(self, options):
+        from clock.management.commands._bench import generate_alarms
+        from clock.models import Alarm
+
+        call_command('migrate', verbosity=0)
+        generate_alarms(options['alarms'])
+        due_at = timezone.now() + timezone.timedelta(seconds=options['lead'])
+        due = Alarm.objects.filter(is_active=True).update(next_fire_at=due_at)
+        return {'due_at': due_at.timestamp(), 'due': due}
+
+    def run_node(self, options):
+        from clock.dispatcher import AlarmDispatcher
+
+        dispatcher = AlarmDispatcher(batch_size=options['batch_size'], node_id=options['node_id'])
+        occurrences, finished = [], [0.0]
+
+        def record(dispatched):
+            occurrences.extend((alarm.id, scheduled_at.timestamp()) for alarm, scheduled_at, _ in dispatched)
+            finished[0] = time.time()
+
+        dispatcher.run(on_dispatch=record, seconds=options['lead'] + options['seconds'])
+        Path(options['out']).write_text(json.dumps({
+            'occurrences': occurrences, 'finished': finished[0], 'claims_lost': dispatcher.claims_lost,
+        }))
+        return {'dispatched': len(occurrences)}
+
+    def run_check(self, options):
+        from clock.models import Alarm, AlarmLog
+
+        return {
+            'logs': AlarmLog.objects.count(),
+            'remaining': Alarm.objects.due(timezone.now()).count(),
+        }
@@ -0,0 +1,42 @@
+"""
+Benchmark: Streaming Trigger Heatmap / Benchmark: Mapa de Calor por Bloques
+Times the hour × weekday aggregation and its peak Python memory on a generated log / Mide la agregación hora × día y su memoria máxima de Python sobre un registro generado
+
+
+"""
+
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from clock.heatmap import HEATMAP_CHUNK_SIZE, trigger_heatmap
+
+from ._bench import generate_logs, rolled_back
+
+
+class Command(BaseCommand):
+    help = "Benchmark the trigger heatmap on a large log (data is rolled back) / Medir el mapa de calor sobre un registro grande (los datos se revierten)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logs', type=int, default=5_000_000, help="Log rows to generate / Registros a generar")
+        parser.add_argument('--chunk-size', type=int, default=HEATMAP_CHUNK_SIZE, help="Rows per streamed chunk / Filas por bloque")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Generating {options['logs']} logs...")
+            start = time.perf_counter()
+            generate_logs(options['logs'])
+            self.stdout.write(f"  generated in {time.perf_counter() - start:.1f} s")
+
+            start = time.perf_counter()
+            matrix = trigger_heatmap(chunk_size=options['chunk_size'])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"heatmap: {elapsed:.2f} s, {matrix.sum()} triggers, {options['logs'] / elapsed:,.0f} rows/s")
+
+            # Second pass under tracemalloc: peak must not grow with the row count / Segunda pasada con tracemalloc: el pico no debe crecer con el número de filas
+            tracemalloc.start()
+            trigger_heatmap(chunk_size=options['chunk_size'])
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(f"peak Python memory: {peak / 1024 / 1024:.1f} MiB")
@@ -0,0 +1,83 @@
+"""
+Benchmark: Missed Occurrence Backfill / Benchmark: Recuperación de Ocurrencias Perdidas
+Vectorized backfill after a simulated outage, checked against next_occurrence() / Recuperación vectorizada tras una caída simulada, verificada contra next_occurrence()
+
+
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Benchmark the missed-occurrence backfill on a scratch database / Medir la recuperación de ocurrencias perdidas sobre una base temporal"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alarms', type=int, default=100_000, help="Alarms to generate / Alarmas a generar")
+        parser.add_argument('--days', type=float, default=7.0, help="Simulated downtime / Inactividad simulada")
+        parser.add_argument('--sample', type=int, default=200,
+                            help="Alarms checked against the scalar schedule / Alarmas verificadas contra la programación escalar")
+        parser.add_argument('--worker', action='store_true', help="Internal: run in this process / Interno: ejecutar en este proceso")
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_bench(options)))
+            return
+
+        with tempfile.TemporaryDirectory() as scratch:
+            env = dict(os.environ, CLOCK_DB_PROFILE='production', CLOCK_DB_NAME=os.path.join(scratch, 'bench.sqlite3'))
+            completed = subprocess.run(
+                [sys.executable, '-m', 'django', 'bench_missed_backfill', '--worker', '--alarms', str(options['alarms']),
+                 '--days', str(options['days']), '--sample', str(options['sample'])],
+                env=env, capture_output=True, text=True, check=True,
+            )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        self.stdout.write(
+            f"{result['alarms']} alarms behind, {result['logs']} missed occurrences logged in {result['seconds']:.2f} s "
+            f"= {result['logs'] / result['seconds']:,.0f} logs/s"
+        )
+        self.stdout.write(f"sample check: {result['mismatches']} of {result['sampled']} alarms differ from next_occurrence()")
+
+    def run_bench(self, options):
+        from clock.alarm_events import write_next_fire_at
+        from clock.backfill import backfill_missed
+        from clock.management.commands._bench import generate_alarms
+        from clock.models import Alarm, AlarmLog
+        from clock.scheduling import next_occurrence
+
+        call_command('migrate', verbosity=0)
+        generate_alarms(options['alarms'])
+
+        # Outage: every active alarm still points at its first occurrence after the outage began / Caída: cada alarma activa aún apunta a su primera ocurrencia tras el inicio de la caída
+        until = timezone.now()
+        down_since = until - timezone.timedelta(days=options['days'])
+        alarms = list(Alarm.objects.filter(is_active=True))
+        starts = {alarm.id: next_occurrence(alarm, down_since) for alarm in alarms}
+        write_next_fire_at(list(starts.items()))
+
+        started = time.perf_counter()
+        behind, logs = backfill_missed(until=until)
+        seconds = time.perf_counter() - started
+
+        # Reference: walk each sampled alarm with the scalar scheduler / Referencia: recorrer cada alarma de la muestra con el programador escalar
+        mismatches = 0
+        sample = random.Random(0).sample(alarms, min(options['sample'], len(alarms)))
+        for alarm in sample:
+            expected, moment = [], starts[alarm.id]
+            while moment is not None and moment < until:
+                expected.append(moment)
+                moment = next_occurrence(alarm, moment)
+            logged = list(AlarmLog.objects.filter(alarm=alarm, status='missed').order_by('triggered_at')
+                          .values_list('triggered_at', flat=True))
+            following = Alarm.objects.values_list('next_fire_at', flat=True).get(id=alarm.id)
+            mismatches += logged != expected or following != moment
+        return {'alarms': behind, 'logs': logs, 'seconds': seconds, 'sampled': len(sample), 'mismatches': mismatches}
@@ -0,0 +1,54 @@
+"""
+Benchmark: next_fire_at vs Predicate Scan / Benchmark: next_fire_at vs Escaneo por Predicados
+Compares due-alarm detection strategies on a generated table / Compara estrategias de detección de alarmas pendientes en una tabla generada
+
+
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from clock.models import Alarm
+from clock.scheduling import to_12h
+
+from ._bench import generate_alarms, rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = "Benchmark due-alarm detection at scale (data is rolled back) / Medir la detección de alarmas pendientes a escala (los datos se revierten)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alarms', type=int, default=100_000, help="Alarms to generate / Alarmas a generar")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per strategy / Ejecuciones por estrategia")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Generating {options['alarms']} alarms...")
+            generate_alarms(options['alarms'])
+
+            now = timezone.localtime()
+            hour, period = to_12h(now.hour)
+            today = now.date()
+
+            # Legacy: exact-minute match OR-ing the three schedule predicates / Anterior: coincidencia exacta del minuto combinando con OR los tres predicados
+            legacy = Alarm.objects.filter(
+                hour=hour, minute=now.minute, period=period, is_active=True
+            ).filter(
+                Q(alarm_date__isnull=False, alarm_date=today) |
+                Q(day_of_week=today.weekday()) |
+                Q(day_of_week__isnull=True, alarm_date__isnull=True)
+            )
+            # New: a single range scan over the indexed column, one minute ahead so both return rows / Nuevo: un solo escaneo por rango sobre la columna indexada, un minuto adelante para que ambos devuelvan filas
+            due = Alarm.objects.due(now + timezone.timedelta(minutes=1))
+
+            for name, queryset in (('predicates', legacy), ('next_fire_at', due)):
+                seconds, rows = timed(lambda: list(queryset.values_list('id', flat=True)), options['repeat'])
+                self.stdout.write(f"{name:>14}: {seconds * 1000:8.3f} ms median, {len(rows)} rows")
+                if connection.vendor == 'sqlite':
+                    sql, params = queryset.query.sql_with_params()
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                        for row in cursor.fetchall():
+                            self.stdout.write(f"{'':>16}{row[-1]}")
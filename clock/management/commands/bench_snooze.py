@@ -0,0 +1,62 @@
+"""
+Benchmark: Snooze Engine / Benchmark: Motor de Posposición
+Bulk snoozes and re-fire lookups on a generated table / Snoozes en bloque y búsquedas de re-disparos en una tabla generada
+
+
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clock.alarm_index import alarm_index
+from clock.models import Alarm, AlarmLog
+from clock.snooze import snooze_alarms
+
+from ._bench import generate_alarms, rolled_back
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulk snoozes and the re-fire queue (data is rolled back) / Medir snoozes en bloque y la cola de re-disparos (los datos se revierten)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alarms', type=int, default=100_000, help="Alarms to generate / Alarmas a generar")
+        parser.add_argument('--snoozes', type=int, default=10_000, help="Alarms snoozed at once / Alarmas pospuestas a la vez")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Generating {options['alarms']} alarms...")
+            generate_alarms(options['alarms'])
+            ids = list(Alarm.objects.filter(is_active=True).values_list('id', flat=True)[:options['snoozes']])
+            # Durations of 1-15 minutes, so re-fires spread over fifteen distinct times / Duraciones de 1-15 minutos, así que los re-disparos se reparten en quince horas distintas
+            for minutes in range(1, 16):
+                Alarm.objects.filter(id__in=ids[minutes - 1::15]).update(snooze_duration=minutes)
+            now = timezone.now()
+            # Only alarms that are ringing can be snoozed / Solo las alarmas que están sonando se pueden posponer
+            Alarm.objects.filter(id__in=ids).update(last_triggered=now)
+            alarm_index.invalidate()
+            alarm_index.ensure_current()
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                snoozed, refused = snooze_alarms(ids, now=now)
+                seconds = time.perf_counter() - started
+            self.stdout.write(
+                f"snooze: {len(snoozed)} alarms in {seconds * 1000:.1f} ms, {len(queries)} queries, "
+                f"{AlarmLog.objects.filter(status='snoozed').count()} logs, {len(refused)} refused"
+            )
+
+            started = time.perf_counter()
+            for _ in range(10_000):
+                alarm_index.pop_due_snoozes(now, refresh=False)
+            self.stdout.write(f"nothing due: {(time.perf_counter() - started) * 1e6 / 10_000:.2f} µs per check")
+
+            for minutes in (1, 15):
+                started = time.perf_counter()
+                due = alarm_index.pop_due_snoozes(now + timezone.timedelta(minutes=minutes), refresh=False)
+                self.stdout.write(
+                    f"{minutes:>2} min later: {len(due)} re-fires popped in {(time.perf_counter() - started) * 1000:.2f} ms"
+                )
@@ -0,0 +1,47 @@
+"""
+Benchmark: Upcoming Occurrences / Benchmark: Próximas Ocurrencias
+Cost of the first occurrences against the whole window on a generated table / Costo de las primeras ocurrencias frente a toda la ventana en una tabla generada
+
+
+"""
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clock.upcoming import upcoming_occurrences
+
+from ._bench import generate_alarms, rolled_back, timed
+
+
+class Command(BaseCommand):
+    help = "Benchmark the upcoming-occurrences merge (data is rolled back) / Medir la mezcla de próximas ocurrencias (los datos se revierten)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alarms', type=int, default=100_000, help="Alarms to generate / Alarmas a generar")
+        parser.add_argument('--days', type=int, default=30, help="Window length / Duración de la ventana")
+        parser.add_argument('--limit', type=int, default=50, help="Occurrences in the short request / Ocurrencias en la solicitud corta")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case / Ejecuciones por caso")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Generating {options['alarms']} alarms...")
+            generate_alarms(options['alarms'])
+            start = timezone.now()
+            end = start + timezone.timedelta(days=options['days'])
+
+            cases = (
+                (f"first {options['limit']}", lambda: list(islice(upcoming_occurrences(start, end), options['limit']))),
+                (f"all {options['days']} days", lambda: sum(1 for _ in upcoming_occurrences(start, end))),
+            )
+            for name, run in cases:
+                with CaptureQueriesContext(connection) as queries:
+                    seconds, result = timed(run, options['repeat'])
+                count = result if isinstance(result, int) else len(result)
+                self.stdout.write(
+                    f"{name:>14}: {seconds * 1000:10.2f} ms median, {count} occurrences, "
+                    f"{len(queries) / options['repeat']:.0f} queries per run"
+                )
@@ -0,0 +1,32 @@
+"""
+Alarm Log Retention / Retención de Registros de Alarmas
+Moves old AlarmLog rows into the columnar archive / Mueve filas antiguas de AlarmLog al archivo columnar
+
+
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clock.log_archive import archive_logs, archive_root
+from clock.models import AlarmLog
+
+
+class Command(BaseCommand):
+    help = "Archive and delete alarm logs older than the retention window / Archivar y borrar registros de alarmas más antiguos que la ventana de retención"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'CLOCK_LOG_RETENTION_DAYS', 90),
+                            help="Keep this many days in the table / Mantener esta cantidad de días en la tabla")
+        parser.add_argument('--batch-size', type=int, default=10_000, help="Rows moved per batch / Filas movidas por lote")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows / Solo contar las filas")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timezone.timedelta(days=options['days'])
+        if options['dry_run']:
+            count = AlarmLog.objects.filter(triggered_at__lt=cutoff).count()
+            self.stdout.write(f"{count} logs older than {cutoff:%Y-%m-%d %H:%M} would be archived")
+            return
+        moved = archive_logs(cutoff, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} logs into {archive_root()}"))
@@ -0,0 +1,72 @@
+"""
+Rebuild Daily Statistics / Reconstruir Estadísticas Diarias
+Recomputes ClockStatistics.alarms_triggered from AlarmLog and its archive / Recalcula ClockStatistics.alarms_triggered a partir de AlarmLog y su archivo
+
+
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from clock import log_archive
+from clock.models import AlarmLog, ClockStatistics
+from clock.scheduling import local_day_bounds
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the daily trigger rollups from the alarm log / Rellenar o reconstruir los acumulados diarios de disparos desde el registro"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Only rebuild the last N days (default: whole history) / Solo reconstruir los últimos N días (por defecto: todo el historial)")
+
+    def handle(self, *args, **options):
+        logs = AlarmLog.objects.filter(status='triggered')
+        if options['days']:
+            first_day = timezone.localdate() - timezone.timedelta(days=options['days'] - 1)
+            logs = logs.filter(triggered_at__gte=local_day_bounds(first_day)[0])
+        else:
+            first_day = None
+
+        counts = dict(
+            logs.annotate(day=TruncDate('triggered_at', tzinfo=timezone.get_current_timezone()))
+            .order_by()
+            .values('day')
+            .annotate(total=Count('id'))
+            .values_list('day', 'total')
+        )
+
+        # Add the days that only survive in the log archive / Sumar los días que solo sobreviven en el archivo de registros
+        months = log_archive.visible_months(log_archive.load_manifest())
+        if months:
+            archive_first = datetime.date.fromisoformat(min(months) + '-01')
+            days = [first_day or archive_first]
+            while days[-1] <= timezone.localdate():
+                days.append(days[-1] + datetime.timedelta(days=1))
+            edges = [local_day_bounds(day)[0] for day in days]
+            archived = log_archive.bucket_counts(edges, ('triggered',))
+            for day, (total,) in zip(days, archived):
+                if total:
+                    counts[day] = counts.get(day, 0) + int(total)
+
+        with transaction.atomic():
+            # Existing rows in range are overwritten; format and sync counters are left alone / Las filas existentes se sobrescriben; los contadores de formato y sincronización no se tocan
+            existing = ClockStatistics.objects.all()
+            if first_day:
+                existing = existing.filter(date__gte=first_day)
+            existing = list(existing)
+            for stats in existing:
+                stats.alarms_triggered = counts.pop(stats.date, 0)
+            ClockStatistics.objects.bulk_update(existing, ['alarms_triggered'], batch_size=500)
+            ClockStatistics.objects.bulk_create([
+                ClockStatistics(date=day, alarms_triggered=total) for day, total in counts.items()
+            ], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(existing)} existing and created {len(counts)} daily rollups"
+        ))
@@ -0,0 +1,56 @@
+"""
+Alarm Dispatcher Daemon / Demonio Despachador de Alarmas
+Fires due alarms from the server so they ring even with no browser open / Dispara las alarmas pendientes desde el servidor para que suenen aunque no haya navegador abierto
+
+
+"""
+
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clock.dispatcher import DEFAULT_BATCH_SIZE, DEFAULT_GRACE, AlarmDispatcher
+
+
+class Command(BaseCommand):
+    help = "Fire every due alarm occurrence once, each second / Disparar cada ocurrencia pendiente una vez, cada segundo"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Occurrences dispatched per transaction / Ocurrencias despachadas por transacción")
+        parser.add_argument('--grace', type=int, default=int(DEFAULT_GRACE.total_seconds()),
+                            help="Seconds late before an occurrence is logged as missed / Segundos de retraso antes de registrar una ocurrencia como perdida")
+        parser.add_argument('--node', default='',
+                            help="Name of this dispatcher in occurrence claims (default host:pid) / Nombre de este despachador en los reclamos de ocurrencias (por defecto host:pid)")
+        parser.add_argument('--once', action='store_true', help="Dispatch what is due now and exit / Despachar lo pendiente ahora y salir")
+
+    def handle(self, *args, **options):
+        dispatcher = AlarmDispatcher(
+            batch_size=options['batch_size'],
+            grace=timezone.timedelta(seconds=options['grace']),
+            node_id=options['node'] or None,
+        )
+        if options['once']:
+            dispatched = dispatcher.dispatch_due()
+            self.stdout.write(f"Dispatched {len(dispatched)} occurrences")
+            return
+
+        if not getattr(settings, 'CLOCK_SERVER_DISPATCH', False):
+            self.stderr.write(self.style.WARNING(
+                "CLOCK_SERVER_DISPATCH is off: browsers will also fire alarms through check_alarms / "
+                "CLOCK_SERVER_DISPATCH está apagado: los navegadores también dispararán alarmas con check_alarms"
+            ))
+        signal.signal(signal.SIGTERM, lambda *_: dispatcher.stop())
+
+        def report(dispatched):
+            for alarm, scheduled_at, status in dispatched:
+                lag = (timezone.now() - scheduled_at).total_seconds()
+                self.stdout.write(f"{timezone.localtime():%H:%M:%S} {status:<9} #{alarm.id} {alarm.title} ({lag:.3f}s after {timezone.localtime(scheduled_at):%H:%M:%S})")
+
+        self.stdout.write(self.style.SUCCESS("Alarm dispatcher running / Despachador de alarmas en ejecución"))
+        try:
+            dispatcher.run(on_dispatch=report)
+        except KeyboardInterrupt:
+            dispatcher.stop()
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0005_remove_clockconfiguration_timezone_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alarmlog',
+            name='triggered_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disparada En'),
+        ),
+    ]
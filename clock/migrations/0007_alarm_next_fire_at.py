@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0006_alter_alarmlog_triggered_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alarm',
+            name='next_fire_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Próximo Disparo'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+ALL_WEEKDAYS_MASK = 0b1111111
+
+
+def populate_weekday_mask(apps, schema_editor):
+    """Encode repeat_daily / repeat_weekdays / day_of_week as a bitmask / Codificar repeat_daily / repeat_weekdays / day_of_week como máscara de bits"""
+    Alarm = apps.get_model('clock', 'Alarm')
+    batch = []
+    for alarm in Alarm.objects.only('repeat_daily', 'repeat_weekdays', 'day_of_week', 'alarm_date').iterator(chunk_size=1000):
+        if alarm.repeat_daily:
+            mask = ALL_WEEKDAYS_MASK
+        else:
+            mask = 0
+            for weekday in alarm.repeat_weekdays or []:
+                mask |= 1 << int(weekday)
+            if alarm.day_of_week is not None:
+                mask |= 1 << alarm.day_of_week
+            if not mask and alarm.alarm_date is None:
+                mask = ALL_WEEKDAYS_MASK
+        alarm.weekday_mask = mask
+        batch.append(alarm)
+        if len(batch) >= 1000:
+            Alarm.objects.bulk_update(batch, ['weekday_mask'])
+            batch = []
+    if batch:
+        Alarm.objects.bulk_update(batch, ['weekday_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0007_alarm_next_fire_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alarm',
+            name='weekday_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, verbose_name='Máscara de Días'),
+        ),
+        migrations.RunPython(populate_weekday_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0008_alarm_weekday_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alarm',
+            index=models.Index(fields=['is_active', 'period', 'hour', 'minute'], name='clock_alarm_active_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alarm',
+            index=models.Index(fields=['hour', 'minute', 'id'], name='clock_alarm_time_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alarmlog',
+            index=models.Index(fields=['triggered_at'], name='clock_log_triggered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alarmlog',
+            index=models.Index(fields=['status', 'triggered_at'], name='clock_log_status_time_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0009_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlarmOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurrence_at', models.DateTimeField(verbose_name='Ocurrencia')),
+                ('claimed_by', models.CharField(max_length=100, verbose_name='Reclamada Por')),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Reclamada En')),
+                ('alarm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='clock.alarm', verbose_name='Alarma')),
+            ],
+            options={
+                'verbose_name': 'Ocurrencia de Alarma',
+                'verbose_name_plural': 'Ocurrencias de Alarmas',
+                'indexes': [models.Index(fields=['occurrence_at'], name='clock_occurrence_time_idx')],
+                'constraints': [models.UniqueConstraint(fields=('alarm', 'occurrence_at'), name='clock_occurrence_claim_unique')],
+            },
+        ),
+    ]
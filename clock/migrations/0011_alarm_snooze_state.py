@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0010_alarm_occurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alarm',
+            name='snooze_count',
+            field=models.IntegerField(default=0, verbose_name='Snoozes Usados'),
+        ),
+        migrations.AddField(
+            model_name='alarm',
+            name='snoozed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Pospuesta Hasta'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0011_alarm_snooze_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alarmlog',
+            name='scheduled_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Programada Para'),
+        ),
+    ]
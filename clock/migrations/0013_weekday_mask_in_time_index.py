@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0012_alarmlog_scheduled_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='alarm',
+            name='clock_alarm_active_time_idx',
+        ),
+        migrations.AlterField(
+            model_name='alarm',
+            name='weekday_mask',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Máscara de Días'),
+        ),
+        migrations.AddIndex(
+            model_name='alarm',
+            index=models.Index(fields=['period', 'hour', 'minute', 'weekday_mask', 'is_active'], name='clock_alarm_active_time_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clock', '0013_weekday_mask_in_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clockstatistics',
+            name='runtime_counted_through',
+            field=models.IntegerField(default=-1, verbose_name='Tiempo Contado Hasta (minuto)'),
+        ),
+    ]
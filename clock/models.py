@@ -40,6 +40,26 @@ class ClockConfiguration(models.Model):
         return f"{self.name} - {self.get_time_format_display()}"
 
 
+class AlarmQuerySet(models.QuerySet):
+    """Query helpers for alarms / Utilidades de consulta para alarmas"""
+
+    def due(self, now=None):
+        """Active alarms whose next occurrence has arrived, oldest first (one range scan) / Alarmas activas cuya próxima ocurrencia llegó, la más antigua primero (un solo escaneo por rango)"""
+        return self.filter(is_active=True, next_fire_at__lte=now or timezone.now()).order_by('next_fire_at')
+
+    def on_weekday(self, weekday):
+        """Alarms recurring on a weekday (0=Monday), filtered with bitwise SQL / Alarmas recurrentes en un día (0=Lunes), filtradas con SQL de bits"""
+        from .scheduling import weekday_q
+
+        return self.filter(weekday_q(weekday))
+
+    def scheduled_on(self, day):
+        """Alarms firing on a calendar date: recurring weekday or that exact date / Alarmas que suenan en una fecha: día recurrente o esa fecha exacta"""
+        from .scheduling import day_schedule_q
+
+        return self.filter(day_schedule_q(day))
+
+
 class Alarm(models.Model):
     """Alarm model with circular list integration / Modelo de alarma con integración de listas circulares"""
     
@@ -113,6 +133,8 @@ class Alarm(models.Model):
     is_active = models.BooleanField(default=True, verbose_name="Activa")
     repeat_daily = models.BooleanField(default=False, verbose_name="Repetir Diariamente")
     repeat_weekdays = models.JSONField(default=list, blank=True, verbose_name="Días de Repetición")
+    # Recurrence as a bitmask (bit 0=Monday ... bit 6=Sunday), derived on save / Recurrencia como máscara de bits (bit 0=Lunes ... bit 6=Domingo), derivada al guardar
+    weekday_mask = models.PositiveSmallIntegerField(default=0, verbose_name="Máscara de Días")
     
     # Alarm properties / Propiedades de alarma
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='normal', verbose_name="Prioridad")
@@ -127,19 +149,33 @@ class Alarm(models.Model):
     snooze_enabled = models.BooleanField(default=True, verbose_name="Snooze Habilitado")
     snooze_duration = models.IntegerField(default=5, verbose_name="Duración Snooze (minutos)")
     max_snooze_count = models.IntegerField(default=3, verbose_name="Máximo Snoozes")
+    # Snoozes used since the last regular occurrence, and the pending re-fire / Snoozes usados desde la última ocurrencia regular, y el re-disparo pendiente
+    snooze_count = models.IntegerField(default=0, verbose_name="Snoozes Usados")
+    snoozed_until = models.DateTimeField(null=True, blank=True, verbose_name="Pospuesta Hasta")
     
     # Tracking / Seguimiento
     times_triggered = models.IntegerField(default=0, verbose_name="Veces Disparada")
     last_triggered = models.DateTimeField(null=True, blank=True, verbose_name="Última Vez Disparada")
     # Temporary silencing: if set to a future datetime, alarm will not trigger until then / Silenciamiento temporal: si se establece en una fecha futura, la alarma no se disparará hasta entonces
     silenced_until = models.DateTimeField(null=True, blank=True, verbose_name="Silenciada Hasta")
+    # Denormalized next occurrence (America/Bogota), recomputed on save, trigger and snooze / Próxima ocurrencia desnormalizada (America/Bogota), recalculada al guardar, disparar y posponer
+    next_fire_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="Próximo Disparo")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creada")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizada")
     
+    objects = AlarmQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Alarma"
         verbose_name_plural = "Alarmas"
         ordering = ['hour', 'minute']
+        indexes = [
+            # check_alarms: active alarms at an exact (period, hour, minute), mask and is_active read from the index; is_active=True is a bare column in SQL, not a seekable equality, so it goes last /
+            # check_alarms: alarmas activas en un (período, hora, minuto) exacto, máscara e is_active leídas del índice; is_active=True es una columna sola en SQL, no una igualdad buscable, así que va al final
+            models.Index(fields=['period', 'hour', 'minute', 'weekday_mask', 'is_active'], name='clock_alarm_active_time_idx'),
+            # list_alarms and default ordering / list_alarms y ordenamiento por defecto
+            models.Index(fields=['hour', 'minute', 'id'], name='clock_alarm_time_order_idx'),
+        ]
         
     def __str__(self):
         return f"{self.title} - {self.hour:02d}:{self.minute:02d}"
@@ -163,11 +199,41 @@ class Alarm(models.Model):
     
     def should_trigger_today(self, weekday):
         """Check if alarm should trigger today based on repeat settings / Verificar si la alarma debe dispararse hoy basado en configuraciones de repetición"""
-        if self.repeat_daily:
-            return True
-        if self.repeat_weekdays and weekday in self.repeat_weekdays:
+        if self.weekday_mask & (1 << weekday):
             return True
-        return not self.repeat_daily and not self.repeat_weekdays
+        return self.alarm_date is not None and self.alarm_date.weekday() == weekday
+    
+    def compute_next_fire_at(self, after=None):
+        """Next occurrence after `after` (default now), skipping any silenced period / Próxima ocurrencia después de `after` (por defecto ahora), saltando cualquier período silenciado
+
+        A pending snooze re-fire counts as an occurrence. / Un re-disparo pospuesto pendiente
+        cuenta como una ocurrencia.
+        """
+        from .scheduling import next_occurrence
+
+        if not self.is_active:
+            return None
+        after = after or timezone.now()
+        snoozed_until = self.snoozed_until if self.snoozed_until and self.snoozed_until > after else None
+        if self.silenced_until and self.silenced_until > after:
+            after = self.silenced_until
+        following = next_occurrence(self, after)
+        return min(filter(None, (following, snoozed_until)), default=None)
+    
+    def refresh_schedule(self, now=None):
+        """Recompute the derived weekday_mask and next_fire_at columns / Recalcular las columnas derivadas weekday_mask y next_fire_at"""
+        from .scheduling import weekday_mask_for
+
+        self.weekday_mask = weekday_mask_for(self)
+        self.next_fire_at = self.compute_next_fire_at(now)
+    
+    def save(self, *args, **kwargs):
+        """Save and keep the derived schedule columns in step / Guardar y mantener acordes las columnas derivadas de programación"""
+        self.refresh_schedule()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'weekday_mask', 'next_fire_at'}
+        super().save(*args, **kwargs)
     
     def trigger(self):
         """Mark alarm as triggered / Marcar alarma como disparada"""
@@ -190,19 +256,59 @@ class AlarmLog(models.Model):
     alarm = models.ForeignKey(Alarm, on_delete=models.SET_NULL, null=True, blank=True, related_name='logs', verbose_name="Alarma")
     alarm_title = models.CharField(max_length=200, blank=True, verbose_name="Título de la Alarma")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, verbose_name="Estado")
-    triggered_at = models.DateTimeField(auto_now_add=True, verbose_name="Disparada En")
+    # Set when the event happens, not when the row is written (logs may be buffered) / Se fija cuando ocurre el evento, no cuando se escribe la fila (los registros pueden ir en búfer)
+    triggered_at = models.DateTimeField(default=timezone.now, verbose_name="Disparada En")
+    # Occurrence a trigger was for; triggered_at - scheduled_at is the firing lag / Ocurrencia a la que corresponde un disparo; triggered_at - scheduled_at es el retraso del disparo
+    scheduled_at = models.DateTimeField(null=True, blank=True, verbose_name="Programada Para")
     user_action = models.CharField(max_length=100, blank=True, verbose_name="Acción del Usuario")
+    # Time from the trigger to the user's dismiss or snooze / Tiempo desde el disparo hasta que el usuario descarta o pospone
     response_time = models.DurationField(null=True, blank=True, verbose_name="Tiempo de Respuesta")
     
     class Meta:
         verbose_name = "Registro de Alarma"
         verbose_name_plural = "Registros de Alarmas"
         ordering = ['-triggered_at']
+        indexes = [
+            # Date-range counts and newest-first listings / Conteos por rango de fechas y listados de más reciente a más antiguo
+            models.Index(fields=['triggered_at'], name='clock_log_triggered_idx'),
+            # Per-status counts over a date range / Conteos por estado en un rango de fechas
+            models.Index(fields=['status', 'triggered_at'], name='clock_log_status_time_idx'),
+        ]
         
     def __str__(self):
         return f"{self.alarm.title} - {self.get_status_display()} - {self.triggered_at}"
 
 
+class AlarmOccurrence(models.Model):
+    """Claim on one scheduled occurrence of an alarm / Reclamo sobre una ocurrencia programada de una alarma
+
+    The unique (alarm, occurrence_at) pair lets several dispatcher nodes race for the same due
+    rows: only the node whose INSERT lands fires and logs the occurrence. / El par único (alarma,
+    occurrence_at) permite que varios nodos despachadores compitan por las mismas filas
+    pendientes: solo el nodo cuyo INSERT entra dispara y registra la ocurrencia.
+    """
+
+    alarm = models.ForeignKey(Alarm, on_delete=models.CASCADE, related_name='occurrences', verbose_name="Alarma")
+    occurrence_at = models.DateTimeField(verbose_name="Ocurrencia")
+    # Dispatcher batch that won the claim (node and batch number) / Lote del despachador que ganó el reclamo (nodo y número de lote)
+    claimed_by = models.CharField(max_length=100, verbose_name="Reclamada Por")
+    claimed_at = models.DateTimeField(default=timezone.now, verbose_name="Reclamada En")
+
+    class Meta:
+        verbose_name = "Ocurrencia de Alarma"
+        verbose_name_plural = "Ocurrencias de Alarmas"
+        constraints = [
+            models.UniqueConstraint(fields=['alarm', 'occurrence_at'], name='clock_occurrence_claim_unique'),
+        ]
+        indexes = [
+            # Pruning old claims / Depuración de reclamos antiguos
+            models.Index(fields=['occurrence_at'], name='clock_occurrence_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.alarm_id} @ {self.occurrence_at} ({self.claimed_by})"
+
+
 class CircularListState(models.Model):
     """State of circular lists (for persistence) / Estado de listas circulares (para persistencia)"""
     
@@ -230,7 +336,10 @@ class ClockStatistics(models.Model):
     """Clock usage statistics / Estadísticas de uso del reloj"""
     
     date = models.DateField(unique=True, verbose_name="Fecha")
+    # Minutes of the day with the clock open in at least one client, each counted once / Minutos del día con el reloj abierto en al menos un cliente, cada uno contado una vez
     total_runtime_minutes = models.IntegerField(default=0, verbose_name="Tiempo Total Ejecutándose (minutos)")
+    # Last local minute of the day (0-1439) already added to total_runtime_minutes / Último minuto local del día (0-1439) ya sumado a total_runtime_minutes
+    runtime_counted_through = models.IntegerField(default=-1, verbose_name="Tiempo Contado Hasta (minuto)")
     alarms_triggered = models.IntegerField(default=0, verbose_name="Alarmas Disparadas")
     format_changes = models.IntegerField(default=0, verbose_name="Cambios de Formato")
     sync_operations = models.IntegerField(default=0, verbose_name="Sincronizaciones")
@@ -0,0 +1,109 @@
+"""
+Keyset Pagination / Paginación por Claves
+Opaque cursors over an ordered key instead of OFFSET / Cursores opacos sobre una clave ordenada en lugar de OFFSET
+
+
+"""
+
+import base64
+import datetime
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import DateTimeField, Q
+
+from .scheduling import parse_instant
+
+
+DEFAULT_PAGE_SIZE = 50
+PAGE_SIZE_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    """Cursor that cannot be decoded for this listing / Cursor que no se puede decodificar para este listado"""
+
+
+def encode_cursor(values):
+    """Opaque URL-safe token for the key of the last row / Token opaco apto para URL con la clave de la última fila"""
+    plain = [value.isoformat() if isinstance(value, datetime.datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(plain, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, model, fields):
+    """Key values from a token, converted back to the field types / Valores de la clave desde un token, convertidos a los tipos de los campos"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor("cursor does not match this listing")
+    decoded = []
+    for field, value in zip(fields, values):
+        # Only scalars can be compared with a key column / Solo los escalares se pueden comparar con una columna de la clave
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise InvalidCursor("cursor values must be strings or numbers")
+        model_field = model._meta.get_field(field.lstrip('-'))
+        try:
+            if isinstance(model_field, DateTimeField):
+                value = parse_instant(value)
+            else:
+                value = model_field.to_python(value)
+        except (ValidationError, ValueError, OverflowError, OSError) as e:
+            raise InvalidCursor(f"invalid value for {model_field.name}") from e
+        decoded.append(value)
+    return decoded
+
+
+def after_q(fields, values):
+    """Rows strictly after a key in the given ordering / Filas estrictamente posteriores a una clave en el orden dado
+
+    (a, b, c) > (x, y, z) becomes a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z);
+    a '-' prefix flips the comparison. / Un prefijo '-' invierte la comparación.
+    """
+    terms = []
+    equal = {}
+    for field, value in zip(fields, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        terms.append(Q(**equal, **{f'{name}__{lookup}': value}))
+        equal[name] = value
+    return reduce(operator.or_, terms)
+
+
+def parse_limit(value):
+    """Page size from a query parameter, clamped to the limit / Tamaño de página desde un parámetro, limitado al máximo"""
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(value), PAGE_SIZE_LIMIT))
+
+
+def keyset_page(queryset, fields, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of `queryset` ordered by `fields`: (rows, next cursor or None) / Una página de `queryset` ordenada por `fields`: (filas, siguiente cursor o None)
+
+    `queryset` should already be reduced with values(); every key field must be among them. /
+    `queryset` ya debe estar reducido con values(); cada campo de la clave debe estar incluido.
+    """
+    queryset = queryset.order_by(*fields)
+    if cursor:
+        queryset = queryset.filter(after_q(fields, decode_cursor(cursor, queryset.model, fields)))
+    # One extra row tells whether another page exists / Una fila extra indica si existe otra página
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][field.lstrip('-')] for field in fields])
+
+
+async def akeyset_page(queryset, fields, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Async keyset_page() for async views, iterating with the async ORM / keyset_page() asíncrono para vistas asíncronas, iterando con el ORM asíncrono"""
+    queryset = queryset.order_by(*fields)
+    if cursor:
+        queryset = queryset.filter(after_q(fields, decode_cursor(cursor, queryset.model, fields)))
+    rows = [row async for row in queryset[:limit + 1]]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][field.lstrip('-')] for field in fields])
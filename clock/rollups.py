@@ -0,0 +1,90 @@
+"""
+Daily Statistics Rollups / Acumulados Diarios de Estadísticas
+Atomic F() increments of the ClockStatistics counters / Incrementos atómicos con F() de los contadores de ClockStatistics
+
+
+"""
+
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ClockStatistics
+
+
+ROLLUP_FIELDS = ('total_runtime_minutes', 'alarms_triggered', 'format_changes', 'sync_operations')
+
+# Last local minute of each day this process already saw counted; repeat checks in a minute skip the UPDATE / Último minuto local de cada día que este proceso ya vio contado; las verificaciones repetidas en un minuto omiten el UPDATE
+_counted_through = {}
+_counted_lock = threading.Lock()
+
+
+def increment(day=None, **deltas):
+    """Add to today's (or `day`'s) counters with a single UPDATE / Sumar a los contadores de hoy (o de `day`) con un solo UPDATE"""
+    day = day or timezone.localdate()
+    _apply(day, {field: amount for field, amount in deltas.items() if amount})
+
+
+def uncounted_runtime(segments, now=None):
+    """The (day, first, last) minute segments not yet counted as far as this process knows; no I/O / Los segmentos (día, primero, último) aún no contados según este proceso; sin E/S
+
+    Segments are cut at the current minute: a client clock running ahead (or a future `until`)
+    must not move runtime_counted_through past minutes that have not happened, or they would
+    never be counted. / Los segmentos se cortan en el minuto actual: un reloj de cliente
+    adelantado (o un `until` futuro) no debe mover runtime_counted_through más allá de minutos
+    que aún no ocurren, o nunca se contarían.
+    """
+    now = timezone.localtime(now)
+    today, current = now.date(), now.hour * 60 + now.minute
+    elapsed = [
+        (day, first, min(last, current) if day == today else last)
+        for day, first, last in segments
+        if day < today or (day == today and first <= current)
+    ]
+    with _counted_lock:
+        return [(day, first, last) for day, first, last in elapsed if last > _counted_through.get(day, -1)]
+
+
+def count_runtime(segments):
+    """Add the clock-open minutes in `segments` to total_runtime_minutes, each minute once / Sumar a total_runtime_minutes los minutos con el reloj abierto en `segments`, cada minuto una vez
+
+    runtime_counted_through is the last minute of the day already counted, so the conditional
+    UPDATE adds only minutes past it: a minute counts once however many tabs, workers or hosts
+    report it, and it is stored immediately. / runtime_counted_through es el último minuto del
+    día ya contado, así que el UPDATE condicional solo suma los minutos posteriores: un minuto
+    cuenta una vez sin importar cuántas pestañas, workers o hosts lo reporten, y se guarda de
+    inmediato.
+    """
+    for day, first, last in segments:
+        counted = ClockStatistics.objects.filter(date=day, runtime_counted_through__lt=last)
+        updates = {
+            'total_runtime_minutes': F('total_runtime_minutes') + last - Greatest(F('runtime_counted_through'), first - 1),
+            'runtime_counted_through': last,
+        }
+        if not counted.update(**updates) and not ClockStatistics.objects.filter(date=day).exists():
+            try:
+                with transaction.atomic():
+                    ClockStatistics.objects.create(date=day, total_runtime_minutes=last - first + 1, runtime_counted_through=last)
+            except IntegrityError:
+                counted.update(**updates)
+        with _counted_lock:
+            _counted_through[day] = max(last, _counted_through.get(day, -1))
+            for old in [known for known in _counted_through if known < day - timezone.timedelta(days=1)]:
+                del _counted_through[old]
+
+
+def _apply(day, deltas):
+    if not deltas:
+        return
+    updates = {field: F(field) + amount for field, amount in deltas.items()}
+    if ClockStatistics.objects.filter(date=day).update(**updates):
+        return
+    # First write of the day: create the row, or lose the race and update it / Primera escritura del día: crear la fila, o perder la carrera y actualizarla
+    try:
+        with transaction.atomic():
+            ClockStatistics.objects.create(date=day, **deltas)
+    except IntegrityError:
+        ClockStatistics.objects.filter(date=day).update(**updates)
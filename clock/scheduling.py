@@ -0,0 +1,189 @@
+"""
+Alarm Schedule Semantics / Semántica de Programación de Alarmas
+Time window helpers shared by the alarm views / Utilidades de ventanas de tiempo compartidas por las vistas de alarmas
+
+
+"""
+
+import datetime
+import operator
+from functools import reduce
+
+from django.db.models import F, Q
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+
+# Longest catch-up window honoured in a single check / Ventana de recuperación más larga atendida en una sola verificación
+MAX_CATCHUP_WINDOW = datetime.timedelta(hours=24)
+
+# Bit i of Alarm.weekday_mask is weekday i (0=Monday) / El bit i de Alarm.weekday_mask es el día i (0=Lunes)
+ALL_WEEKDAYS_MASK = 0b1111111
+
+
+def to_24h(hour, period):
+    """Convert a 12h hour and period to a 24h hour / Convertir una hora 12h y período a hora 24h"""
+    return (hour % 12) + (12 if period == 'PM' else 0)
+
+
+def to_12h(hour_24):
+    """Convert a 24h hour to a (hour, period) pair / Convertir una hora 24h a un par (hora, período)"""
+    period = 'AM' if hour_24 < 12 else 'PM'
+    hour_12 = 12 if hour_24 % 12 == 0 else hour_24 % 12
+    return hour_12, period
+
+
+def minute_of_day(hour, minute, period):
+    """Minutes since local midnight for a 12h alarm time / Minutos desde la medianoche local para una hora de alarma 12h"""
+    return to_24h(hour, period) * 60 + minute
+
+
+def weekday_q(weekday):
+    """Alarms recurring on a weekday, answered with a bitwise test in SQL / Alarmas recurrentes en un día de la semana, resuelto con una prueba de bits en SQL"""
+    return Q(GreaterThan(F('weekday_mask').bitand(1 << weekday), 0))
+
+
+def day_schedule_q(day):
+    """Alarms scheduled on a calendar day: specific date or recurring weekday / Alarmas programadas en un día: fecha específica o día de la semana recurrente"""
+    return Q(alarm_date=day) | weekday_q(day.weekday())
+
+
+def fires_on(alarm, day):
+    """Whether the alarm is scheduled on a calendar day / Si la alarma está programada en un día del calendario"""
+    return alarm.alarm_date == day or bool(alarm.weekday_mask & (1 << day.weekday()))
+
+
+def minute_range_q(first, last):
+    """Alarms whose time falls in an inclusive minute-of-day range / Alarmas cuya hora cae en un rango inclusivo de minutos del día"""
+    first_hour, first_minute = divmod(first, 60)
+    last_hour, last_minute = divmod(last, 60)
+
+    def hour_q(hour_24):
+        hour_12, period = to_12h(hour_24)
+        return Q(period=period, hour=hour_12)
+
+    if first_hour == last_hour:
+        return hour_q(first_hour) & Q(minute__gte=first_minute, minute__lte=last_minute)
+
+    terms = [
+        hour_q(first_hour) & Q(minute__gte=first_minute),
+        hour_q(last_hour) & Q(minute__lte=last_minute),
+    ]
+    # Whole hours in between, grouped by period / Horas completas intermedias, agrupadas por período
+    full_hours = {}
+    for hour_24 in range(first_hour + 1, last_hour):
+        hour_12, period = to_12h(hour_24)
+        full_hours.setdefault(period, []).append(hour_12)
+    for period, hours in full_hours.items():
+        terms.append(Q(period=period, hour__in=hours))
+    return reduce(operator.or_, terms)
+
+
+def window_segments(since, until):
+    """Split the local minutes in (since, until] into per-day segments / Dividir los minutos locales en (since, until] en segmentos por día
+
+    Returns a list of (date, first_minute, last_minute) tuples. `since` is exclusive at minute
+    granularity, so the minute a previous check already covered is never repeated; without
+    `since` only the minute of `until` is covered. / Devuelve una lista de tuplas (fecha,
+    primer_minuto, último_minuto). `since` es exclusivo a nivel de minuto.
+    """
+    until = timezone.localtime(until).replace(second=0, microsecond=0)
+    if since is None:
+        start = until
+    else:
+        start = timezone.localtime(since).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # Never scan further back than the catch-up limit / Nunca escanear más atrás del límite de recuperación
+        start = max(start, until - MAX_CATCHUP_WINDOW + datetime.timedelta(minutes=1))
+    if start > until:
+        return []
+
+    segments = []
+    day = start.date()
+    while day <= until.date():
+        first = start.hour * 60 + start.minute if day == start.date() else 0
+        last = until.hour * 60 + until.minute if day == until.date() else 24 * 60 - 1
+        segments.append((day, first, last))
+        day += datetime.timedelta(days=1)
+    return segments
+
+
+def window_q(segments):
+    """Single filter matching every alarm due in the given segments / Filtro único que coincide con cada alarma pendiente en los segmentos dados"""
+    if not segments:
+        return Q(pk__in=[])
+    return reduce(operator.or_, [
+        day_schedule_q(day) & minute_range_q(first, last)
+        for day, first, last in segments
+    ])
+
+
+def latest_occurrence(alarm, segments):
+    """Latest local datetime the alarm was due within the segments / Última fecha-hora local en que la alarma debía sonar dentro de los segmentos"""
+    alarm_minute = minute_of_day(alarm.hour, alarm.minute, alarm.period)
+    for day, first, last in reversed(segments):
+        if not first <= alarm_minute <= last:
+            continue
+        if fires_on(alarm, day):
+            naive = datetime.datetime.combine(day, datetime.time(*divmod(alarm_minute, 60)))
+            return timezone.make_aware(naive)
+    return None
+
+
+def weekday_mask_for(alarm):
+    """Recurrence bitmask from repeat_daily, repeat_weekdays and day_of_week / Máscara de recurrencia a partir de repeat_daily, repeat_weekdays y day_of_week"""
+    if alarm.repeat_daily:
+        return ALL_WEEKDAYS_MASK
+    mask = 0
+    for weekday in alarm.repeat_weekdays or []:
+        mask |= 1 << int(weekday)
+    if alarm.day_of_week is not None:
+        mask |= 1 << alarm.day_of_week
+    if not mask and alarm.alarm_date is None:
+        # No restriction at all means every day / Sin ninguna restricción significa todos los días
+        return ALL_WEEKDAYS_MASK
+    return mask
+
+
+def next_occurrence(alarm, after):
+    """First local datetime strictly after `after` when the alarm fires, or None / Primera fecha-hora local estrictamente posterior a `after` en que la alarma suena, o None"""
+    local = timezone.localtime(after)
+    fire_time = datetime.time(to_24h(alarm.hour, alarm.period), alarm.minute, alarm.second or 0)
+
+    # A weekly pattern always repeats within eight days / Un patrón semanal siempre se repite dentro de ocho días
+    for offset in range(8):
+        day = local.date() + datetime.timedelta(days=offset)
+        if fires_on(alarm, day):
+            candidate = timezone.make_aware(datetime.datetime.combine(day, fire_time))
+            if candidate > after:
+                return candidate
+
+    # One-off alarms further in the future / Alarmas únicas más lejanas en el futuro
+    if alarm.alarm_date is not None:
+        candidate = timezone.make_aware(datetime.datetime.combine(alarm.alarm_date, fire_time))
+        if candidate > after:
+            return candidate
+    return None
+
+
+def local_day_bounds(day):
+    """Aware [start, end) instants of a local calendar day, usable by an index range scan / Instantes conscientes [inicio, fin) de un día local, utilizables por un escaneo de índice por rango"""
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    end = timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min))
+    return start, end
+
+
+def parse_instant(value):
+    """Parse an ISO 8601 string or epoch seconds into an aware datetime / Convertir una cadena ISO 8601 o segundos epoch en datetime consciente"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+    parsed = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,218 @@
+"""
+Cross-worker Shared Clock State / Estado del Reloj Compartido entre Workers
+One ticking publisher per host writes the clock snapshot into a memory-mapped segment / Un único publicador por host escribe la instantánea del reloj en un segmento mapeado en memoria
+
+Layout (little-endian, 64 bytes):
+    0   magic  4s   b'CCLK'
+    4   layout u32  SEGMENT_LAYOUT
+    8   seq    u64  seqlock counter, odd while the publisher is writing
+    16  body        published_at f64, publisher pid i32, config and alarm version stamps i64,
+                    hour_24, minute, second, weekday, format_24h u8
+The publisher is elected with a non-blocking flock on a side file, so it moves to another worker
+when its process exits. Readers never lock: they copy the body between two reads of `seq` and
+retry if a write was in progress. / El publicador se elige con un flock no bloqueante sobre un
+archivo auxiliar, así que pasa a otro worker cuando su proceso termina. Los lectores nunca
+bloquean: copian el cuerpo entre dos lecturas de `seq` y reintentan si había una escritura en curso.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: the shared state stays off / No disponible en Windows: el estado compartido queda apagado
+    fcntl = None
+
+from .alarm_index import VERSION_NAME as ALARMS_VERSION_NAME
+from .circular_lists import DaysList
+from .reloj_core import CircularClock
+from .signals import CONFIG_VERSION_NAME
+from .version_stamps import get_version
+
+
+MAGIC = b'CCLK'
+SEGMENT_LAYOUT = 1
+SEGMENT_SIZE = 64
+
+_HEADER = struct.Struct('<4sI')
+_SEQ = struct.Struct('<Q')
+_SEQ_OFFSET = 8
+_BODY = struct.Struct('<diqqBBBBB')
+_BODY_OFFSET = 16
+
+# Attempts before a reader gives up on a segment that keeps changing / Intentos antes de que un lector desista de un segmento que no deja de cambiar
+READ_RETRIES = 100
+
+ClockSnapshot = namedtuple('ClockSnapshot', (
+    'published_at', 'publisher_pid', 'config_version', 'alarms_version',
+    'hour_24', 'minute', 'second', 'weekday', 'format_24h',
+))
+
+
+def _weekday_names():
+    # Names come from DaysList so the shared path matches the engine / Los nombres vienen de DaysList para que coincidan con el motor
+    days = DaysList()
+    names = []
+    for number in range(7):
+        days.set_day_number(number)
+        names.append((days.get_value(), days.get_spanish_day()))
+    return names
+
+
+WEEKDAY_NAMES = _weekday_names()
+
+
+def display_from_snapshot(snapshot):
+    """Same dict as CircularClock.get_current_time() for a snapshot / Mismo dict que CircularClock.get_current_time() para una instantánea"""
+    hour_24 = snapshot.hour_24
+    english, spanish = WEEKDAY_NAMES[snapshot.weekday]
+    return {
+        'hour': hour_24 if snapshot.format_24h else (12 if hour_24 == 0 else (hour_24 if hour_24 <= 12 else hour_24 - 12)),
+        'minute': snapshot.minute,
+        'second': snapshot.second,
+        'day': spanish,
+        'day_english': english,
+        'am_pm': '' if snapshot.format_24h else ('AM' if hour_24 < 12 else 'PM'),
+        'format_24h': bool(snapshot.format_24h),
+        'hour_24h': hour_24,
+    }
+
+
+class SharedClockState:
+    """Memory-mapped clock snapshot shared by every worker on the host / Instantánea del reloj mapeada en memoria compartida por todos los workers del host"""
+
+    def __init__(self, path, stale_after=3.0):
+        self.path = Path(path)
+        self.stale_after = stale_after  # Older snapshots mean the publisher is gone / Instantáneas más antiguas indican que el publicador ya no está
+        self._map = None
+        self._lock_fd = None
+        self._attach_lock = threading.Lock()
+        self._thread = None
+
+    def _attach(self):
+        if self._map is None:
+            with self._attach_lock:
+                if self._map is None:
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < SEGMENT_SIZE:
+                            os.ftruncate(fd, SEGMENT_SIZE)
+                        self._map = mmap.mmap(fd, SEGMENT_SIZE)
+                    finally:
+                        os.close(fd)
+        return self._map
+
+    def read(self):
+        """Latest consistent snapshot, or None if nothing was published yet / Última instantánea consistente, o None si aún no se publicó nada"""
+        segment = self._attach()
+        for _ in range(READ_RETRIES):
+            before = _SEQ.unpack_from(segment, _SEQ_OFFSET)[0]
+            if before & 1:
+                continue
+            magic, layout = _HEADER.unpack_from(segment, 0)
+            body = _BODY.unpack_from(segment, _BODY_OFFSET)
+            if _SEQ.unpack_from(segment, _SEQ_OFFSET)[0] == before:
+                if magic != MAGIC or layout != SEGMENT_LAYOUT:
+                    return None
+                return ClockSnapshot(*body)
+        return None
+
+    def current(self):
+        """Fresh snapshot, or None (and a publisher election) when it is missing or stale / Instantánea vigente, o None (y una elección de publicador) si falta o está vencida"""
+        snapshot = self.read()
+        if snapshot is not None and time.time() - snapshot.published_at <= self.stale_after:
+            return snapshot
+        self.try_publish()
+        return None
+
+    def write(self, snapshot):
+        """Publish a snapshot; only the elected publisher calls this / Publicar una instantánea; solo el publicador elegido la llama"""
+        segment = self._attach()
+        seq = _SEQ.unpack_from(segment, _SEQ_OFFSET)[0]
+        if seq & 1:
+            seq += 1  # A previous publisher died mid-write / Un publicador anterior murió a mitad de escritura
+        _SEQ.pack_into(segment, _SEQ_OFFSET, seq + 1)
+        _HEADER.pack_into(segment, 0, MAGIC, SEGMENT_LAYOUT)
+        _BODY.pack_into(segment, _BODY_OFFSET, *snapshot)
+        _SEQ.pack_into(segment, _SEQ_OFFSET, seq + 2)
+
+    def try_publish(self):
+        """Become the publisher if no other process holds the lock; returns whether this process publishes / Convertirse en publicador si ningún otro proceso tiene el bloqueo; devuelve si este proceso publica"""
+        if self._thread is not None:
+            return True
+        with self._attach_lock:
+            if self._thread is not None:
+                return True
+            fd = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            # The descriptor stays open: the lock lives as long as this process / El descriptor queda abierto: el bloqueo dura lo que dure este proceso
+            self._lock_fd = fd
+            self._thread = threading.Thread(target=self._run, name='clock-state-publisher', daemon=True)
+            self._thread.start()
+            return True
+
+    def snapshot_now(self, clock, config_version, alarms_version):
+        """Sync the engine and describe it as a snapshot / Sincronizar el motor y describirlo como instantánea"""
+        clock.sync_colombia_time()
+        current = clock.get_current_time()
+        return ClockSnapshot(
+            time.time(), os.getpid(), config_version, alarms_version,
+            current['hour_24h'], current['minute'], current['second'],
+            clock.days.get_day_number(), int(clock.format_24h),
+        )
+
+    def _run(self):
+        """Publish once per second, on the second boundary / Publicar una vez por segundo, en el cambio de segundo"""
+        from .models import ClockConfiguration
+
+        clock = CircularClock()
+        config_version = None
+        while True:
+            try:
+                # Read the stamp before the row so a concurrent save is picked up next tick / Leer la marca antes que la fila para que un guardado concurrente se tome en el siguiente tick
+                latest = get_version(CONFIG_VERSION_NAME)
+                if latest != config_version:
+                    time_format = ClockConfiguration.objects.values_list('time_format', flat=True).first()
+                    clock.change_format(time_format == '24h')
+                    config_version = latest
+                self.write(self.snapshot_now(clock, config_version, get_version(ALARMS_VERSION_NAME)))
+            except Exception as e:
+                print(f"Error publishing clock state: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(1.0 - time.time() % 1.0)
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_shared_state():
+    """Process-wide segment, or None when CLOCK_SHARED_STATE is not enabled / Segmento del proceso, o None cuando CLOCK_SHARED_STATE no está habilitado"""
+    global _state
+    config = getattr(settings, 'CLOCK_SHARED_STATE', {})
+    if not config.get('ENABLED') or fcntl is None:
+        return None
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                _state = SharedClockState(config['PATH'], stale_after=config.get('STALE_AFTER', 3.0))
+    return _state
+
+
+def current_snapshot():
+    """Fresh shared snapshot, or None to fall back to the worker's own engine / Instantánea compartida vigente, o None para usar el motor propio del worker"""
+    state = get_shared_state()
+    return state.current() if state is not None else None
@@ -0,0 +1,54 @@
+"""
+Model Signal Handlers / Manejadores de Señales de Modelos
+Keep in-process caches in sync with the database / Mantener las cachés del proceso sincronizadas con la base de datos
+
+
+"""
+
+import copy
+
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .alarm_index import alarm_index
+from .models import Alarm, ClockConfiguration
+from .version_stamps import bump_version
+
+
+# Stamp behind the configuration ETag / Marca detrás del ETag de la configuración
+CONFIG_VERSION_NAME = 'config'
+
+
+@receiver(post_save, sender=Alarm, dispatch_uid='clock_alarm_index_save')
+def update_alarm_index(sender, instance, **kwargs):
+    """Refresh the saved alarm in the active-alarm index once the save commits / Actualizar la alarma guardada en el índice de alarmas activas cuando el guardado se confirma
+
+    A rolled-back save changes neither this worker's index nor the shared stamp, and other
+    workers never reload before the row is visible. The copy keeps later unsaved edits out. /
+    Un guardado revertido no cambia ni el índice de este worker ni la marca compartida, y los
+    demás workers nunca recargan antes de que la fila sea visible. La copia deja fuera las
+    ediciones posteriores sin guardar.
+    """
+    saved = copy.copy(instance)
+    transaction.on_commit(lambda: alarm_index.apply(saved))
+
+
+@receiver(post_delete, sender=Alarm, dispatch_uid='clock_alarm_index_delete')
+def remove_from_alarm_index(sender, instance, **kwargs):
+    """Drop the deleted alarm from the active-alarm index once the delete commits / Quitar la alarma eliminada del índice de alarmas activas cuando el borrado se confirma"""
+    alarm_id = instance.pk
+    transaction.on_commit(lambda: alarm_index.discard(alarm_id))
+
+
+@receiver(post_save, sender=ClockConfiguration, dispatch_uid='clock_config_version')
+def bump_config_version(sender, instance, **kwargs):
+    """Invalidate cached configuration reads in every client once the save commits / Invalidar las lecturas de configuración en caché de todos los clientes cuando el guardado se confirma"""
+    transaction.on_commit(lambda: bump_version(CONFIG_VERSION_NAME))
+
+
+def warm_alarm_index(sender, **kwargs):
+    """Load the index once, before the first request is handled / Cargar el índice una vez, antes de atender la primera solicitud"""
+    request_started.disconnect(warm_alarm_index, dispatch_uid='clock_alarm_index_warm')
+    alarm_index.ensure_current()
@@ -0,0 +1,75 @@
+"""
+Alarm Snooze Engine / Motor de Posposición de Alarmas
+Schedules exact re-fires within each alarm's snooze limit / Programa re-disparos exactos dentro del límite de snoozes de cada alarma
+
+A snooze is one more occurrence: it moves next_fire_at to the re-fire time, so the dispatcher
+fires it from the same index as every other occurrence, and the in-memory index keeps a heap of
+pending re-fires for the browser check. / Un snooze es una ocurrencia más: mueve next_fire_at a
+la hora del re-disparo, así que el despachador lo dispara desde el mismo índice que cualquier
+otra ocurrencia, y el índice en memoria mantiene un heap de re-disparos pendientes para la
+verificación del navegador.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .alarm_events import write_logs
+from .alarm_index import alarm_index
+from .latency import MAX_RESPONSE_TIME, response_time
+from .models import Alarm, AlarmLog
+
+
+SNOOZE_FIELDS = (
+    'id', 'title', 'is_active', 'snooze_enabled', 'snooze_duration', 'max_snooze_count', 'snooze_count', 'last_triggered',
+    'snoozed_until',
+)
+
+
+def can_snooze(alarm, now):
+    """Whether the alarm is ringing, not already snoozed, and has snoozes left / Si la alarma está sonando, no está ya pospuesta y le quedan snoozes
+
+    Ringing means it fired within MAX_RESPONSE_TIME; later than that there is nothing to snooze. /
+    Sonando significa que se disparó dentro de MAX_RESPONSE_TIME; después no hay nada que posponer.
+    """
+    return (
+        alarm.is_active and alarm.snooze_enabled and alarm.snooze_count < alarm.max_snooze_count
+        and alarm.last_triggered is not None and now - MAX_RESPONSE_TIME <= alarm.last_triggered <= now
+        and (alarm.snoozed_until is None or alarm.snoozed_until <= now)
+    )
+
+
+def snooze_alarms(alarm_ids, now=None, user_action='user-snooze'):
+    """Snooze alarms for their own snooze_duration; returns (snoozed alarms, refused ids) / Posponer alarmas por su propio snooze_duration; devuelve (alarmas pospuestas, ids rechazados)
+
+    Alarms sharing a re-fire time are written with one UPDATE and every 'snoozed' log with one
+    INSERT. Re-fire times are whole seconds, like every other occurrence. / Las alarmas que
+    comparten hora de re-disparo se escriben con un UPDATE y todos los registros 'snoozed' con un
+    INSERT. Las horas de re-disparo son segundos enteros, como cualquier otra ocurrencia.
+    """
+    now = now or timezone.now()
+    alarm_ids = set(alarm_ids)
+    with transaction.atomic():
+        alarms = list(Alarm.objects.filter(id__in=alarm_ids).select_for_update().only(*SNOOZE_FIELDS))
+        snoozed = [alarm for alarm in alarms if can_snooze(alarm, now)]
+
+        groups = defaultdict(list)
+        for alarm in snoozed:
+            alarm.snoozed_until = (now + datetime.timedelta(minutes=alarm.snooze_duration)).replace(microsecond=0)
+            alarm.snooze_count += 1
+            groups[alarm.snoozed_until].append(alarm.id)
+        for snoozed_until, ids in groups.items():
+            Alarm.objects.filter(id__in=ids).update(
+                snoozed_until=snoozed_until, next_fire_at=snoozed_until, snooze_count=F('snooze_count') + 1, updated_at=now,
+            )
+        write_logs([
+            AlarmLog(alarm=alarm, alarm_title=alarm.title, status='snoozed', user_action=user_action, triggered_at=now,
+                     response_time=response_time(alarm.last_triggered, now))
+            for alarm in snoozed
+        ])
+    if snoozed:
+        alarm_index.snooze([(alarm.id, alarm.snoozed_until) for alarm in snoozed])
+    return snoozed, sorted(alarm_ids - {alarm.id for alarm in snoozed})
@@ -5,13 +5,1144 @@ Test cases for models, views, and functionality / Casos de prueba para modelos,
 
 """
 
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import time
+from itertools import islice
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here. / Crea tus pruebas aquí. 
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
 
-# TODO: Add comprehensive test cases for: / TODO: Agregar casos de prueba completos para:
-# - Circular lists functionality / - Funcionalidad de listas circulares
-# - Alarm creation and triggering / - Creación y activación de alarmas
-# - Time zone handling / - Manejo de zonas horarias
-# - Clock synchronization / - Sincronización del reloj
-# - Statistics calculation / - Cálculo de estadísticas
+from . import alarm_events, exports, latency, log_archive, rollups, timeseries, version_stamps, views
+from .pagination import encode_cursor
+from .alarm_events import fire_alarms, write_logs
+from .backfill import backfill_missed
+from .dispatcher import AlarmDispatcher
+from .heatmap import trigger_heatmap
+from .log_buffer import AlarmLogBuffer
+from .alarm_index import VERSION_NAME as ALARMS_VERSION_NAME, alarm_index
+from .models import Alarm, AlarmLog, AlarmOccurrence, ClockConfiguration, ClockStatistics
+from .reloj_core import CircularClock
+from .shared_state import SharedClockState
+from .snooze import snooze_alarms
+from .upcoming import upcoming_occurrences
+from .scheduling import MAX_CATCHUP_WINDOW, local_day_bounds, next_occurrence, weekday_q, window_segments
+
+
+class HotPathTestCase(TestCase):
+    """Shared fixtures for the hot-path regression tests / Datos compartidos para las pruebas de regresión de rutas críticas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ClockConfiguration.objects.create()
+        ClockStatistics.objects.create(date=timezone.localdate())
+        cls.alarms = [
+            Alarm.objects.create(title=f"Alarma {i}", hour=7, minute=5, period='AM')
+            for i in range(3)
+        ]
+        Alarm.objects.create(title="Otra", hour=9, minute=30, period='PM', day_of_week=2)
+
+    def setUp(self):
+        # Rows from previous tests were rolled back, so rebuild the index outside the assertions / Las filas de pruebas anteriores se revirtieron, así que reconstruir el índice fuera de las aserciones
+        alarm_index.invalidate()
+        alarm_index.ensure_current()
+        rollups._counted_through.clear()
+
+    def post_json(self, url, payload):
+        return self.client.post(url, json.dumps(payload), content_type='application/json')
+
+    def pin_now(self, hour):
+        """Fix the clock at `hour` today, so the minutes a test reports have already passed / Fijar el reloj a `hour` hoy, así los minutos que reporta una prueba ya pasaron"""
+        now = timezone.make_aware(timezone.datetime.combine(timezone.localdate(), time(hour)))
+        patcher = mock.patch('django.utils.timezone.now', return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return now
+
+
+class QueryCountTests(HotPathTestCase):
+    """Exact number of queries per endpoint / Número exacto de consultas por endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.pin_now(12)
+
+    def test_index(self):
+        with self.assertNumQueries(1):
+            self.client.get('/')
+
+    def test_current_time(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/current-time/')
+
+    def test_check_alarms_nothing_due_uses_no_queries(self):
+        # The first check of a minute counts it as runtime; the rest of the minute is query-free / La primera verificación de un minuto lo cuenta como tiempo de ejecución; el resto del minuto no consulta
+        with self.assertNumQueries(1):
+            self.post_json('/api/check-alarms/', {'hour': 7, 'minute': 6, 'period': 'AM', 'day': 0})
+        with self.assertNumQueries(0):
+            response = self.post_json('/api/check-alarms/', {'hour': 7, 'minute': 6, 'period': 'AM', 'day': 0})
+        self.assertFalse(response.json()['alarm_triggered'])
+
+    def test_check_alarms_is_constant_in_fired_alarms(self):
+        # runtime + select + savepoint + counters and next_fire_at update + log insert + rollup update + release / tiempo de ejecución + select + savepoint + actualización de contadores y next_fire_at + inserción de registros + acumulado + release
+        with self.assertNumQueries(7):
+            response = self.post_json('/api/check-alarms/', {'hour': 7, 'minute': 5, 'period': 'AM', 'day': 0})
+        self.assertEqual(len(response.json()['triggered_alarms']), 3)
+
+        Alarm.objects.bulk_create([
+            Alarm(title=f"Extra {i}", hour=7, minute=5, period='AM', weekday_mask=0b1111111)
+            for i in range(20)
+        ])
+        alarm_index.invalidate()
+        alarm_index.ensure_current()
+        # Same minute: its runtime is already counted / Mismo minuto: su tiempo de ejecución ya está contado
+        with self.assertNumQueries(6):
+            response = self.post_json('/api/check-alarms/', {'hour': 7, 'minute': 5, 'period': 'AM', 'day': 0})
+        self.assertEqual(len(response.json()['triggered_alarms']), 23)
+        self.assertEqual(AlarmLog.objects.filter(status='triggered').count(), 26)
+
+    def test_check_alarms_window(self):
+        until = timezone.make_aware(timezone.datetime.combine(timezone.localdate(), time(7, 10)))
+        since = until - timezone.timedelta(minutes=30)
+        with self.assertNumQueries(7):
+            response = self.post_json('/api/check-alarms/', {'since': since.isoformat(), 'until': until.isoformat()})
+        self.assertEqual(len(response.json()['triggered_alarms']), 3)
+
+    def test_list_alarms(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/alarms/list/')
+
+    def test_conditional_get_skips_queries(self):
+        for url in ('/api/alarms/list/', '/api/configuration/'):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+        # Any write changes the tag / Cualquier escritura cambia la etiqueta
+        etag = self.client.get('/api/alarms/list/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/alarms/{self.alarms[0].id}/toggle/')
+        self.assertEqual(self.client.get('/api/alarms/list/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get('/api/configuration/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/toggle-format/')
+        self.assertEqual(self.client.get('/api/configuration/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_statistics(self):
+        self.post_json('/api/check-alarms/', {'hour': 7, 'minute': 5, 'period': 'AM', 'day': 0})
+        # stats row + alarm aggregate + 7-day rollups + rollup total + recent logs / fila de estadísticas + agregado de alarmas + acumulados de 7 días + total acumulado + registros recientes
+        with self.assertNumQueries(5):
+            response = self.client.get('/statistics/')
+        self.assertEqual(response.context['chart_payload']['data'], [0, 0, 0, 0, 0, 0, 3])
+        self.assertEqual(response.context['triggered_today'], 3)
+        self.assertEqual(response.context['total_triggers'], 3)
+        self.assertEqual(response.context['unique_alarms_triggered'], 3)
+
+    def test_format_and_sync_rollups(self):
+        # get-or-create config + config save + rollup update / obtener o crear config + guardar config + acumulado
+        with self.assertNumQueries(3):
+            self.client.post('/api/toggle-format/')
+        with self.assertNumQueries(1):
+            self.client.post('/api/sync-time/')
+        stats = ClockStatistics.objects.get(date=timezone.localdate())
+        self.assertEqual((stats.format_changes, stats.sync_operations), (1, 1))
+
+    def test_dismiss_alarm(self):
+        # select + full-row save + log insert / select + guardado de la fila + inserción del registro
+        with self.assertNumQueries(3):
+            self.post_json('/api/alarms/dismiss/', {'alarm_id': self.alarms[0].id, 'silence_minutes': 5})
+
+
+class AsyncViewTests(HotPathTestCase):
+    """Async polling views answer like their sync versions / Las vistas asíncronas de sondeo responden como sus versiones síncronas"""
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        # Stamp reads are file I/O and must not run on the event loop / Las lecturas de marcas son E/S de archivos y no deben correr en el bucle de eventos
+        get_version = version_stamps.get_version
+
+        def off_the_loop(name):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return get_version(name)
+            raise AssertionError(f"version stamp {name!r} read on the event loop")
+
+        for module in ('clock.version_stamps', 'clock.views', 'clock.alarm_index'):
+            patcher = mock.patch(f'{module}.get_version', off_the_loop)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_current_time(self):
+        response = await views.aget_current_time(self.factory.get('/api/current-time/'))
+        self.assertTrue(json.loads(response.content)['success'])
+
+    async def test_check_alarms(self):
+        body = json.dumps({'hour': 7, 'minute': 5, 'period': 'AM', 'day': 0})
+        response = await views.acheck_alarms(self.factory.post('/api/check-alarms/', body, content_type='application/json'))
+        self.assertEqual(len(json.loads(response.content)['triggered_alarms']), 3)
+        self.assertEqual(await AlarmLog.objects.filter(status='triggered').acount(), 3)
+
+        body = json.dumps({'hour': 7, 'minute': 6, 'period': 'AM', 'day': 0})
+        response = await views.acheck_alarms(self.factory.post('/api/check-alarms/', body, content_type='application/json'))
+        self.assertFalse(json.loads(response.content)['alarm_triggered'])
+
+    async def test_list_alarms_and_configuration(self):
+        response = await views.alist_alarms(self.factory.get('/api/alarms/list/', {'limit': 2}))
+        first = json.loads(response.content)
+        self.assertEqual(len(first['alarms']), 2)
+        response = await views.alist_alarms(self.factory.get('/api/alarms/list/', {'cursor': first['next_cursor']}))
+        self.assertEqual(len(json.loads(response.content)['alarms']), 2)
+        self.assertIsNotNone(response['ETag'])
+
+        response = await views.aget_configuration(self.factory.get('/api/configuration/'))
+        self.assertEqual(
+            (await views.aget_configuration(self.factory.get('/api/configuration/', headers={'If-None-Match': response['ETag']}))).status_code,
+            304,
+        )
+
+    async def test_alarm_events(self):
+        now = timezone.now()
+        await Alarm.objects.filter(id=self.alarms[0].id).aupdate(next_fire_at=now)
+        await sync_to_async(AlarmDispatcher().dispatch_due)(now)
+        with mock.patch.object(views, 'EVENT_STREAM_SECONDS', 0.5):
+            response = await views.aalarm_events(self.factory.get('/api/alarms/events/', {'after': 0}))
+            body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual(body.count('event: alarm'), 1)
+
+
+class RuntimeTests(HotPathTestCase):
+    """Runtime minutes are counted once however many clients report them / Los minutos de ejecución se cuentan una vez sin importar cuántos clientes los reporten"""
+
+    def setUp(self):
+        super().setUp()
+        self.now = self.pin_now(23)
+
+    def runtime(self):
+        return ClockStatistics.objects.get(date=timezone.localdate()).total_runtime_minutes
+
+    def check(self, minute):
+        self.post_json('/api/check-alarms/', {'hour': 8, 'minute': minute, 'period': 'AM', 'day': 0})
+
+    def test_tabs_and_workers_count_a_minute_once(self):
+        for _ in range(3):
+            self.check(0)
+        # Another worker knows nothing in memory; the stored mark still stops it / Otro worker no sabe nada en memoria; la marca guardada igual lo detiene
+        rollups._counted_through.clear()
+        self.check(0)
+        self.assertEqual(self.runtime(), 1)
+        self.check(1)
+        self.check(5)
+        self.assertEqual(self.runtime(), 3)
+
+    def test_overlapping_windows(self):
+        start = timezone.make_aware(timezone.datetime.combine(timezone.localdate(), timezone.datetime.min.time()))
+        for since, until in ((10, 20), (15, 25), (0, 5), (30, 31)):
+            self.post_json('/api/check-alarms/', {
+                'since': (start + timezone.timedelta(minutes=since)).isoformat(), 'until': (start + timezone.timedelta(minutes=until)).isoformat(),
+            })
+        # (10, 20] + (20, 25] + (30, 31]; the late (0, 5] is behind the mark / (10, 20] + (20, 25] + (30, 31]; el (0, 5] tardío queda detrás de la marca
+        self.assertEqual(self.runtime(), 10 + 5 + 1)
+
+    def test_future_minutes_are_not_counted(self):
+        future = self.now + timezone.timedelta(minutes=30)
+        self.post_json('/api/check-alarms/', {
+            'since': (self.now - timezone.timedelta(minutes=5)).isoformat(), 'until': future.isoformat(),
+        })
+        self.assertEqual(self.runtime(), 5)
+        # A client clock running ahead counts nothing, and the mark stays at the present / Un reloj de cliente adelantado no cuenta nada, y la marca queda en el presente
+        self.post_json('/api/check-alarms/', {'hour': 11, 'minute': 15, 'period': 'PM', 'day': 0})
+        self.assertEqual(self.runtime(), 5)
+        self.assertEqual(ClockStatistics.objects.get(date=timezone.localdate()).runtime_counted_through, 23 * 60)
+        # Once those minutes pass they are still counted / Cuando esos minutos pasan, igual se cuentan
+        with mock.patch('django.utils.timezone.now', return_value=future):
+            self.post_json('/api/check-alarms/', {'since': self.now.isoformat(), 'until': future.isoformat()})
+        self.assertEqual(self.runtime(), 5 + 30)
+
+    async def test_async_check_counts_runtime(self):
+        factory = AsyncRequestFactory()
+        for _ in range(2):
+            body = json.dumps({'hour': 8, 'minute': 0, 'period': 'AM', 'day': 0})
+            await views.acheck_alarms(factory.post('/api/check-alarms/', body, content_type='application/json'))
+        self.assertEqual(await sync_to_async(self.runtime)(), 1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AlarmIndexTests(HotPathTestCase):
+    """The index follows committed writes only / El índice sigue solo las escrituras confirmadas"""
+
+    def due_ids(self, hour=6, minute=0):
+        today = timezone.localdate()
+        return [entry.id for entry in alarm_index.due(hour, minute, 'AM', today.weekday(), today)]
+
+    def test_rolled_back_save_leaves_the_index_alone(self):
+        version = version_stamps.get_version(ALARMS_VERSION_NAME)
+        kept_id = self.alarms[0].id
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    alarm = Alarm.objects.create(title="Revertida", hour=6, minute=0, period='AM')
+                    Alarm.objects.get(id=kept_id).delete()
+                    raise RuntimeError("rollback")
+        self.assertEqual(version_stamps.get_version(ALARMS_VERSION_NAME), version)
+        self.assertTrue(alarm_index.is_current())
+        self.assertNotIn(alarm.id, self.due_ids())
+        self.assertIn(kept_id, self.due_ids(7, 5))
+
+    def test_committed_save_is_applied_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            alarm = Alarm.objects.create(title="Confirmada", hour=6, minute=0, period='AM')
+            self.assertNotIn(alarm.id, self.due_ids())
+            # Edits after save() but never saved stay out / Las ediciones tras save() que nunca se guardan quedan fuera
+            alarm.minute = 30
+        for callback in callbacks:
+            callback()
+        self.assertTrue(alarm_index.is_current())
+        self.assertIn(alarm.id, self.due_ids())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Alarm.objects.get(id=alarm.id).delete()
+        self.assertNotIn(alarm.id, self.due_ids())
+
+
+class SharedStateTests(HotPathTestCase):
+    """Seqlock segment shared by the workers / Segmento con seqlock compartido por los workers"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.state = SharedClockState(Path(directory.name) / 'state')
+
+    def test_round_trip_and_torn_write(self):
+        self.assertIsNone(self.state.read())
+        snapshot = self.state.snapshot_now(CircularClock(), 3, 4)
+        self.state.write(snapshot)
+        self.assertEqual(self.state.read(), snapshot)
+
+        # An odd sequence means a write in progress: readers never return a half-written body / Una secuencia impar indica una escritura en curso: los lectores nunca devuelven un cuerpo a medias
+        segment = self.state._attach()
+        segment[8:16] = (int.from_bytes(segment[8:16], 'little') + 1).to_bytes(8, 'little')
+        self.assertIsNone(self.state.read())
+        self.state.write(snapshot)
+        self.assertEqual(self.state.read(), snapshot)
+
+    def test_current_time_reads_the_segment_without_queries(self):
+        clock = CircularClock()
+        clock.change_format(True)
+        self.state.write(self.state.snapshot_now(clock, 3, 4))
+        with override_settings(CLOCK_SHARED_STATE={'ENABLED': True}), mock.patch('clock.shared_state._state', self.state):
+            with self.assertNumQueries(0):
+                data = self.client.get('/api/current-time/').json()
+        self.assertTrue(data['time']['format_24h'])
+        self.assertEqual(data['versions'], {'config': 3, 'alarms': 4})
+
+
+def _bump_many(name, times):
+    from .version_stamps import bump_version
+    return [bump_version(name) for _ in range(times)]
+
+
+class VersionStampTests(unittest.TestCase):
+    """Stamps never hand out the same value twice, even across processes / Las marcas nunca entregan el mismo valor dos veces, ni siquiera entre procesos"""
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "Needs fork / Requiere fork")
+    def test_concurrent_bumps_are_unique(self):
+        from .version_stamps import get_version
+
+        name = f'test-{os.getpid()}'
+        start = get_version(name)
+        with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context('fork')) as pool:
+            stamps = [stamp for result in pool.map(_bump_many, [name] * 4, [100] * 4) for stamp in result]
+        self.assertEqual(len(set(stamps)), 400)
+        self.assertEqual(get_version(name), start + 400)
+
+
+class DispatcherTests(HotPathTestCase):
+    """Server-side dispatch fires each occurrence once / El despacho en el servidor dispara cada ocurrencia una vez"""
+
+    def test_each_occurrence_fires_once(self):
+        now = timezone.now()
+        Alarm.objects.filter(id=self.alarms[0].id).update(next_fire_at=now)
+        Alarm.objects.filter(id=self.alarms[1].id).update(next_fire_at=now - timezone.timedelta(hours=1))
+        dispatcher = AlarmDispatcher()
+
+        dispatched = dispatcher.dispatch_due(now)
+        self.assertEqual(sorted(status for _, _, status in dispatched), ['missed', 'triggered'])
+        self.assertEqual(dispatcher.dispatch_due(now), [])
+        self.assertEqual(AlarmLog.objects.filter(alarm=self.alarms[0], status='triggered').count(), 1)
+        self.assertEqual(AlarmLog.objects.filter(alarm=self.alarms[1], status='missed').count(), 1)
+        self.assertGreater(Alarm.objects.get(id=self.alarms[0].id).next_fire_at, now)
+
+    def test_stale_node_loses_the_claim(self):
+        now = timezone.now()
+        Alarm.objects.filter(id=self.alarms[0].id).update(next_fire_at=now)
+        first, second = AlarmDispatcher(node_id='a'), AlarmDispatcher(node_id='b')
+        # Both nodes read the row before either commits / Ambos nodos leen la fila antes de que alguno confirme
+        seen_first, seen_second = first.select_due(now), second.select_due(now)
+
+        self.assertEqual(len(first.dispatch(seen_first, now)), 1)
+        self.assertEqual(second.dispatch(seen_second, now), [])
+        self.assertEqual(AlarmLog.objects.filter(alarm=self.alarms[0]).count(), 1)
+        self.assertEqual(AlarmOccurrence.objects.get(alarm=self.alarms[0]).claimed_by, 'a#1')
+
+    def test_burst_larger_than_one_page_is_delivered(self):
+        now = timezone.now()
+        Alarm.objects.bulk_create([Alarm(title=f"Ráfaga {i}", hour=7, minute=5, period='AM', next_fire_at=now) for i in range(150)])
+        self.assertEqual(len(AlarmDispatcher().dispatch_due(now)), 150)
+
+        with mock.patch.object(views, 'EVENT_STREAM_SECONDS', 0.5):
+            body = b''.join(self.client.get('/api/alarms/events/?after=0').streaming_content).decode()
+        self.assertEqual(body.count('event: alarm'), 150)
+
+        window = {'since': (now - timezone.timedelta(seconds=30)).isoformat(), 'until': (now + timezone.timedelta(seconds=1)).isoformat()}
+        with override_settings(CLOCK_SERVER_DISPATCH=True):
+            self.assertEqual(len(self.post_json('/api/check-alarms/', window).json()['triggered_alarms']), 150)
+
+    def test_events_are_readable_with_the_log_buffer_on(self):
+        now = timezone.now()
+        Alarm.objects.filter(id=self.alarms[0].id).update(next_fire_at=now)
+        buffer = AlarmLogBuffer()
+        with mock.patch('clock.alarm_events.get_log_buffer', return_value=buffer):
+            with self.captureOnCommitCallbacks(execute=True):
+                AlarmDispatcher().dispatch_due(now)
+            self.assertEqual(buffer.pending_count(), 0)
+            with mock.patch.object(views, 'EVENT_STREAM_SECONDS', 0.5):
+                body = b''.join(self.client.get('/api/alarms/events/?after=0').streaming_content).decode()
+            window = {'since': (now - timezone.timedelta(seconds=30)).isoformat(), 'until': (now + timezone.timedelta(seconds=1)).isoformat()}
+            with override_settings(CLOCK_SERVER_DISPATCH=True):
+                fired = self.post_json('/api/check-alarms/', window).json()['triggered_alarms']
+        self.assertEqual(body.count('event: alarm'), 1)
+        self.assertEqual([event['id'] for event in fired], [self.alarms[0].id])
+
+    def test_check_alarms_reads_dispatched_events(self):
+        now = timezone.now()
+        Alarm.objects.filter(id=self.alarms[0].id).update(next_fire_at=now)
+        AlarmDispatcher().dispatch_due(now)
+        window = {'since': (now - timezone.timedelta(seconds=30)).isoformat(), 'until': (now + timezone.timedelta(seconds=1)).isoformat()}
+        with override_settings(CLOCK_SERVER_DISPATCH=True):
+            first = self.post_json('/api/check-alarms/', window).json()
+            again = self.post_json('/api/check-alarms/', window).json()
+        self.assertEqual([event['id'] for event in first['triggered_alarms']], [self.alarms[0].id])
+        # Reading never fires: the same window returns the same single event / Leer nunca dispara: la misma ventana devuelve el mismo único evento
+        self.assertEqual(first, again)
+        self.assertEqual(AlarmLog.objects.filter(status='triggered').count(), 1)
+
+
+class NextFireAtTests(HotPathTestCase):
+    """next_fire_at follows every write path / next_fire_at sigue cada ruta de escritura"""
+
+    def stored(self, alarm):
+        return Alarm.objects.get(id=alarm.id).next_fire_at
+
+    def test_save_recomputes(self):
+        now = timezone.now()
+        alarm = Alarm.objects.create(title="Guardada", hour=6, minute=0, period='PM', day_of_week=4)
+        self.assertEqual(self.stored(alarm), next_occurrence(alarm, now))
+        self.assertEqual(timezone.localtime(self.stored(alarm)).weekday(), 4)
+
+        # update_fields still writes the derived columns / update_fields igual escribe las columnas derivadas
+        alarm.minute, alarm.day_of_week = 45, None
+        alarm.save(update_fields=['minute', 'day_of_week'])
+        self.assertEqual(timezone.localtime(self.stored(alarm)).strftime('%H:%M'), '18:45')
+        self.assertEqual(Alarm.objects.get(id=alarm.id).weekday_mask, 0b1111111)
+
+        alarm.is_active = False
+        alarm.save()
+        self.assertIsNone(self.stored(alarm))
+
+    def test_silence_and_pending_snooze(self):
+        now = timezone.now()
+        alarm = self.alarms[0]
+        alarm.silenced_until = now + timezone.timedelta(days=2)
+        alarm.save()
+        self.assertEqual(self.stored(alarm), next_occurrence(alarm, alarm.silenced_until))
+
+        alarm.silenced_until = None
+        alarm.snoozed_until = (now + timezone.timedelta(minutes=3)).replace(microsecond=0)
+        alarm.save()
+        self.assertEqual(self.stored(alarm), alarm.snoozed_until)
+
+    def test_views_and_bulk_paths(self):
+        alarm = self.alarms[0]
+        self.post_json(f'/api/alarms/{alarm.id}/toggle/', {})
+        self.assertIsNone(self.stored(alarm))
+        self.post_json(f'/api/alarms/{alarm.id}/toggle/', {})
+        self.assertEqual(self.stored(alarm), next_occurrence(alarm, timezone.now()))
+
+        # Firing moves every alarm past the fired occurrence, in one UPDATE for the shared value / Disparar mueve cada alarma tras la ocurrencia disparada, con un UPDATE para el valor compartido
+        now = self.stored(alarm)
+        with self.assertNumQueries(1):
+            alarm_events.write_next_fire_at([(each.id, next_occurrence(each, now)) for each in self.alarms])
+        fire_alarms(self.alarms, now=now)
+        for each in self.alarms:
+            self.assertEqual(self.stored(each), next_occurrence(each, now))
+            self.assertGreater(self.stored(each), now)
+        self.assertFalse(Alarm.objects.due(now).exists())
+        self.assertLessEqual({each.id for each in self.alarms}, set(Alarm.objects.due(now + timezone.timedelta(days=1)).values_list('id', flat=True)))
+
+    def test_many_distinct_values_use_executemany(self):
+        now = timezone.now()
+        Alarm.objects.bulk_create([Alarm(title=f"Dispersa {i}", hour=i % 12 + 1, minute=i % 60, period='AM') for i in range(200)])
+        alarms = list(Alarm.objects.filter(title__startswith='Dispersa'))
+        pairs = [(alarm.id, now + timezone.timedelta(minutes=i)) for i, alarm in enumerate(alarms)]
+        # updates + one executemany / updates + un executemany
+        with self.assertNumQueries(2):
+            alarm_events.write_next_fire_at(pairs, updated_at=now)
+        self.assertEqual(dict(Alarm.objects.filter(title__startswith='Dispersa').values_list('id', 'next_fire_at')), dict(pairs))
+
+
+class FireAlarmsTests(HotPathTestCase):
+    """One batch updates every counter, log and rollup together / Un lote actualiza juntos cada contador, registro y acumulado"""
+
+    def triggered_today(self):
+        return ClockStatistics.objects.get(date=timezone.localdate()).alarms_triggered
+
+    def test_counters_logs_and_rollup(self):
+        now = timezone.now()
+        scheduled = now.replace(second=0, microsecond=0)
+        fire_alarms(self.alarms, now=now, scheduled_at={self.alarms[0].id: scheduled})
+        fire_alarms(self.alarms[:1], now=now + timezone.timedelta(minutes=1))
+
+        counters = dict(Alarm.objects.filter(id__in=[alarm.id for alarm in self.alarms]).values_list('id', 'times_triggered'))
+        self.assertEqual(counters, {self.alarms[0].id: 2, self.alarms[1].id: 1, self.alarms[2].id: 1})
+        self.assertEqual(Alarm.objects.get(id=self.alarms[1].id).last_triggered, now)
+        self.assertEqual(Alarm.objects.get(id=self.alarms[0].id).last_triggered, now + timezone.timedelta(minutes=1))
+        self.assertEqual(self.triggered_today(), 4)
+
+        logs = AlarmLog.objects.filter(status='triggered')
+        self.assertEqual(logs.count(), 4)
+        self.assertEqual(logs.filter(scheduled_at=scheduled).get().alarm_id, self.alarms[0].id)
+        self.assertEqual(set(logs.values_list('alarm_title', flat=True)), {alarm.title for alarm in self.alarms})
+
+    def test_batch_is_all_or_nothing(self):
+        with mock.patch('clock.alarm_events.write_logs', side_effect=DatabaseError("disco lleno")):
+            with self.assertRaises(DatabaseError):
+                fire_alarms(self.alarms)
+        self.assertFalse(Alarm.objects.filter(times_triggered__gt=0).exists())
+        self.assertEqual(self.triggered_today(), 0)
+
+    def test_repeated_rollups_of_a_day(self):
+        yesterday = timezone.now() - timezone.timedelta(days=1)
+        fire_alarms(self.alarms[:2], now=yesterday)
+        fire_alarms(self.alarms[2:], now=yesterday)
+        self.assertEqual(ClockStatistics.objects.get(date=timezone.localdate(yesterday)).alarms_triggered, 3)
+        self.assertEqual(self.triggered_today(), 0)
+
+
+class CatchUpWindowTests(HotPathTestCase):
+    """A client back from sleep gets each occurrence of the last MAX_CATCHUP_WINDOW once / Un cliente que vuelve de suspensión recibe una vez cada ocurrencia de la última MAX_CATCHUP_WINDOW"""
+
+    def at(self, days=0, hours=0, minutes=0):
+        # Monday 2026-10-19 00:00 in Bogotá / Lunes 2026-10-19 00:00 en Bogotá
+        return timezone.make_aware(timezone.datetime(2026, 10, 19)) + timezone.timedelta(days=days, hours=hours, minutes=minutes)
+
+    def test_segments(self):
+        monday, sunday = self.at().date(), self.at(days=-1).date()
+        # since is exclusive, until inclusive, split at local midnight / since es exclusivo, until inclusivo, partido en la medianoche local
+        self.assertEqual(window_segments(self.at(minutes=-10), self.at(minutes=10)), [(sunday, 1431, 1439), (monday, 0, 10)])
+        self.assertEqual(window_segments(None, self.at(hours=7, minutes=5)), [(monday, 425, 425)])
+        self.assertEqual(window_segments(self.at(minutes=5), self.at(minutes=5)), [])
+
+    def test_window_is_capped(self):
+        segments = window_segments(self.at(days=-3), self.at(hours=7, minutes=10))
+        self.assertEqual(sum(last - first + 1 for _, first, last in segments), MAX_CATCHUP_WINDOW // timezone.timedelta(minutes=1))
+        self.assertEqual(segments[0], (self.at(days=-1).date(), 431, 1439))
+
+    def test_long_sleep_fires_each_alarm_once(self):
+        window = {'since': self.at(days=-3).isoformat(), 'until': self.at(hours=7, minutes=10).isoformat()}
+        fired = self.post_json('/api/check-alarms/', window).json()['triggered_alarms']
+        # Three days asleep, but only Monday 07:05 is inside the cap / Tres días dormido, pero solo el lunes 07:05 está dentro del límite
+        self.assertEqual(sorted(entry['id'] for entry in fired), sorted(alarm.id for alarm in self.alarms))
+        self.assertEqual({entry['scheduled_at'] for entry in fired}, {self.at(hours=7, minutes=5).isoformat()})
+        self.assertEqual(AlarmLog.objects.filter(status='triggered').count(), 3)
+
+        # The next window starts where this one ended / La siguiente ventana empieza donde terminó esta
+        window = {'since': window['until'], 'until': self.at(hours=7, minutes=20).isoformat()}
+        self.assertFalse(self.post_json('/api/check-alarms/', window).json()['alarm_triggered'])
+
+    def test_window_across_midnight(self):
+        Alarm.objects.create(title="Medianoche", hour=12, minute=0, period='AM')
+        alarm_index.invalidate()
+        window = {'since': self.at(minutes=-10).isoformat(), 'until': self.at(minutes=10).isoformat()}
+        fired = self.post_json('/api/check-alarms/', window).json()['triggered_alarms']
+        self.assertEqual([(entry['title'], entry['scheduled_at']) for entry in fired], [("Medianoche", self.at().isoformat())])
+
+
+class BackfillTests(HotPathTestCase):
+    """Occurrences that passed during downtime are logged as missed once / Las ocurrencias que pasaron durante una inactividad se registran como perdidas una vez"""
+
+    def test_each_missed_day_is_logged_once(self):
+        until = timezone.now()
+        alarm = self.alarms[0]
+        Alarm.objects.filter(id=alarm.id).update(next_fire_at=next_occurrence(alarm, until - timezone.timedelta(days=3)))
+
+        self.assertEqual(backfill_missed(until=until), (1, 3))
+        self.assertEqual(backfill_missed(until=until), (0, 0))
+        logged = AlarmLog.objects.filter(alarm=alarm, status='missed').values_list('triggered_at', flat=True)
+        self.assertEqual({timezone.localtime(moment).strftime('%H:%M:%S') for moment in logged}, {'07:05:00'})
+        self.assertEqual(Alarm.objects.get(id=alarm.id).next_fire_at, next_occurrence(alarm, until))
+
+
+class SnoozeTests(HotPathTestCase):
+    """Snoozes re-fire once at their exact time, within the snooze limit / Los snoozes vuelven a sonar una vez a su hora exacta, dentro del límite"""
+
+    def test_refire_and_limit(self):
+        alarm = self.alarms[0]
+        rang_at = timezone.now() - timezone.timedelta(minutes=alarm.snooze_duration)
+        Alarm.objects.filter(id=alarm.id).update(max_snooze_count=2, last_triggered=rang_at)
+        snoozed, refused = snooze_alarms([alarm.id], now=rang_at)
+        refire_at = snoozed[0].snoozed_until
+        self.assertEqual(refused, [])
+        self.assertEqual(Alarm.objects.get(id=alarm.id).next_fire_at, refire_at)
+
+        now = timezone.now()
+        window = {'since': (now - timezone.timedelta(seconds=30)).isoformat(), 'until': now.isoformat()}
+        fired = self.post_json('/api/check-alarms/', window).json()
+        self.assertEqual([(entry['id'], entry['scheduled_at']) for entry in fired['triggered_alarms']], [(alarm.id, refire_at.isoformat())])
+        self.assertFalse(self.post_json('/api/check-alarms/', window).json()['alarm_triggered'])
+        # A re-fire keeps counting toward the limit / Un re-disparo sigue contando para el límite
+        self.assertEqual(Alarm.objects.get(id=alarm.id).snooze_count, 1)
+
+        self.assertTrue(self.post_json('/api/alarms/snooze/', {'alarm_id': alarm.id}).json()['success'])
+        self.assertFalse(self.post_json('/api/alarms/snooze/', {'alarm_id': alarm.id}).json()['success'])
+        self.assertEqual(AlarmLog.objects.filter(alarm=alarm, status='snoozed').count(), 2)
+
+    def test_only_ringing_alarms_can_be_snoozed(self):
+        now = timezone.now()
+        never, stale, ringing = self.alarms
+        Alarm.objects.filter(id=stale.id).update(last_triggered=now - timezone.timedelta(hours=2))
+        Alarm.objects.filter(id=ringing.id).update(last_triggered=now - timezone.timedelta(minutes=1))
+
+        snoozed, refused = snooze_alarms([never.id, stale.id, ringing.id], now=now)
+        self.assertEqual([alarm.id for alarm in snoozed], [ringing.id])
+        self.assertEqual(refused, sorted([never.id, stale.id]))
+
+        # A pending snooze cannot be pushed further out / Un snooze pendiente no se puede aplazar más
+        snoozed, refused = snooze_alarms([ringing.id], now=now + timezone.timedelta(minutes=1))
+        self.assertEqual((snoozed, refused), ([], [ringing.id]))
+        self.assertEqual(Alarm.objects.get(id=ringing.id).snooze_count, 1)
+        self.assertEqual(AlarmLog.objects.filter(status='snoozed').count(), 1)
+
+
+class LatencyTests(HotPathTestCase):
+    """Firing lag and response time are logged and summarized per day / El retraso de disparo y el tiempo de respuesta se registran y resumen por día"""
+
+    def test_fire_lag_and_response_time(self):
+        alarm = self.alarms[0]
+        now = timezone.now()
+        Alarm.objects.filter(id=alarm.id).update(next_fire_at=now - timezone.timedelta(seconds=2))
+        AlarmDispatcher().dispatch_due(now)
+        Alarm.objects.filter(id=alarm.id).update(last_triggered=timezone.now() - timezone.timedelta(seconds=30))
+        self.post_json('/api/alarms/dismiss/', {'alarm_id': alarm.id, 'silence_minutes': 10})
+
+        dismissed = AlarmLog.objects.get(alarm=alarm, status='dismissed')
+        self.assertAlmostEqual(dismissed.response_time.total_seconds(), 30, delta=5)
+        today = self.client.get('/api/statistics/latency/?days=2').json()['days'][-1]
+        self.assertEqual(today['date'], timezone.localdate().isoformat())
+        self.assertEqual((today['fire_lag']['count'], today['fire_lag']['p50'], today['fire_lag']['p99']), (1, 2.0, 2.0))
+        self.assertEqual(today['response_time']['count'], 1)
+
+    def test_pages_split_days_like_one_read(self):
+        first_day = timezone.localdate() - timezone.timedelta(days=2)
+        start, _ = local_day_bounds(first_day)
+        # Rows sharing an instant and days crossing page boundaries / Filas que comparten un instante y días que cruzan los límites de página
+        AlarmLog.objects.bulk_create([
+            AlarmLog(
+                alarm_title='Lento', status='triggered', triggered_at=start + timezone.timedelta(hours=hours, seconds=lag),
+                scheduled_at=start + timezone.timedelta(hours=hours),
+            )
+            for hours, lag in ((1, 1), (1, 1), (2, 3), (23, 5), (25, 2), (25, 2), (26, 4), (49, 7))
+        ] + [
+            AlarmLog(alarm_title='Lento', status='dismissed', triggered_at=start + timezone.timedelta(hours=hours), response_time=timezone.timedelta(seconds=seconds))
+            for hours, seconds in ((3, 10), (27, 20), (28, 40))
+        ])
+        expected = latency.daily_latency(first_day, timezone.localdate())
+        self.assertEqual([(day['fire_lag']['count'], day['response_time']['count']) for day in expected], [(4, 1), (3, 2), (1, 0)])
+        self.assertEqual(expected[1]['fire_lag']['p50'], 2.0)
+        for chunk_size in (1, 2, 3):
+            self.assertEqual(latency.daily_latency(first_day, timezone.localdate(), chunk_size=chunk_size), expected)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TimeSeriesTests(TestCase):
+    """Cached closed buckets follow rows that arrive late / Los intervalos cerrados en caché siguen a las filas que llegan tarde"""
+
+    def setUp(self):
+        cache.clear()
+        self.start, self.end = local_day_bounds(timezone.localdate() - timezone.timedelta(days=1))
+
+    def triggered(self):
+        return timeseries.build_series(self.start, self.end, 'day')['values'][0][0]
+
+    def late_log(self):
+        return AlarmLog(alarm_title='Tarde', status='triggered', triggered_at=self.start + timezone.timedelta(hours=3))
+
+    def test_closed_buckets_are_cached(self):
+        AlarmLog.objects.create(alarm_title='A tiempo', status='triggered', triggered_at=self.start + timezone.timedelta(hours=1))
+        self.assertEqual(self.triggered(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.triggered(), 1)
+
+    def test_late_insert_after_caching(self):
+        self.assertEqual(self.triggered(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            write_logs([self.late_log()])
+        self.assertEqual(self.triggered(), 1)
+
+    def test_late_buffer_flush_after_caching(self):
+        buffer = AlarmLogBuffer()
+        buffer.add([self.late_log()])
+        self.assertEqual(self.triggered(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.triggered(), 1)
+
+    def test_backfill_after_caching(self):
+        alarm = Alarm.objects.create(title="Perdida", hour=3, minute=0, period='AM', repeat_daily=True)
+        Alarm.objects.filter(id=alarm.id).update(next_fire_at=next_occurrence(alarm, self.start))
+        self.assertEqual(timeseries.build_series(self.start, self.end, 'day')['values'][0][2], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            backfill_missed(until=self.end)
+        self.assertEqual(timeseries.build_series(self.start, self.end, 'day')['values'][0][2], 1)
+
+
+class HeatmapTests(TestCase):
+    """Each event lands in its local hour and weekday cell / Cada evento cae en su celda de hora y día local"""
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        settings_override = override_settings(CLOCK_ARCHIVE_DIR=Path(scratch.name))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # Monday 2026-10-12 in Bogotá (UTC-5) / Lunes 2026-10-12 en Bogotá (UTC-5)
+        self.monday = timezone.make_aware(timezone.datetime(2026, 10, 12))
+        AlarmLog.objects.bulk_create(
+            # 23:30 on Monday is already Tuesday in UTC / Las 23:30 del lunes ya son martes en UTC
+            [AlarmLog(alarm_title='Noche', status='triggered', triggered_at=self.monday + timezone.timedelta(hours=23, minutes=30))]
+            + [AlarmLog(alarm_title='Mañana', status='triggered', triggered_at=self.monday + timezone.timedelta(days=6, hours=7, seconds=i))
+               for i in range(5)]
+            + [AlarmLog(alarm_title='Perdida', status='missed', triggered_at=self.monday + timezone.timedelta(hours=7))]
+        )
+
+    def test_cells(self):
+        for chunk_size in (2, 20_000):
+            with self.subTest(chunk_size=chunk_size):
+                matrix = trigger_heatmap(chunk_size=chunk_size)
+                self.assertEqual((matrix[23, 0], matrix[7, 6], int(matrix.sum())), (1, 5, 6))
+        missed = trigger_heatmap(status='missed')
+        self.assertEqual((missed[7, 0], int(missed.sum())), (1, 1))
+
+    def test_bounds_and_endpoint(self):
+        sunday = self.monday + timezone.timedelta(days=6)
+        self.assertEqual(int(trigger_heatmap(self.monday, sunday).sum()), 1)
+        self.assertEqual(int(trigger_heatmap(sunday).sum()), 5)
+
+        response = self.client.get('/api/statistics/heatmap/', {'from': sunday.isoformat()}).json()
+        self.assertEqual((response['matrix'][7][6], response['total'], response['max']), (5, 5, 5))
+        self.assertFalse(self.client.get('/api/statistics/heatmap/', {'status': 'otro'}).json()['success'])
+        self.assertFalse(self.client.get('/api/statistics/heatmap/', {'from': 'ayer'}).json()['success'])
+
+
+class ExportTests(TestCase):
+    """Exports stream every row in the range once, in order / Las exportaciones transmiten cada fila del rango una vez, en orden"""
+
+    def setUp(self):
+        self.start = timezone.now().replace(microsecond=0) - timezone.timedelta(days=1)
+        # Rows sharing an instant cross page boundaries by id / Filas que comparten un instante cruzan los límites de página por id
+        AlarmLog.objects.bulk_create(
+            AlarmLog(alarm_title=f'Fila, "{i}"', status='dismissed', triggered_at=self.start + timezone.timedelta(minutes=i // 3),
+                     response_time=timezone.timedelta(seconds=i), scheduled_at=self.start if i == 0 else None)
+            for i in range(12)
+        )
+        self.ids = list(AlarmLog.objects.order_by('triggered_at', 'id').values_list('id', flat=True))
+
+    def export(self, **params):
+        response = self.client.get('/api/logs/export/', params)
+        body = b''.join(response.streaming_content)
+        if params.get('gzip'):
+            self.assertEqual(response['Content-Type'], 'application/gzip')
+            body = gzip.decompress(body)
+        return response, body.decode('utf-8')
+
+    def test_csv(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="alarm_logs.csv"')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([int(row['id']) for row in rows], self.ids)
+        self.assertEqual((rows[0]['alarm_title'], rows[0]['response_time'], rows[0]['alarm_id']), ('Fila, "0"', '0.0', ''))
+        self.assertEqual(rows[0]['scheduled_at'], self.start.isoformat())
+
+    def test_ndjson_gzip_and_bounds(self):
+        _, body = self.export(format='jsonl', gzip='1')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], self.ids)
+        self.assertEqual(rows[11]['response_time'], 11.0)
+
+        # from is inclusive and to exclusive / from es inclusivo y to exclusivo
+        _, body = self.export(format='jsonl', **{
+            'from': (self.start + timezone.timedelta(minutes=1)).isoformat(), 'to': (self.start + timezone.timedelta(minutes=3)).isoformat(),
+        })
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], self.ids[3:9])
+
+    def test_pages_and_gzip_stream(self):
+        self.assertEqual([row[0] for row in exports.iter_log_rows(chunk_size=2)], self.ids)
+        self.assertEqual([row[0] for row in exports.iter_log_rows(chunk_size=3)], self.ids)
+        lines = list(exports.jsonl_lines(exports.iter_log_rows()))
+        self.assertEqual(gzip.decompress(b''.join(exports.gzip_stream(iter(lines), flush_bytes=100))).decode('utf-8'), ''.join(lines))
+
+    def test_invalid_parameters(self):
+        for params in ({'format': 'xml'}, {'from': 'ayer'}):
+            with self.subTest(params=params):
+                self.assertFalse(self.client.get('/api/logs/export/', params).json()['success'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LogBufferTests(TestCase):
+    """A bad row cannot hold the buffer forever / Una fila mala no puede retener el búfer para siempre"""
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.dead_letter = Path(scratch.name) / 'dead_letter_logs.jsonl'
+        self.buffer = AlarmLogBuffer(max_queue=5, max_retries=2, dead_letter_path=self.dead_letter)
+
+    def logs(self, count, title='Registro'):
+        return [AlarmLog(alarm_title=f'{title} {i}', status='triggered') for i in range(count)]
+
+    def dead_lettered(self):
+        return [json.loads(line)['alarm_title'] for line in self.dead_letter.read_text(encoding='utf-8').splitlines()]
+
+    def test_bad_row_is_dead_lettered_after_retries(self):
+        real_bulk_create = AlarmLog.objects.bulk_create
+
+        def reject_bad_rows(objs, *args, **kwargs):
+            if any(log.alarm_title == 'Mala 0' for log in objs):
+                raise DatabaseError("rechazada")
+            return real_bulk_create(objs, *args, **kwargs)
+
+        self.buffer.add(self.logs(3) + self.logs(1, 'Mala'))
+        with mock.patch.object(AlarmLog.objects, 'bulk_create', side_effect=reject_bad_rows):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+            # The first failure keeps every row queued for the next flush / El primer fallo deja todas las filas en cola para el siguiente volcado
+            self.assertEqual(len(self.buffer._pending), 4)
+            self.assertEqual(self.buffer.flush(), 3)
+
+        self.assertEqual(self.buffer._pending, [])
+        self.assertEqual(AlarmLog.objects.count(), 3)
+        self.assertEqual(self.dead_lettered(), ['Mala 0'])
+        # Later rows go through in one batch again / Las filas posteriores vuelven a pasar en un solo lote
+        self.buffer.add(self.logs(2, 'Luego'))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 2)
+
+    def test_log_of_deleted_alarm_is_kept_without_alarm(self):
+        alarm = Alarm.objects.create(title="Borrada", hour=7, minute=0, period='AM')
+        self.buffer.add([AlarmLog(alarm_id=alarm.id, alarm_title=alarm.title, status='triggered')])
+        alarm.delete()
+        self.assertEqual(self.buffer._write_one_by_one(list(self.buffer._pending)), self.buffer._pending)
+        log = AlarmLog.objects.get()
+        self.assertEqual((log.alarm_id, log.alarm_title), (None, 'Borrada'))
+
+    def test_rolled_back_logs_are_never_queued(self):
+        alarm = Alarm.objects.create(title="Revertida", hour=7, minute=0, period='AM')
+        with mock.patch('clock.alarm_events.get_log_buffer', return_value=self.buffer):
+            with mock.patch('clock.rollups.increment', side_effect=DatabaseError("caída")):
+                with self.captureOnCommitCallbacks(execute=True):
+                    with self.assertRaises(DatabaseError):
+                        fire_alarms([alarm])
+            self.assertEqual(self.buffer.pending_count(), 0)
+            self.assertEqual(self.buffer.flush(), 0)
+            self.assertEqual((Alarm.objects.get(id=alarm.id).times_triggered, AlarmLog.objects.count()), (0, 0))
+
+            # The same call that commits queues its log / La misma llamada que se confirma encola su registro
+            with self.captureOnCommitCallbacks(execute=True):
+                fire_alarms([alarm])
+            self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(AlarmLog.objects.get().alarm_id, alarm.id)
+
+    def test_queue_is_bounded(self):
+        self.buffer.add(self.logs(4, 'Vieja'))
+        self.buffer.add(self.logs(3, 'Nueva'))
+        self.assertEqual([log.alarm_title for log in self.buffer._pending], ['Vieja 2', 'Vieja 3', 'Nueva 0', 'Nueva 1', 'Nueva 2'])
+        self.assertEqual(self.dead_lettered(), ['Vieja 0', 'Vieja 1'])
+        self.assertEqual(self.buffer.dead_lettered, 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LogArchiveTests(TestCase):
+    """Archived logs keep counting exactly once in every report / Los registros archivados siguen contando exactamente una vez en cada reporte"""
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        settings_override = override_settings(CLOCK_ARCHIVE_DIR=Path(scratch.name))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.day = timezone.localdate() - timezone.timedelta(days=100)
+        self.start, self.end = local_day_bounds(self.day)
+        at = self.start + timezone.timedelta(hours=7, minutes=5)
+        AlarmLog.objects.bulk_create(
+            [AlarmLog(alarm_title='Vieja', status='triggered', triggered_at=at + timezone.timedelta(seconds=i)) for i in range(3)]
+            + [AlarmLog(alarm_title='Vieja', status='missed', triggered_at=at)]
+        )
+
+    def reports(self):
+        """(series values, heatmap total, rebuilt daily count) for the old day / (valores de la serie, total del mapa de calor, conteo diario reconstruido) del día antiguo"""
+        cache.clear()
+        series = timeseries.build_series(self.start, self.end, 'day')['values']
+        heatmap = trigger_heatmap(self.start, self.end)
+        call_command('rebuild_statistics', stdout=io.StringIO())
+        return series, int(heatmap.sum()), ClockStatistics.objects.get(date=self.day).alarms_triggered
+
+    def test_round_trip(self):
+        before = self.reports()
+        self.assertEqual(before, ([[3, 0, 1]], 3, 3))
+
+        call_command('prune_alarm_logs', days=90, stdout=io.StringIO())
+        self.assertFalse(AlarmLog.objects.filter(triggered_at__lt=self.end).exists())
+        self.assertEqual(self.reports(), before)
+
+    def test_crash_between_append_and_delete(self):
+        before = self.reports()
+        with mock.patch('clock.log_archive._finish_batch', side_effect=RuntimeError("crash")):
+            with self.assertRaises(RuntimeError):
+                log_archive.archive_logs(self.end)
+        # The batch is in the files and still in the table / El lote está en los archivos y aún en la tabla
+        self.assertEqual(AlarmLog.objects.count(), 4)
+        self.assertEqual(self.reports(), before)
+
+        # Crash after the delete committed, before the manifest was saved / Fallo después de confirmar el borrado, antes de guardar el manifiesto
+        AlarmLog.objects.all().delete()
+        self.assertEqual(self.reports(), before)
+
+        self.assertEqual(log_archive.archive_logs(self.end), 0)
+        self.assertIsNone(log_archive.load_manifest()['pending'])
+        self.assertEqual(self.reports(), before)
+
+
+class BulkAlarmTests(HotPathTestCase):
+    """Bulk import and batch actions write in a fixed number of queries / La importación en bloque y las acciones por lote escriben en un número fijo de consultas"""
+
+    def import_rows(self, count):
+        return [{'label': f'Importada {i}', 'hour': i % 12 + 1, 'minute': i % 60, 'period': 'PM', 'day_of_week': i % 7} for i in range(count)]
+
+    def test_import_queries_do_not_grow_with_rows(self):
+        for count in (10, 2000):
+            before = Alarm.objects.count()
+            # Savepoint, one executemany, release / Savepoint, un executemany, liberación
+            with self.assertNumQueries(3):
+                response = self.post_json('/api/alarms/bulk/', {'alarms': self.import_rows(count)}).json()
+            self.assertEqual(response['created'], count)
+            self.assertEqual(Alarm.objects.count(), before + count)
+
+        now = timezone.now()
+        for alarm in Alarm.objects.filter(title__startswith='Importada')[:50]:
+            self.assertEqual(alarm.weekday_mask, 1 << alarm.day_of_week)
+            self.assertEqual(alarm.next_fire_at, next_occurrence(alarm, now))
+            self.assertIsNotNone(alarm.created_at)
+
+    def test_import_csv(self):
+        body = "label,hour,minute,period,day_of_week\nCSV,6,15,AM,\n"
+        response = self.client.post('/api/alarms/bulk/', body, content_type='text/csv').json()
+        self.assertEqual(response['created'], 1)
+        alarm = Alarm.objects.get(title='CSV')
+        self.assertEqual((alarm.hour, alarm.minute, alarm.weekday_mask), (6, 15, 0b1111111))
+
+    def test_import_is_all_or_nothing(self):
+        before = Alarm.objects.count()
+        rows = self.import_rows(3) + [{'hour': 13}, 'fila', {'hour': 'x'}, {'period': 'XM'}]
+        response = self.post_json('/api/alarms/bulk/', rows).json()
+        self.assertFalse(response['success'])
+        self.assertEqual(response['error_count'], 4)
+        self.assertEqual([error['row'] for error in response['errors']], [4, 5, 6, 7])
+        self.assertEqual(Alarm.objects.count(), before)
+
+        self.assertFalse(self.post_json('/api/alarms/bulk/', []).json()['success'])
+        with mock.patch.object(views, 'BULK_IMPORT_LIMIT', 2):
+            self.assertFalse(self.post_json('/api/alarms/bulk/', self.import_rows(3)).json()['success'])
+        response = self.client.post('/api/alarms/bulk/', '{no es json', content_type='application/json').json()
+        self.assertTrue(response['error'].startswith('Formato inválido'))
+
+    def test_batch_actions(self):
+        ids = [alarm.id for alarm in self.alarms]
+        response = self.post_json('/api/alarms/batch/', {'action': 'deactivate', 'ids': ids}).json()
+        self.assertEqual(response['affected'], 3)
+        self.assertFalse(Alarm.objects.filter(id__in=ids, next_fire_at__isnull=False).exists())
+
+        with self.assertNumQueries(5):
+            self.post_json('/api/alarms/batch/', {'action': 'toggle', 'ids': ids[:2]})
+        now = timezone.now()
+        for alarm in Alarm.objects.filter(id__in=ids[:2]):
+            self.assertTrue(alarm.is_active)
+            self.assertEqual(alarm.next_fire_at, next_occurrence(alarm, now))
+
+        self.post_json('/api/alarms/batch/', {'action': 'activate', 'ids': ids})
+        self.assertEqual(Alarm.objects.filter(id__in=ids, is_active=True, next_fire_at__isnull=False).count(), 3)
+
+        AlarmLog.objects.create(alarm=self.alarms[0], alarm_title=self.alarms[0].title, status='triggered')
+        AlarmOccurrence.objects.create(alarm=self.alarms[1], occurrence_at=now, claimed_by='prueba')
+        Alarm.objects.bulk_create([Alarm(title=f"Borrar {i}", hour=6, minute=0, period='AM') for i in range(500)])
+        ids += list(Alarm.objects.filter(title__startswith='Borrar').values_list('id', flat=True))
+        with mock.patch('clock.alarm_index.bump_version', wraps=version_stamps.bump_version) as bumps:
+            # savepoint + unlink logs + delete claims + delete alarms + release / savepoint + desvincular registros + borrar reclamos + borrar alarmas + release
+            with self.assertNumQueries(5):
+                response = self.post_json('/api/alarms/batch/', {'action': 'delete', 'ids': ids}).json()
+        self.assertEqual(response['affected'], 503)
+        self.assertEqual(bumps.call_count, 1)
+        self.assertEqual(AlarmLog.objects.get().alarm_id, None)
+        self.assertFalse(AlarmOccurrence.objects.exists())
+        self.assertEqual(Alarm.objects.count(), 1)
+
+    def test_batch_validation(self):
+        for body in ({'action': 'explode', 'ids': [1]}, {'action': 'delete', 'ids': []}, {'action': 'delete', 'ids': ['x']}):
+            with self.subTest(body=body):
+                self.assertFalse(self.post_json('/api/alarms/batch/', body).json()['success'])
+        self.assertEqual(Alarm.objects.count(), 4)
+
+
+class PaginationTests(HotPathTestCase):
+    """Keyset pages of /api/logs/ and /api/alarms/list/ / Páginas por claves de /api/logs/ y /api/alarms/list/"""
+
+    def setUp(self):
+        super().setUp()
+        at = timezone.now().replace(microsecond=0)
+        AlarmLog.objects.bulk_create(
+            # Two rows share each instant, so the id breaks the tie / Dos filas comparten cada instante, así que el id desempata
+            AlarmLog(alarm=self.alarms[0], alarm_title='Pagina', status='dismissed' if i % 5 == 0 else 'triggered',
+                     triggered_at=at - timezone.timedelta(minutes=i // 2))
+            for i in range(25)
+        )
+
+    def pages(self, url, key, **params):
+        items, cursor = [], None
+        while True:
+            response = json.loads(self.client.get(url, {**params, **({'cursor': cursor} if cursor else {})}).content)
+            self.assertTrue(response['success'])
+            items.extend(response[key])
+            cursor = response['next_cursor']
+            if cursor is None:
+                return items
+
+    def test_logs_pages_cover_every_row_once(self):
+        logs = self.pages('/api/logs/', 'logs', limit=4)
+        self.assertEqual([log['id'] for log in logs], list(AlarmLog.objects.order_by('-triggered_at', '-id').values_list('id', flat=True)))
+        self.assertEqual(logs[0]['alarm_time'], '07:05')
+
+        dismissed = self.pages('/api/logs/', 'logs', limit=2, status='dismissed')
+        self.assertEqual(len(dismissed), 5)
+        self.assertEqual({log['status_display'] for log in dismissed}, {'Descartada'})
+
+    def test_alarm_pages_cover_every_alarm_once(self):
+        alarms = self.pages('/api/alarms/list/', 'alarms', limit=1)
+        self.assertEqual(len(alarms), Alarm.objects.count())
+        self.assertEqual(len({alarm['id'] for alarm in alarms}), len(alarms))
+
+    def test_bad_cursors_are_rejected(self):
+        bad = [
+            'no-es-base64!', encode_cursor([1]), encode_cursor([[1], 2]), encode_cursor([{'a': 1}, 2]),
+            encode_cursor([True, 2]), encode_cursor([None, 2]), encode_cursor(['ayer', 2]), encode_cursor([1e20, 2]),
+            encode_cursor([timezone.now(), 'x']),
+        ]
+        for cursor in bad:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/logs/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(json.loads(response.content)['success'])
+        for cursor in (encode_cursor([[1], 2, 3]), encode_cursor([7, 5, 'x'])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/alarms/list/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(json.loads(response.content)['success'])
+
+
+class UpcomingTests(HotPathTestCase):
+    """Upcoming occurrences come out merged in time order, read lazily / Las próximas ocurrencias salen mezcladas en orden temporal, leídas perezosamente"""
+
+    def test_matches_each_alarm_schedule(self):
+        start = timezone.now()
+        end = start + timezone.timedelta(days=8)
+        expected = []
+        for alarm in Alarm.objects.all():
+            moment = next_occurrence(alarm, start)
+            while moment < end:
+                expected.append((moment, alarm.id))
+                moment = next_occurrence(alarm, moment)
+
+        self.assertEqual([(moment, alarm.id) for moment, alarm in upcoming_occurrences(start, end)], sorted(expected))
+
+    def test_first_occurrences_read_one_page(self):
+        with self.assertNumQueries(1):
+            first = list(islice(upcoming_occurrences(), 2))
+        self.assertEqual(len(first), 2)
+
+    def test_streamed_json(self):
+        response = self.client.get('/api/alarms/upcoming/?days=2&limit=4')
+        payload = json.loads(b''.join(response.streaming_content))
+        self.assertTrue(payload['success'])
+        self.assertEqual(len(payload['occurrences']), 4)
+        self.assertEqual(payload['occurrences'][0]['time'], '07:05 AM')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN is SQLite specific / EXPLAIN QUERY PLAN es específico de SQLite")
+class QueryPlanTests(HotPathTestCase):
+    """Hot-path queries must be served by an index / Las consultas de rutas críticas deben usar un índice"""
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = self.query_plan(queryset)
+        self.assertIn('USING', plan, plan)
+        self.assertNotRegex(plan, r'SCAN clock_\w+$', plan)
+        if index_name:
+            self.assertIn(index_name, plan)
+
+    def test_check_alarms_filter(self):
+        today = timezone.localdate()
+        queryset = Alarm.objects.filter(
+            hour=7, minute=5, period='AM', is_active=True
+        ).filter(weekday_q(today.weekday()) | Q(alarm_date=today))
+        self.assertUsesIndex(queryset, 'clock_alarm_active_time_idx (period=? AND hour=? AND minute=?)')
+        # The weekday test and is_active need no table lookup / La prueba del día y is_active no necesitan leer la tabla
+        self.assertIn('COVERING INDEX clock_alarm_active_time_idx', self.query_plan(
+            Alarm.objects.filter(hour=7, minute=5, period='AM', is_active=True).filter(weekday_q(today.weekday())).values_list('id')
+        ))
+
+    def test_list_alarms_ordering(self):
+        self.assertUsesIndex(Alarm.objects.order_by('hour', 'minute', 'id'), 'clock_alarm_time_order_idx')
+
+    def test_log_day_range(self):
+        start, end = local_day_bounds(timezone.localdate())
+        queryset = AlarmLog.objects.filter(triggered_at__gte=start, triggered_at__lt=end)
+        self.assertIn('SEARCH clock_alarmlog USING', self.query_plan(queryset))
+
+    def test_recent_logs_ordering(self):
+        self.assertUsesIndex(AlarmLog.objects.order_by('-triggered_at')[:10], 'clock_log_triggered_idx')
+
+    def test_due_alarms(self):
+        self.assertIn('USING INDEX', self.query_plan(Alarm.objects.due()))
@@ -0,0 +1,176 @@
+"""
+Alarm Activity Time Series / Series de Tiempo de Actividad de Alarmas
+Bucketed log counts over arbitrary ranges with downsampling and caching / Conteos de registros por intervalos en rangos arbitrarios con reducción y caché
+
+
+"""
+
+import datetime
+import math
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from . import log_archive
+from .models import AlarmLog
+from .version_stamps import bump_version, get_version
+
+
+# Bucket sizes from finest to coarsest / Tamaños de intervalo del más fino al más grueso
+BUCKETS = ('hour', 'day', 'week', 'month')
+
+# Log statuses reported per bucket / Estados de registro reportados por intervalo
+SERIES_STATUSES = ('triggered', 'dismissed', 'missed')
+
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5000
+
+# Stamp in every cached bucket key, bumped when logs land in a bucket that may be cached / Marca en la clave de cada intervalo en caché, incrementada cuando llegan registros a un intervalo que puede estar en caché
+VERSION_NAME = 'series'
+
+# Keys of older stamps are never read again, so they only need to expire eventually / Las claves de marcas anteriores no se vuelven a leer, así que solo necesitan expirar en algún momento
+SERIES_CACHE_TIMEOUT = 7 * 86400
+
+# Approximate bucket lengths, only used to pick a coarser bucket cheaply / Duraciones aproximadas, solo para elegir un intervalo más grueso sin costo
+_APPROX_SECONDS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400, 'month': 30 * 86400}
+
+
+def bucket_floor(moment, bucket):
+    """Local start of the bucket containing `moment` / Inicio local del intervalo que contiene `moment`"""
+    local = timezone.localtime(moment).replace(tzinfo=None)
+    if bucket == 'hour':
+        start = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        if bucket == 'week':
+            start -= datetime.timedelta(days=start.weekday())
+        elif bucket == 'month':
+            start = start.replace(day=1)
+    return timezone.make_aware(start)
+
+
+def bucket_step(start, bucket):
+    """Local start of the bucket following the one at `start` / Inicio local del intervalo siguiente al de `start`"""
+    local = timezone.localtime(start).replace(tzinfo=None)
+    if bucket == 'hour':
+        following = local + datetime.timedelta(hours=1)
+    elif bucket == 'day':
+        following = local + datetime.timedelta(days=1)
+    elif bucket == 'week':
+        following = local + datetime.timedelta(weeks=1)
+    else:
+        following = (local.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return timezone.make_aware(following)
+
+
+def bucket_starts(start, end, bucket):
+    """Aligned bucket starts covering [start, end) / Inicios alineados de intervalos que cubren [start, end)"""
+    starts = []
+    current = bucket_floor(start, bucket)
+    while current < end:
+        starts.append(current)
+        current = bucket_step(current, bucket)
+    return starts
+
+
+def fit_bucket(start, end, bucket, max_points):
+    """Coarsest needed bucket so the range fits in `max_points` / Intervalo más grueso necesario para que el rango quepa en `max_points`"""
+    span = (end - start).total_seconds()
+    for candidate in BUCKETS[BUCKETS.index(bucket):]:
+        if span / _APPROX_SECONDS[candidate] <= max_points:
+            return candidate
+    return BUCKETS[-1]
+
+
+def _cache_key(bucket, start, version):
+    return f'clock:series:{version}:{bucket}:{int(start.timestamp())}'
+
+
+def invalidate_series():
+    """Drop every cached bucket once the current transaction commits / Descartar todos los intervalos en caché cuando la transacción actual se confirme"""
+    transaction.on_commit(lambda: bump_version(VERSION_NAME))
+
+
+def note_logs_written(moments, now=None):
+    """Invalidate cached buckets if a log was written into an already closed hour / Invalidar los intervalos en caché si se escribió un registro en una hora ya cerrada
+
+    Closed buckets are cached, and the finest bucket is an hour: late buffer flushes,
+    backfills and late dispatches can all add rows to one. / Los intervalos cerrados se guardan
+    en caché y el más fino es una hora: los volcados tardíos del búfer, las recuperaciones y los
+    despachos tardíos pueden agregarle filas.
+    """
+    earliest = min(moments, default=None)
+    if earliest is not None and earliest < bucket_floor(now or timezone.now(), BUCKETS[0]):
+        invalidate_series()
+
+
+def query_counts(start, end, bucket):
+    """Per-bucket status counts for [start, end) from one grouped query / Conteos por estado e intervalo para [start, end) con una sola consulta agrupada"""
+    rows = (
+        AlarmLog.objects
+        .filter(triggered_at__gte=start, triggered_at__lt=end)
+        .annotate(bucket=Trunc('triggered_at', bucket, tzinfo=timezone.get_current_timezone()))
+        .values('bucket')
+        .annotate(**{status: Count('id', filter=Q(status=status)) for status in SERIES_STATUSES})
+        .order_by('bucket')
+    )
+    return {
+        int(row['bucket'].timestamp()): [row[status] for status in SERIES_STATUSES]
+        for row in rows
+    }
+
+
+def downsample(starts, values, max_points):
+    """Merge consecutive buckets until at most `max_points` remain / Unir intervalos consecutivos hasta que queden como máximo `max_points`"""
+    factor = max(1, math.ceil(len(starts) / max_points))
+    if factor == 1:
+        return starts, values, factor
+    merged_starts, merged_values = [], []
+    for i in range(0, len(starts), factor):
+        merged_starts.append(starts[i])
+        merged_values.append([sum(column) for column in zip(*values[i:i + factor])])
+    return merged_starts, merged_values, factor
+
+
+def build_series(start, end, bucket='day', max_points=DEFAULT_MAX_POINTS, now=None):
+    """Trigger, dismiss and missed counts per bucket over [start, end) / Conteos de disparos, descartes y pérdidas por intervalo en [start, end)
+
+    The range is widened to whole buckets. Closed buckets are read from the cache and only the
+    span still missing is counted in the database and the log archive. / El rango se amplía a
+    intervalos completos. Los intervalos cerrados se leen de la caché y solo el tramo faltante se
+    cuenta en la base de datos y en el archivo de registros.
+    """
+    now = now or timezone.now()
+    bucket = fit_bucket(start, end, bucket, max_points)
+    starts = bucket_starts(start, end, bucket)
+    if not starts:
+        return {'bucket': bucket, 'starts': [], 'values': [], 'downsampled_by': 1}
+    ends = starts[1:] + [bucket_step(starts[-1], bucket)]
+
+    version = get_version(VERSION_NAME)
+    keys = [_cache_key(bucket, s, version) for s in starts]
+    closed = [e <= now for e in ends]
+    cached = cache.get_many([key for key, is_closed in zip(keys, closed) if is_closed])
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        first, last = missing[0], missing[-1]
+        counts = query_counts(starts[first], ends[last], bucket)
+        # Rows past the retention window live in the archive files / Las filas fuera de la ventana de retención viven en los archivos
+        archived = log_archive.bucket_counts(starts[first:last + 1] + [ends[last]], SERIES_STATUSES)
+        fresh = {
+            keys[i]: [
+                live + int(old)
+                for live, old in zip(counts.get(int(starts[i].timestamp()), [0] * len(SERIES_STATUSES)), archived[i - first])
+            ]
+            for i in range(first, last + 1)
+        }
+        cache.set_many({keys[i]: fresh[keys[i]] for i in range(first, last + 1) if closed[i]}, timeout=SERIES_CACHE_TIMEOUT)
+        cached.update(fresh)
+
+    values = [cached[key] for key in keys]
+    starts, values, factor = downsample(starts, values, max_points)
+    return {'bucket': bucket, 'starts': starts, 'values': values, 'downsampled_by': factor}
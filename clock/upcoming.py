@@ -0,0 +1,141 @@
+"""
+Upcoming Alarm Occurrences / Próximas Ocurrencias de Alarmas
+Lazy, time-ordered merge of every alarm's recurrence stream / Mezcla perezosa y en orden temporal del flujo de recurrencia de cada alarma
+
+Alarms are read in next_fire_at order, one keyset page at a time, and only enter the heap once
+their first occurrence could be the next one out, so asking for the first few occurrences reads
+a few rows no matter how many alarms exist. / Las alarmas se leen en orden de next_fire_at, una
+página de claves a la vez, y solo entran al heap cuando su primera ocurrencia podría ser la
+siguiente en salir, así que pedir las primeras ocurrencias lee pocas filas sin importar cuántas
+alarmas existan.
+"""
+
+import datetime
+import heapq
+import json
+from functools import lru_cache
+from itertools import islice
+
+from django.utils import timezone
+
+from .models import Alarm
+from .pagination import after_q
+from .scheduling import next_occurrence
+
+
+DEFAULT_UPCOMING_DAYS = 30
+MAX_UPCOMING_DAYS = 366
+DEFAULT_UPCOMING_LIMIT = 100
+MAX_UPCOMING_LIMIT = 5000
+
+# Alarms fetched per keyset page / Alarmas obtenidas por página de claves
+UPCOMING_CHUNK_SIZE = 200
+
+UPCOMING_FIELDS = (
+    'id', 'title', 'hour', 'minute', 'second', 'period', 'weekday_mask', 'alarm_date', 'priority', 'next_fire_at',
+    'snoozed_until',
+)
+
+_ORDER = ('next_fire_at', 'id')
+
+
+def clamp(value, default, maximum):
+    """Integer query parameter between 1 and `maximum` / Parámetro entero entre 1 y `maximum`"""
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def iter_scheduled_alarms(before, chunk_size=UPCOMING_CHUNK_SIZE):
+    """Active alarms with next_fire_at before `before`, in (next_fire_at, id) order / Alarmas activas con next_fire_at anterior a `before`, en orden (next_fire_at, id)"""
+    queryset = Alarm.objects.filter(is_active=True, next_fire_at__lt=before).only(*UPCOMING_FIELDS).order_by(*_ORDER)
+    last = None
+    while True:
+        # The plain range bound keeps SQLite on one ordered index scan instead of sorting an OR / La cota simple de rango mantiene a SQLite en un solo escaneo ordenado del índice en lugar de ordenar un OR
+        page = queryset if last is None else queryset.filter(next_fire_at__gte=last[0]).filter(after_q(_ORDER, last))
+        alarms = list(page[:chunk_size])
+        yield from alarms
+        if len(alarms) < chunk_size:
+            return
+        last = (alarms[-1].next_fire_at, alarms[-1].id)
+
+
+@lru_cache(maxsize=None)
+def _weekday_steps(weekday_mask):
+    """Days from each weekday to the next one in the mask / Días desde cada día de la semana hasta el siguiente de la máscara"""
+    return tuple(
+        datetime.timedelta(days=next(k for k in range(1, 8) if weekday_mask & (1 << ((weekday + k) % 7))))
+        for weekday in range(7)
+    )
+
+
+def alarm_occurrences(alarm, first, end):
+    """One alarm's occurrences from `first` (inclusive) to `end` / Ocurrencias de una alarma desde `first` (inclusive) hasta `end`"""
+    if first is not None and first == alarm.snoozed_until:
+        # A pending snooze re-fire, off the regular schedule / Un re-disparo pospuesto pendiente, fuera de la programación regular
+        if first < end:
+            yield timezone.localtime(first)
+        first = next_occurrence(alarm, first)
+    if first is not None and alarm.alarm_date is None and alarm.weekday_mask:
+        # Weekly patterns step whole local days, without rebuilding the calendar each time / Los patrones semanales avanzan días locales completos, sin reconstruir el calendario cada vez
+        steps = _weekday_steps(alarm.weekday_mask)
+        moment = timezone.localtime(first)
+        while moment < end:
+            yield moment
+            moment += steps[moment.weekday()]
+        return
+
+    moment = first and timezone.localtime(first)
+    while moment is not None and moment < end:
+        yield moment
+        moment = next_occurrence(alarm, moment)
+
+
+def upcoming_occurrences(start=None, end=None, chunk_size=UPCOMING_CHUNK_SIZE):
+    """Yield (moment, alarm) for every occurrence in [start, end), in time order / Generar (momento, alarma) por cada ocurrencia en [start, end), en orden temporal"""
+    # Every moment in the heap shares the local zone, which keeps comparisons cheap / Todos los momentos del heap comparten la zona local, lo que abarata las comparaciones
+    start = timezone.localtime(start or timezone.now())
+    end = timezone.localtime(end or start + datetime.timedelta(days=DEFAULT_UPCOMING_DAYS))
+    alarms = iter_scheduled_alarms(end, chunk_size)
+    pending = next(alarms, None)
+    heap = []
+
+    def push(alarm, stream):
+        moment = next(stream, None)
+        if moment is not None:
+            heapq.heappush(heap, (moment, alarm.id, alarm, stream))
+
+    while True:
+        # No alarm still unread can fire before its own next_fire_at / Ninguna alarma aún no leída puede sonar antes de su propio next_fire_at
+        while pending is not None and (not heap or pending.next_fire_at <= heap[0][0]):
+            first = pending.next_fire_at
+            if first < start:
+                # Due but not dispatched yet: start from its first occurrence at or after `start` / Pendiente pero aún no despachada: empezar por su primera ocurrencia en o después de `start`
+                first = next_occurrence(pending, start - datetime.timedelta(microseconds=1))
+            push(pending, alarm_occurrences(pending, first, end))
+            pending = next(alarms, None)
+        if not heap:
+            return
+        moment, _, alarm, stream = heapq.heappop(heap)
+        yield moment, alarm
+        push(alarm, stream)
+
+
+def occurrence_payload(moment, alarm):
+    local = timezone.localtime(moment)
+    return {
+        'id': alarm.id,
+        'title': alarm.title,
+        'time': f"{alarm.hour:02d}:{alarm.minute:02d} {alarm.period}",
+        'at': local.isoformat(),
+        'weekday': local.weekday(),
+        'priority': alarm.priority,
+    }
+
+
+def upcoming_json(start, end, limit):
+    """JSON document streamed one occurrence at a time / Documento JSON transmitido una ocurrencia a la vez"""
+    yield '{"success": true, "occurrences": ['
+    for index, (moment, alarm) in enumerate(islice(upcoming_occurrences(start, end), limit)):
+        yield (',' if index else '') + json.dumps(occurrence_payload(moment, alarm), ensure_ascii=False)
+    yield ']}'
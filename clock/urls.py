@@ -1,16 +1,23 @@
 
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'clock'  # App namespace / Espacio de nombres de la app
 
+
+def _polling(sync_view, async_view):
+    """View for a polling endpoint: async under CLOCK_ASYNC_VIEWS / Vista para un endpoint de sondeo: asíncrona con CLOCK_ASYNC_VIEWS"""
+    return async_view if getattr(settings, 'CLOCK_ASYNC_VIEWS', False) else sync_view
+
+
 urlpatterns = [
     # Main clock view / Vista principal del reloj
     path('', views.index, name='index'),
     
     # API endpoints / Endpoints de API
-    path('api/current-time/', views.get_current_time, name='api_current_time'),
+    path('api/current-time/', _polling(views.get_current_time, views.aget_current_time), name='api_current_time'),
     path('api/toggle-format/', views.toggle_format, name='api_toggle_format'),
     path('api/sync-time/', views.sync_time, name='api_sync_time'),
     
@@ -18,13 +25,24 @@ urlpatterns = [
     path('api/alarms/create/', views.create_alarm, name='api_create_alarm'),
     path('api/alarms/<int:alarm_id>/delete/', views.delete_alarm, name='api_delete_alarm'),
     path('api/alarms/<int:alarm_id>/toggle/', views.toggle_alarm, name='api_toggle_alarm'),
-    path('api/alarms/list/', views.list_alarms, name='api_list_alarms'),
-    path('api/check-alarms/', views.check_alarms, name='api_check_alarms'),
+    path('api/alarms/bulk/', views.bulk_create_alarms, name='api_bulk_create_alarms'),
+    path('api/alarms/batch/', views.batch_alarms, name='api_batch_alarms'),
+    path('api/alarms/list/', _polling(views.list_alarms, views.alist_alarms), name='api_list_alarms'),
+    path('api/check-alarms/', _polling(views.check_alarms, views.acheck_alarms), name='api_check_alarms'),
     path('api/alarms/dismiss/', views.dismiss_alarm, name='api_dismiss_alarm'),
+    path('api/alarms/snooze/', views.snooze_alarm, name='api_snooze_alarm'),
+    path('api/alarms/upcoming/', views.upcoming_alarms, name='api_upcoming_alarms'),
+    path('api/alarms/events/', _polling(views.alarm_events, views.aalarm_events), name='api_alarm_events'),
+    path('api/logs/', views.list_logs, name='api_list_logs'),
+    path('api/logs/export/', views.export_logs, name='api_export_logs'),
     
     # Configuration / Configuración
+    path('api/configuration/', _polling(views.get_configuration, views.aget_configuration), name='api_configuration'),
     path('api/configuration/update/', views.update_configuration, name='api_update_configuration'),
     
     # Statistics / Estadísticas
     path('statistics/', views.statistics, name='statistics'),
+    path('api/statistics/series/', views.statistics_series, name='api_statistics_series'),
+    path('api/statistics/heatmap/', views.statistics_heatmap, name='api_statistics_heatmap'),
+    path('api/statistics/latency/', views.statistics_latency, name='api_statistics_latency'),
 ]
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Cross-worker Version Stamps / Marcas de Versión entre Workers
+Cheap counters bumped on writes so caches in other processes can detect changes / Contadores baratos incrementados en escrituras para que las cachés de otros procesos detecten cambios
+
+
+"""
+
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows / No disponible en Windows
+    fcntl = None
+
+
+def _key(name):
+    return f'clock:version:{name}'
+
+
+def _needs_file_lock():
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], FileBasedCache) and fcntl is not None
+
+
+@contextmanager
+def _file_lock():
+    """Serialize stamp updates across processes sharing a file-based cache / Serializar las actualizaciones de marcas entre procesos que comparten una caché en archivos
+
+    FileBasedCache.incr() is a get followed by a set, so two workers bumping together could
+    both write N+1; each would then take its own index for current and never see the other
+    write. Its set() replaces the file atomically, so readers need no lock. /
+    FileBasedCache.incr() es un get seguido de un set, así que dos workers incrementando a la
+    vez podrían escribir ambos N+1; cada uno daría su propio índice por actual y nunca vería la
+    otra escritura. Su set() reemplaza el archivo atómicamente, así que los lectores no
+    necesitan bloqueo.
+    """
+    location = caches[DEFAULT_CACHE_ALIAS]._dir
+    os.makedirs(location, exist_ok=True)
+    fd = os.open(os.path.join(location, 'version-stamps.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _seed(name):
+    # Seed from the wall clock so a cleared cache never repeats an old stamp / Sembrar con el reloj para que una caché vaciada nunca repita una marca anterior
+    cache.add(_key(name), int(time.time() * 1000), timeout=None)
+    return cache.get(_key(name))
+
+
+def get_version(name):
+    """Current stamp for a data set, created on first use / Marca actual de un conjunto de datos, creada en el primer uso"""
+    version = cache.get(_key(name))
+    if version is None:
+        if _needs_file_lock():
+            with _file_lock():
+                return _seed(name)
+        return _seed(name)
+    return version
+
+
+def bump_version(name):
+    """Advance the stamp after a write and return the new value, atomically across workers / Avanzar la marca tras una escritura y devolver el nuevo valor, atómicamente entre workers"""
+    if _needs_file_lock():
+        with _file_lock():
+            version = cache.get(_key(name))
+            version = (version if version is not None else _seed(name)) + 1
+            # No expiry: BaseCache.incr() would store it with the default timeout / Sin expiración: BaseCache.incr() la guardaría con el tiempo de expiración por defecto
+            cache.set(_key(name), version, timeout=None)
+            return version
+    try:
+        return cache.incr(_key(name))
+    except ValueError:
+        get_version(name)
+        return cache.incr(_key(name))
+
+
+def etag_for(name, request=None):
+    """Strong ETag value from a stamp and the query string, without touching the payload / Valor ETag fuerte a partir de una marca y la cadena de consulta, sin tocar el contenido"""
+    tag = f'{name}-{get_version(name)}'
+    if request is not None and request.GET:
+        # Different pages of the same data need different tags / Páginas distintas de los mismos datos necesitan etiquetas distintas
+        tag += '-' + hashlib.sha1(request.GET.urlencode().encode()).hexdigest()[:16]
+    return tag
@@ -1,15 +1,40 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.utils.cache import get_conditional_response, quote_etag
 from django.utils import timezone
 from django.contrib import messages
-from django.db.models import Q
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Case, Count, Q, Sum, Value, When
+import asyncio
+import csv
+import io
 import json
+import time as time_module
 from datetime import datetime, time
+from functools import wraps
 
-from .models import Alarm, ClockConfiguration, AlarmLog, ClockStatistics
+from .models import Alarm, AlarmOccurrence, ClockConfiguration, AlarmLog, ClockStatistics
 from .circular_lists import get_colombia_time
+from . import rollups, timeseries
+from .alarm_events import fire_alarms, insert_rows, not_silenced_q, write_logs, write_next_fire_at
+from .alarm_index import VERSION_NAME as ALARMS_VERSION_NAME, alarm_index
+from .dispatcher import VERSION_NAME as DISPATCH_VERSION_NAME, all_triggered_events, latest_event_id
+from .exports import EXPORT_FORMATS, export_stream
+from .heatmap import trigger_heatmap
+from .latency import DEFAULT_LATENCY_DAYS, MAX_LATENCY_DAYS, daily_latency, response_time
+from .pagination import akeyset_page, encode_cursor, keyset_page, parse_limit
+from .scheduling import MAX_CATCHUP_WINDOW, latest_occurrence, parse_instant, to_24h, weekday_q, window_q, window_segments
 from .reloj_core import CircularClock
+from .shared_state import current_snapshot, display_from_snapshot
+from .signals import CONFIG_VERSION_NAME
+from .snooze import snooze_alarms
+from .upcoming import DEFAULT_UPCOMING_DAYS, DEFAULT_UPCOMING_LIMIT, MAX_UPCOMING_DAYS, MAX_UPCOMING_LIMIT, clamp, upcoming_json
+from .version_stamps import etag_for, get_version
 
 
 # Global clock instance / Instancia global del reloj
@@ -29,22 +54,22 @@ def index(request):
         }
     )
     
-    # Get active alarms / Obtener alarmas activas
-    active_alarms = Alarm.objects.filter(
-        is_active=True
-    ).order_by('hour', 'minute')
+    # Get active alarms from the in-memory index / Obtener alarmas activas desde el índice en memoria
+    active_alarms = alarm_index.active()
     
     # Get current Colombia time / Obtener hora actual de Colombia
     current_time = get_colombia_time()
     
-    # Use clock_instance.get_current_time() to fetch the engine state / Usar clock_instance.get_current_time() para obtener el estado del motor
-    engine_time = clock_instance.get_current_time()
+    # Engine state from the shared segment, or from this worker's clock_instance / Estado del motor desde el segmento compartido, o desde el clock_instance de este worker
+    snapshot = current_snapshot()
+    engine_time = display_from_snapshot(snapshot) if snapshot is not None else clock_instance.get_current_time()
 
     context = {
         'config': config,
         'active_alarms': active_alarms,
         'alarms': active_alarms,
         'current_time': current_time,
+        'server_dispatch': getattr(settings, 'CLOCK_SERVER_DISPATCH', False),
         'clock_data': {
             'hours': engine_time.get('hour', 0),
             'minutes': engine_time.get('minute', 0),
@@ -57,8 +82,8 @@ def index(request):
     return render(request, 'clock/index.html', context)
 
 
-def get_current_time(request):
-    """API endpoint for real-time clock updates / Endpoint de API para actualizaciones de reloj en tiempo real"""
+def _engine_display(config):
+    """This worker's engine time, after applying the stored format / Hora del motor de este worker, tras aplicar el formato almacenado"""
     # Ensure the engine syncs with Colombia time on each request so we return live values / Asegurar que el motor se sincronice con la hora de Colombia en cada solicitud para devolver valores en vivo
     try:
         clock_instance.sync_colombia_time()
@@ -66,15 +91,15 @@ def get_current_time(request):
         # If sync fails, fall back to engine current time / Si la sincronización falla, volver al tiempo actual del motor
         pass
     # Keep engine format in sync with stored configuration / Mantener el formato del motor sincronizado con la configuración almacenada
-    try:
-        config, _ = ClockConfiguration.objects.get_or_create()
+    if config is not None:
         clock_instance.change_format(config.time_format == '24h')
-    except Exception:
-        pass
-    current_display = clock_instance.get_current_time()
+    return clock_instance.get_current_time()
+
 
+def _current_time_payload(current_display, colombia_time, versions):
+    """Current time in both formats / Hora actual en ambos formatos"""
     # Provide both 12h and 24h representations / Proporcionar representaciones tanto en 12h como en 24h
-    response = {
+    return {
         'success': True,
         'time': current_display,
         'time_12h': {
@@ -88,11 +113,36 @@ def get_current_time(request):
             'minute': current_display.get('minute'),
             'second': current_display.get('second')
         },
-        'colombia_time': get_colombia_time(),
+        'colombia_time': colombia_time,
+        # Clients can refetch the configuration or alarm list only when these change / Los clientes pueden volver a pedir la configuración o las alarmas solo cuando cambian
+        'versions': versions,
         'timestamp': timezone.now().timestamp()
     }
 
-    return JsonResponse(response)
+
+def _snapshot_payload(snapshot):
+    """Current-time payload from the shared segment: no resync and no query / Respuesta de hora actual desde el segmento compartido: sin resincronizar ni consultar"""
+    return _current_time_payload(
+        display_from_snapshot(snapshot),
+        {'hour': snapshot.hour_24, 'minute': snapshot.minute, 'second': snapshot.second, 'weekday': snapshot.weekday},
+        {'config': snapshot.config_version, 'alarms': snapshot.alarms_version},
+    )
+
+
+def _versions():
+    return {'config': get_version(CONFIG_VERSION_NAME), 'alarms': get_version(ALARMS_VERSION_NAME)}
+
+
+def get_current_time(request):
+    """API endpoint for real-time clock updates / Endpoint de API para actualizaciones de reloj en tiempo real"""
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        return JsonResponse(_snapshot_payload(snapshot))
+    try:
+        config, _ = ClockConfiguration.objects.get_or_create()
+    except Exception:
+        config = None
+    return JsonResponse(_current_time_payload(_engine_display(config), get_colombia_time(), _versions()))
 
 
 def toggle_format(request):
@@ -102,6 +152,7 @@ def toggle_format(request):
         
         config.time_format = '24h' if config.time_format == '12h' else '12h'
         config.save()
+        rollups.increment(format_changes=1)
         # Also update the global clock engine format so responses reflect the new format immediately / También actualizar el formato del motor de reloj global para que las respuestas reflejen el nuevo formato inmediatamente
         try:
             clock_instance.change_format(config.time_format == '24h')
@@ -118,77 +169,80 @@ def toggle_format(request):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+def _clean_alarm_data(data, today=None):
+    """Validate alarm fields with the create_alarm rules / Validar campos de alarma con las reglas de create_alarm
+
+    Returns (fields, None) or (None, error message); malformed numbers raise ValueError. /
+    Devuelve (campos, None) o (None, mensaje de error); números mal formados lanzan ValueError.
+    """
+    hour = int(data.get('hour', 1))
+    minute = int(data.get('minute', 0))
+    period = data.get('period', 'AM')
+    day_of_week = data.get('day_of_week')
+    alarm_date = data.get('alarm_date')  # Expect ISO date string YYYY-MM-DD for specific calendar date / Esperar cadena de fecha ISO YYYY-MM-DD para fecha específica del calendario
+    label = data.get('label', 'Alarma')
+    # Normalize empty label to default / Normalizar etiqueta vacía a predeterminada
+    if not label or (isinstance(label, str) and label.strip() == ''):
+        label = 'Alarma'
+
+    # Validate time / Validar tiempo
+    if not (1 <= hour <= 12) or not (0 <= minute <= 59):
+        return None, 'Hora inválida (1-12) o minuto inválido (0-59)'
+
+    # Validate period / Validar período
+    if period not in ['AM', 'PM']:
+        return None, 'Período inválido (AM/PM)'
+
+    # Validate day of week (empty CSV cells mean none) / Validar día de la semana (celdas CSV vacías significan ninguno)
+    if day_of_week is not None and day_of_week != '':
+        day_of_week = int(day_of_week)
+        if not (0 <= day_of_week <= 6):
+            return None, 'Día de la semana inválido'
+    else:
+        day_of_week = None
+
+    # Validate alarm_date (optional) / Validar alarm_date (opcional)
+    if alarm_date:
+        try:
+            alarm_date_parsed = datetime.fromisoformat(alarm_date).date()
+        except Exception:
+            return None, 'Formato de fecha inválido (YYYY-MM-DD)'
+        # Reject past dates / Rechazar fechas pasadas
+        if alarm_date_parsed < (today or timezone.localdate()):
+            return None, 'No se permiten fechas pasadas para alarmas (alarm_date)'
+    else:
+        alarm_date_parsed = None
+
+    return {
+        'title': label,
+        'hour': hour,
+        'minute': minute,
+        'period': period,
+        'day_of_week': day_of_week,
+        'alarm_date': alarm_date_parsed,
+    }, None
+
+
 def create_alarm(request):
     """Create a new alarm / Crear una nueva alarma"""
     if request.method == 'POST':
         try:
             data = json.loads(request.body) if request.content_type == 'application/json' else request.POST
             
-            hour = int(data.get('hour', 1))
-            minute = int(data.get('minute', 0))
-            period = data.get('period', 'AM')
-            day_of_week = data.get('day_of_week')
-            alarm_date = data.get('alarm_date')  # Expect ISO date string YYYY-MM-DD for specific calendar date / Esperar cadena de fecha ISO YYYY-MM-DD para fecha específica del calendario
-            label = data.get('label', 'Alarma')
-            # Normalize empty label to default / Normalizar etiqueta vacía a predeterminada
-            if not label or (isinstance(label, str) and label.strip() == ''):
-                label = 'Alarma'
-            
-            # Validate time / Validar tiempo
-            if not (1 <= hour <= 12) or not (0 <= minute <= 59):
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Hora inválida (1-12) o minuto inválido (0-59)'
-                })
-            
-            # Validate period / Validar período
-            if period not in ['AM', 'PM']:
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Período inválido (AM/PM)'
-                })
+            fields, error = _clean_alarm_data(data)
+            if error:
+                return JsonResponse({'success': False, 'error': error})
             
-            # Validate day of week / Validar día de la semana
-            if day_of_week is not None:
-                day_of_week = int(day_of_week)
-                if not (0 <= day_of_week <= 6):
-                    return JsonResponse({
-                        'success': False,
-                        'error': 'Día de la semana inválido'
-                    })
-
-            # Validate alarm_date (optional) / Validar alarm_date (opcional)
-            if alarm_date:
-                try:
-                    from datetime import date
-                    alarm_date_parsed = datetime.fromisoformat(alarm_date).date()
-                    # Reject past dates / Rechazar fechas pasadas
-                    today = timezone.localdate()
-                    if alarm_date_parsed < today:
-                        return JsonResponse({'success': False, 'error': 'No se permiten fechas pasadas para alarmas (alarm_date)'} )
-                except Exception:
-                    return JsonResponse({'success': False, 'error': 'Formato de fecha inválido (YYYY-MM-DD)'} )
-            else:
-                alarm_date_parsed = None
-            
-            alarm = Alarm.objects.create(
-                title=label,
-                hour=hour,
-                minute=minute,
-                period=period,
-                day_of_week=day_of_week,
-                alarm_date=alarm_date_parsed,
-                second=0,
-                is_active=True
-            )
+            alarm = Alarm.objects.create(**fields, second=0, is_active=True)
             
+            day_of_week = fields['day_of_week']
             day_names = {
                 0: 'Lunes', 1: 'Martes', 2: 'Miércoles', 3: 'Jueves',
                 4: 'Viernes', 5: 'Sábado', 6: 'Domingo'
             }
             day_text = day_names.get(day_of_week, 'Todos los días') if day_of_week is not None else 'Todos los días'
             
-            messages.success(request, f'Alarma creada para las {hour:02d}:{minute:02d} {period} - {day_text}')
+            messages.success(request, f"Alarma creada para las {fields['hour']:02d}:{fields['minute']:02d} {fields['period']} - {day_text}")
             
             return JsonResponse({
                 'success': True,
@@ -253,6 +307,181 @@ def toggle_alarm(request, alarm_id):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+# Largest import accepted in one request / Importación más grande aceptada en una solicitud
+BULK_IMPORT_LIMIT = 20_000
+
+
+def _bulk_rows(request):
+    """Alarm rows from a JSON array, a CSV upload or a CSV body / Filas de alarmas desde un arreglo JSON, un CSV subido o un cuerpo CSV"""
+    if request.content_type == 'application/json':
+        data = json.loads(request.body)
+        return data.get('alarms', []) if isinstance(data, dict) else data
+    if 'file' in request.FILES:
+        text = io.TextIOWrapper(request.FILES['file'].file, encoding='utf-8-sig')
+    else:
+        text = io.StringIO(request.body.decode('utf-8-sig'))
+    return list(csv.DictReader(text))
+
+
+def bulk_create_alarms(request):
+    """Import many alarms in one request / Importar muchas alarmas en una sola solicitud"""
+    if request.method == 'POST':
+        try:
+            rows = _bulk_rows(request)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return JsonResponse({'success': False, 'error': f'Formato inválido: {e}'})
+        if not isinstance(rows, list) or not rows:
+            return JsonResponse({'success': False, 'error': 'No se recibieron alarmas'})
+        if len(rows) > BULK_IMPORT_LIMIT:
+            return JsonResponse({'success': False, 'error': f'Máximo {BULK_IMPORT_LIMIT} alarmas por solicitud'})
+
+        # Validate everything first: an import is all or nothing / Validar todo primero: una importación es todo o nada
+        now = timezone.now()
+        today = timezone.localdate()
+        alarms, errors = [], []
+        for position, row in enumerate(rows, start=1):
+            try:
+                fields, error = _clean_alarm_data(row, today) if isinstance(row, dict) else (None, 'Fila inválida')
+            except (TypeError, ValueError) as e:
+                fields, error = None, str(e)
+            if error:
+                errors.append({'row': position, 'error': error})
+                continue
+            alarm = Alarm(**fields, second=0, is_active=True)
+            # bulk_create skips save(), so derive the schedule columns here / bulk_create omite save(), así que derivar aquí las columnas de programación
+            alarm.refresh_schedule(now)
+            alarms.append(alarm)
+        if errors:
+            return JsonResponse({'success': False, 'error': 'Alarmas inválidas', 'errors': errors[:100], 'error_count': len(errors)})
+
+        # One executemany: bulk_create is split into batches of a few dozen rows by SQLite's variable limit / Un solo executemany: bulk_create se parte en lotes de unas decenas de filas por el límite de variables de SQLite
+        columns = [field for field in Alarm._meta.concrete_fields if not field.primary_key]
+        for alarm in alarms:
+            alarm.created_at = alarm.updated_at = now
+        with transaction.atomic():
+            insert_rows(Alarm, [field.name for field in columns], [
+                tuple(getattr(alarm, field.attname) for field in columns) for alarm in alarms
+            ])
+        # No post_save signals fired: make every worker reload the index / No se dispararon señales post_save: recargar el índice en todos los workers
+        alarm_index.invalidate()
+        return JsonResponse({'success': True, 'created': len(alarms), 'message': f'{len(alarms)} alarmas importadas'})
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+BATCH_ACTIONS = ('activate', 'deactivate', 'toggle', 'delete')
+
+
+def batch_alarms(request):
+    """Activate, deactivate, toggle or delete a list of alarms at once / Activar, desactivar, alternar o eliminar una lista de alarmas a la vez"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            action = data.get('action')
+            ids = [int(alarm_id) for alarm_id in data.get('ids', [])]
+        except (ValueError, TypeError, AttributeError) as e:
+            return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+        if action not in BATCH_ACTIONS:
+            return JsonResponse({'success': False, 'error': f"Acción inválida ({'/'.join(BATCH_ACTIONS)})"})
+        if not ids:
+            return JsonResponse({'success': False, 'error': 'No se recibieron alarmas'})
+
+        alarms = Alarm.objects.filter(id__in=ids)
+        with transaction.atomic():
+            if action == 'delete':
+                # What on_delete would do, one statement per table instead of a post_delete (and a stamp bump) per row /
+                # Lo que haría on_delete, una sentencia por tabla en lugar de un post_delete (y un incremento de marca) por fila
+                AlarmLog.objects.filter(alarm_id__in=ids).update(alarm=None)
+                AlarmOccurrence.objects.filter(alarm_id__in=ids)._raw_delete(AlarmOccurrence.objects.db)
+                affected = alarms._raw_delete(alarms.db)
+            elif action == 'deactivate':
+                affected = alarms.update(is_active=False, next_fire_at=None, updated_at=timezone.now())
+            else:
+                is_active = Value(True) if action == 'activate' else Case(
+                    When(is_active=True, then=Value(False)), default=Value(True)
+                )
+                affected = alarms.update(is_active=is_active, next_fire_at=None, updated_at=timezone.now())
+                # Alarms that ended up active need their next occurrence / Las alarmas que quedaron activas necesitan su próxima ocurrencia
+                now = timezone.now()
+                active = list(alarms.filter(is_active=True).only(
+                    'id', 'is_active', 'silenced_until', 'snoozed_until', 'hour', 'minute', 'second', 'period', 'weekday_mask',
+                    'alarm_date',
+                ))
+                write_next_fire_at([(alarm.id, alarm.compute_next_fire_at(now)) for alarm in active])
+        alarm_index.invalidate()
+        return JsonResponse({'success': True, 'action': action, 'affected': affected})
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+# Alarm list rows and their keyset ordering / Filas del listado de alarmas y su orden por claves
+ALARM_LIST_ROWS = Alarm.objects.values('id', 'hour', 'minute', 'period', 'title', 'is_active')
+ALARM_LIST_ORDER = ('hour', 'minute', 'id')
+
+
+def _alarm_list_payload(rows, next_cursor):
+    data = [{
+        'id': a['id'],
+        'time': f"{a['hour']:02d}:{a['minute']:02d} {a['period']}",
+        'label': a['title'],
+        'is_active': a['is_active'],
+    } for a in rows]
+    return {'success': True, 'alarms': data, 'next_cursor': next_cursor}
+
+
+def _alarms_etag(request, *args, **kwargs):
+    return etag_for(ALARMS_VERSION_NAME, request)
+
+
+def _config_etag(request, *args, **kwargs):
+    return etag_for(CONFIG_VERSION_NAME, request)
+
+
+def async_condition(etag_func):
+    """condition(etag_func=...) for async views, reading the stamp in a thread / condition(etag_func=...) para vistas asíncronas, leyendo la marca en un hilo
+
+    Django's condition() calls etag_func on the event loop, and a stamp read is file I/O with
+    the file-based cache. / condition() de Django llama a etag_func en el bucle de eventos, y
+    leer una marca es E/S de archivos con la caché en archivos.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = quote_etag(await sync_to_async(etag_func)(request, *args, **kwargs))
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+def _configuration_payload(config):
+    return {
+        'success': True,
+        'configuration': {
+            'name': config.name,
+            'time_format': config.time_format,
+            'theme': config.theme,
+            'show_seconds': config.show_seconds,
+            'show_analog_clock': config.show_analog_clock,
+            'show_digital_clock': config.show_digital_clock,
+            'auto_sync': config.auto_sync,
+        },
+    }
+
+
+# Clients must revalidate, and a matching If-None-Match gets a 304 before the view runs / Los clientes deben revalidar, y un If-None-Match coincidente recibe un 304 antes de ejecutar la vista
+@cache_control(no_cache=True)
+@condition(etag_func=_config_etag)
+def get_configuration(request):
+    """Return the clock configuration / Devolver la configuración del reloj"""
+    if request.method == 'GET':
+        config, created = ClockConfiguration.objects.get_or_create()
+        return JsonResponse(_configuration_payload(config))
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
 def update_configuration(request):
     """Update clock configuration / Actualizar configuración del reloj"""
     if request.method == 'POST':
@@ -294,41 +523,37 @@ def statistics(request):
     stats, created = ClockStatistics.objects.get_or_create(date=today)
     
     # Get recent alarm logs / Obtener registros recientes de alarmas
-    recent_logs = AlarmLog.objects.all().order_by('-triggered_at')[:10]
+    recent_logs = list(AlarmLog.objects.select_related('alarm').order_by('-triggered_at', '-id')[:10])
     
-    # Basic counts / Conteos básicos
-    total_alarms_count = Alarm.objects.count()
-    total_active_alarms = Alarm.objects.filter(is_active=True).count()
-
-    # Determine which weekday (0=Monday) to match day_of_week / Determinar qué día de la semana (0=Lunes) para coincidir con day_of_week
-    weekday = today.weekday()
-
-    # Active alarms scheduled for today: either a specific alarm_date == today, / Alarmas activas programadas para hoy: ya sea una alarm_date específica == hoy,
-    # or a day_of_week matching today's weekday, or alarms with no restriction (treated as daily) / o un day_of_week que coincida con el día de la semana de hoy, o alarmas sin restricción (tratadas como diarias)
-    active_alarms_today_qs = Alarm.objects.filter(is_active=True).filter(
-        Q(alarm_date=today) | Q(day_of_week=weekday) | (Q(day_of_week__isnull=True) & Q(alarm_date__isnull=True))
+    # Basic counts in one conditional aggregate / Conteos básicos en un solo agregado condicional
+    alarm_totals = Alarm.objects.aggregate(
+        total=Count('id'),
+        triggered=Count('id', filter=Q(times_triggered__gt=0)),
     )
-    active_alarms_today = active_alarms_today_qs.count()
+    total_active_alarms = alarm_index.active_count()
+
+    # Active alarms scheduled for today: a specific alarm_date == today or today's weekday bit / Alarmas activas programadas para hoy: una alarm_date == hoy o el bit del día de hoy
+    active_alarms_today = alarm_index.scheduled_count(today)
 
     context = {
         'stats': stats,
         'recent_logs': recent_logs,
-        'total_alarms': total_alarms_count,
+        # Resume point for paging older logs through /api/logs/ / Punto de continuación para paginar registros anteriores con /api/logs/
+        'logs_cursor': encode_cursor([recent_logs[-1].triggered_at, recent_logs[-1].id]) if len(recent_logs) == 10 else '',
+        'total_alarms': alarm_totals['total'],
         'total_active_alarms': total_active_alarms,
         'active_alarms_today': active_alarms_today,
         # keep a legacy key in case templates reference it / mantener una clave heredada en caso de que las plantillas la referencien
         'active_alarms': total_active_alarms,
     }
 
-    # Prepare last 7 days data for charting using AlarmLog counts per day / Preparar datos de los últimos 7 días para gráficos usando conteos de AlarmLog por día
-    labels = []
-    alarms_counts = []
-    for i in range(6, -1, -1):
-        d = today - timezone.timedelta(days=i)
-        labels.append(d.strftime('%d %b'))
-        # Count AlarmLog entries whose triggered_at date equals d / Contar entradas de AlarmLog cuya fecha triggered_at sea igual a d
-        count = AlarmLog.objects.filter(triggered_at__date=d).count()
-        alarms_counts.append(count)
+    # Last 7 days read from the daily rollups, never from raw logs / Últimos 7 días leídos de los acumulados diarios, nunca de los registros
+    days = [today - timezone.timedelta(days=i) for i in range(6, -1, -1)]
+    per_day = dict(
+        ClockStatistics.objects.filter(date__gte=days[0], date__lte=today).values_list('date', 'alarms_triggered')
+    )
+    labels = [d.strftime('%d %b') for d in days]
+    alarms_counts = [per_day.get(d, 0) for d in days]
 
     context['chart_payload'] = {
         'labels': labels,
@@ -337,70 +562,206 @@ def statistics(request):
     # JSON string for safe injection in templates (use escapejs in template) / Cadena JSON para inyección segura en plantillas (usar escapejs en plantilla)
     context['chart_json'] = json.dumps(context['chart_payload'])
 
-    # Additional summary metrics / Métricas de resumen adicionales
-    context['total_triggers'] = AlarmLog.objects.count()
-    context['unique_alarms_triggered'] = AlarmLog.objects.values('alarm').distinct().count()
+    # Additional summary metrics; cost grows with days and alarms, not with log volume / Métricas de resumen adicionales; el costo crece con los días y las alarmas, no con el volumen de registros
+    context['total_triggers'] = ClockStatistics.objects.aggregate(total=Sum('alarms_triggered'))['total'] or 0
+    context['unique_alarms_triggered'] = alarm_totals['triggered']
 
     # Alarms triggered today / Alarmas disparadas hoy
-    triggered_today = AlarmLog.objects.filter(triggered_at__date=today).count()
-    context['triggered_today'] = triggered_today
+    context['triggered_today'] = alarms_counts[-1]
     
     return render(request, 'clock/statistics.html', context)
 
 
+def statistics_series(request):
+    """Trigger, dismiss and missed counts per bucket over any range / Conteos de disparos, descartes y pérdidas por intervalo en cualquier rango"""
+    try:
+        now = timezone.now()
+        end = parse_instant(request.GET.get('to')) or now
+        start = parse_instant(request.GET.get('from')) or end - timezone.timedelta(days=7)
+        bucket = request.GET.get('bucket', 'day')
+        max_points = int(request.GET.get('max_points', timeseries.DEFAULT_MAX_POINTS))
+    except (TypeError, ValueError, OverflowError) as e:
+        return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+
+    if bucket not in timeseries.BUCKETS:
+        return JsonResponse({'success': False, 'error': f"Intervalo inválido ({'/'.join(timeseries.BUCKETS)})"})
+    if start >= end:
+        return JsonResponse({'success': False, 'error': "'from' debe ser anterior a 'to'"})
+    max_points = max(1, min(max_points, timeseries.MAX_POINTS_LIMIT))
+
+    series = timeseries.build_series(start, end, bucket, max_points, now=now)
+    columns = list(zip(*series['values'])) or [()] * len(timeseries.SERIES_STATUSES)
+    return JsonResponse({
+        'success': True,
+        'bucket': series['bucket'],
+        'downsampled_by': series['downsampled_by'],
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'labels': [timezone.localtime(s).isoformat() for s in series['starts']],
+        'series': {status: list(column) for status, column in zip(timeseries.SERIES_STATUSES, columns)},
+    })
+
+
+def statistics_heatmap(request):
+    """Local hour × weekday counts of alarm events / Conteos de eventos de alarma por hora local × día de la semana"""
+    try:
+        start = parse_instant(request.GET.get('from'))
+        end = parse_instant(request.GET.get('to'))
+    except (TypeError, ValueError, OverflowError) as e:
+        return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+    status = request.GET.get('status', 'triggered')
+    if status not in dict(AlarmLog.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Estado inválido'})
+
+    matrix = trigger_heatmap(start, end, status=status)
+    return JsonResponse({
+        'success': True,
+        'status': status,
+        'weekdays': ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom'],
+        'matrix': matrix.tolist(),
+        'total': int(matrix.sum()),
+        'max': int(matrix.max()),
+    })
+
+
+def statistics_latency(request):
+    """Daily p50/p95/p99 of alarm firing lag and user response time / p50/p95/p99 diarios del retraso de disparo y del tiempo de respuesta"""
+    try:
+        days = clamp(request.GET.get('days'), DEFAULT_LATENCY_DAYS, MAX_LATENCY_DAYS)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+    today = timezone.localdate()
+    return JsonResponse({
+        'success': True,
+        'unit': 'seconds',
+        'days': daily_latency(today - timezone.timedelta(days=days - 1), today),
+    })
+
+
+def _scheduled_instant(alarm, segments):
+    """Occurrence a check matched: a due snooze re-fire, the window occurrence or this minute's / Ocurrencia que coincidió en una verificación: un re-disparo pospuesto pendiente, la de la ventana o la de este minuto"""
+    if alarm.snoozed_until is not None and alarm.snoozed_until <= timezone.now():
+        return alarm.snoozed_until
+    if segments is not None:
+        return latest_occurrence(alarm, segments)
+    return timezone.make_aware(datetime.combine(
+        timezone.localdate(), time(to_24h(alarm.hour, alarm.period), alarm.minute, alarm.second or 0),
+    ))
+
+
+# Fields check_alarms needs from each due alarm / Campos que check_alarms necesita de cada alarma pendiente
+CHECK_ALARM_FIELDS = (
+    'id', 'title', 'hour', 'minute', 'second', 'period', 'weekday_mask', 'alarm_date', 'is_active', 'snoozed_until',
+)
+
+
+def _due_alarms_queryset(data, blocking=True):
+    """Parse a check request: (segments, due alarms queryset or None, runtime left to count) / Interpretar una verificación: (segmentos, queryset de alarmas pendientes o None, tiempo de ejecución por contar)
+
+    Runs no queries once the minute is counted; the in-memory index answers the common "nothing
+    due" case. With blocking=False the index is not reloaded and the runtime is not written here,
+    so async views can call it on the event loop. / No ejecuta consultas una vez contado el
+    minuto; el índice en memoria responde el caso común de "nada pendiente". Con blocking=False no
+    se recarga el índice ni se escribe el tiempo aquí, así que las vistas asíncronas pueden
+    llamarla en el bucle de eventos.
+    """
+    segments = None
+    if 'since' in data or 'until' in data:
+        # Catch-up window: every alarm due in (since, until] from one query / Ventana de recuperación: cada alarma pendiente en (since, until] con una sola consulta
+        until = parse_instant(data.get('until')) or timezone.now()
+        segments = window_segments(parse_instant(data.get('since')), until)
+        covered = segments
+        now = timezone.now()
+        scheduled = alarm_index.due_in_window(segments, now=now, refresh=blocking)
+        scheduled_q = window_q(segments)
+    else:
+        hour = int(data.get('hour'))
+        minute = int(data.get('minute'))
+        period = data.get('period')
+        day = int(data.get('day'))
+        covered = [(timezone.localdate(), to_24h(hour, period) * 60 + minute, to_24h(hour, period) * 60 + minute)]
+        now = timezone.now()
+        scheduled = alarm_index.due(hour, minute, period, day, timezone.localdate(), now=now, refresh=blocking)
+        # Find matching alarms: match by time + either specific date or a recurring weekday bit / Encontrar alarmas coincidentes: coincidir por tiempo + fecha específica o un bit de día recurrente
+        scheduled_q = Q(hour=hour, minute=minute, period=period) & (Q(alarm_date=timezone.localdate()) | weekday_q(day))
+
+    # Every covered minute counts as runtime, once per minute across all clients / Cada minuto cubierto cuenta como tiempo de ejecución, una vez por minuto entre todos los clientes
+    runtime = rollups.uncounted_runtime(covered, now=now)
+    if runtime and blocking:
+        rollups.count_runtime(runtime)
+        runtime = []
+
+    # Snooze re-fires that came due ride along with the regular occurrences / Los re-disparos pospuestos que vencieron acompañan a las ocurrencias regulares
+    snoozed_ids = alarm_index.pop_due_snoozes(now, refresh=False)
+    if not scheduled and not snoozed_ids:
+        return segments, None, runtime
+
+    # Silenced alarms are excluded in SQL / Las alarmas silenciadas se excluyen en SQL
+    due_q = scheduled_q & not_silenced_q(now) if scheduled else Q(pk__in=[])
+    if snoozed_ids:
+        due_q |= Q(id__in=snoozed_ids, snoozed_until__lte=now)
+    return segments, Alarm.objects.filter(is_active=True).filter(due_q).only(*CHECK_ALARM_FIELDS), runtime
+
+
+def _check_alarms_payload(alarms, scheduled_at):
+    return {
+        'alarm_triggered': bool(alarms),
+        'triggered_alarms': [
+            {
+                'id': alarm.id,
+                'title': alarm.title,
+                'time': f"{alarm.hour:02d}:{alarm.minute:02d} {alarm.period}",
+                'scheduled_at': scheduled_at[alarm.id].isoformat() if scheduled_at.get(alarm.id) else None
+            }
+            for alarm in alarms
+        ]
+    }
+
+
+def _fired_window(data):
+    """[since, until) instants a check request covers, for reading dispatched events / Instantes [since, until) que cubre una verificación, para leer eventos despachados"""
+    if 'since' in data or 'until' in data:
+        until = parse_instant(data.get('until')) or timezone.now()
+        since = parse_instant(data.get('since')) or until - timezone.timedelta(minutes=1)
+        return max(since, until - MAX_CATCHUP_WINDOW), until
+    start = timezone.make_aware(datetime.combine(
+        timezone.localdate(), time(to_24h(int(data.get('hour')), data.get('period')), int(data.get('minute'))),
+    ))
+    return start, start + timezone.timedelta(minutes=1)
+
+
+def _fired_events_payload(data):
+    """check_alarms answer when the dispatcher fires alarms: what it already fired in the window / Respuesta de check_alarms cuando el despachador dispara las alarmas: lo que ya disparó en la ventana"""
+    since, until = _fired_window(data)
+    rollups.count_runtime(rollups.uncounted_runtime(window_segments(since, until)))
+    events = all_triggered_events(since=since, until=until)
+    return {'alarm_triggered': bool(events), 'triggered_alarms': events}
+
+
 def check_alarms(request):
-    """Check if any alarms should be triggered / Verificar si alguna alarma debe dispararse"""
+    """Check if any alarms should be triggered / Verificar si alguna alarma debe dispararse
+
+    With CLOCK_SERVER_DISPATCH the dispatcher fires alarms and this only reads its events. /
+    Con CLOCK_SERVER_DISPATCH el despachador dispara las alarmas y esto solo lee sus eventos.
+    """
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            hour = int(data.get('hour'))
-            minute = int(data.get('minute'))
-            period = data.get('period')
-            day = int(data.get('day'))
-            
-            # Find matching alarms: match by time + either specific date, matching weekday, or no day restriction / Encontrar alarmas coincidentes: coincidir por tiempo + ya sea fecha específica, día de la semana coincidente, o sin restricción de día
-            matching_alarms = Alarm.objects.filter(
-                hour=hour,
-                minute=minute,
-                period=period,
-                is_active=True
-            ).filter(
-                Q(alarm_date__isnull=False, alarm_date=timezone.localdate()) |
-                Q(day_of_week=day) |
-                Q(day_of_week__isnull=True, alarm_date__isnull=True)
-            )
-            
-            alarm_triggered = matching_alarms.exists()
+            if getattr(settings, 'CLOCK_SERVER_DISPATCH', False):
+                return JsonResponse(_fired_events_payload(data))
+            segments, matching_alarms, _ = _due_alarms_queryset(data)
+            if matching_alarms is None:
+                # Nothing due according to the in-memory index: answer without queries / Nada pendiente según el índice en memoria: responder sin consultas
+                return JsonResponse({'alarm_triggered': False, 'triggered_alarms': []})
+
+            # The queryset is evaluated once / El queryset se evalúa una sola vez
+            matching_alarms = list(matching_alarms)
+
+            # Mark alarms as triggered and log them in a single transaction / Marcar alarmas como disparadas y registrarlas en una sola transacción
+            scheduled_at = {alarm.id: _scheduled_instant(alarm, segments) for alarm in matching_alarms}
+            fire_alarms(matching_alarms, now=timezone.now(), scheduled_at=scheduled_at)
             
-            # Log triggered alarms using the AlarmLog model fields and mark alarm as triggered / Registrar alarmas disparadas usando los campos del modelo AlarmLog y marcar alarma como disparada
-            for alarm in matching_alarms:
-                # Skip if alarm is temporarily silenced / Omitir si la alarma está silenciada temporalmente
-                if alarm.silenced_until and alarm.silenced_until > timezone.now():
-                    continue
-                # Increment alarm counters and last_triggered / Incrementar contadores de alarma y last_triggered
-                try:
-                    alarm.trigger()
-                except Exception:
-                    pass
-
-                AlarmLog.objects.create(
-                    alarm=alarm,
-                    alarm_title=alarm.title,
-                    status='triggered',
-                    user_action='auto-trigger'
-                )
-            
-            return JsonResponse({
-                'alarm_triggered': alarm_triggered,
-                'triggered_alarms': [
-                    {
-                        'id': alarm.id,
-                        'title': alarm.title,
-                        'time': f"{alarm.hour:02d}:{alarm.minute:02d} {alarm.period}"
-                    }
-                    for alarm in matching_alarms
-                ]
-            })
+            return JsonResponse(_check_alarms_payload(matching_alarms, scheduled_at))
             
         except Exception as e:
             return JsonResponse({
@@ -419,21 +780,28 @@ def dismiss_alarm(request):
             alarm_id = int(data.get('alarm_id'))
             duration_minutes = int(data.get('silence_minutes', 0))
             alarm = get_object_or_404(Alarm, id=alarm_id)
+            now = timezone.now()
+            responded_in = response_time(alarm.last_triggered, now)
 
             if duration_minutes > 0:
-                alarm.silenced_until = timezone.now() + timezone.timedelta(minutes=duration_minutes)
+                alarm.silenced_until = now + timezone.timedelta(minutes=duration_minutes)
             else:
                 # If duration 0, mark as inactive / Si duración 0, marcar como inactiva
                 alarm.is_active = False
+            # Dismissing ends the snooze cycle / Descartar termina el ciclo de snoozes
+            alarm.snooze_count = 0
+            alarm.snoozed_until = None
             alarm.save()
 
             # Record the dismissal in logs / Registrar el descarte en logs
-            AlarmLog.objects.create(
+            write_logs([AlarmLog(
                 alarm=alarm,
                 alarm_title=alarm.title,
                 status='dismissed',
-                user_action='user-dismiss'
-            )
+                user_action='user-dismiss',
+                triggered_at=now,
+                response_time=responded_in,
+            )])
 
             return JsonResponse({'success': True, 'message': 'Alarma descartada/silenciada'})
         except Exception as e:
@@ -441,28 +809,178 @@ def dismiss_alarm(request):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+def snooze_alarm(request):
+    """User snoozes ringing alarms: each re-fires after its own snooze_duration, up to max_snooze_count / Usuario pospone alarmas que suenan: cada una vuelve a sonar tras su propio snooze_duration, hasta max_snooze_count"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            alarm_ids = [int(alarm_id) for alarm_id in data.get('alarm_ids') or [data.get('alarm_id')]]
+            snoozed, refused = snooze_alarms(alarm_ids)
+            if not snoozed:
+                return JsonResponse({'success': False, 'error': 'La alarma no se puede posponer (no está sonando, ya está pospuesta, snooze deshabilitado o límite alcanzado)'})
+            return JsonResponse({
+                'success': True,
+                'message': 'Alarma pospuesta',
+                'snoozed': [
+                    {
+                        'id': alarm.id,
+                        'refire_at': alarm.snoozed_until.isoformat(),
+                        'snoozes_left': alarm.max_snooze_count - alarm.snooze_count,
+                    }
+                    for alarm in snoozed
+                ],
+                'refused': refused,
+            })
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+def export_logs(request):
+    """Stream the alarm log as CSV or JSON lines, optionally gzipped / Transmitir el registro de alarmas como CSV o JSON lines, opcionalmente con gzip"""
+    try:
+        start = parse_instant(request.GET.get('from'))
+        end = parse_instant(request.GET.get('to'))
+    except (TypeError, ValueError, OverflowError) as e:
+        return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': f"Formato inválido ({'/'.join(EXPORT_FORMATS)})"})
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    filename = f"alarm_logs.{export_format}"
+    content_type = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson; charset=utf-8'
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(export_stream(export_format, start, end, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_alarms_etag)
 def list_alarms(request):
-    """Return a JSON list of alarms for modal display / Devolver una lista JSON de alarmas para visualización modal"""
+    """Return a page of alarms for modal display / Devolver una página de alarmas para visualización modal"""
     if request.method == 'GET':
-        alarms = Alarm.objects.all().order_by('hour', 'minute')
-        data = []
-        for a in alarms:
-            time_text = f"{a.hour:02d}:{a.minute:02d} {a.period}"
-            data.append({
-                'id': a.id,
-                'time': time_text,
-                'label': a.title,
-                'is_active': a.is_active,
-            })
-        return JsonResponse({'success': True, 'alarms': data})
+        try:
+            limit = parse_limit(request.GET.get('limit'))
+            rows, next_cursor = keyset_page(ALARM_LIST_ROWS, ALARM_LIST_ORDER, request.GET.get('cursor'), limit)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+        return JsonResponse(_alarm_list_payload(rows, next_cursor))
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+def upcoming_alarms(request):
+    """Stream the alarm occurrences of the next days, in time order / Transmitir las ocurrencias de alarmas de los próximos días, en orden temporal"""
+    if request.method == 'GET':
+        try:
+            days = clamp(request.GET.get('days'), DEFAULT_UPCOMING_DAYS, MAX_UPCOMING_DAYS)
+            limit = clamp(request.GET.get('limit'), DEFAULT_UPCOMING_LIMIT, MAX_UPCOMING_LIMIT)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+        start = timezone.now()
+        return StreamingHttpResponse(
+            upcoming_json(start, start + timezone.timedelta(days=days), limit), content_type='application/json',
+        )
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+def list_logs(request):
+    """Return a page of alarm logs, newest first / Devolver una página de registros de alarmas, del más reciente al más antiguo"""
+    if request.method == 'GET':
+        try:
+            limit = parse_limit(request.GET.get('limit'))
+            logs = AlarmLog.objects.values(
+                'id', 'alarm_id', 'alarm_title', 'status', 'triggered_at', 'user_action', 'alarm__hour', 'alarm__minute',
+            )
+            status = request.GET.get('status')
+            if status:
+                logs = logs.filter(status=status)
+            rows, next_cursor = keyset_page(logs, ('-triggered_at', '-id'), request.GET.get('cursor'), limit)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+        status_labels = dict(AlarmLog.STATUS_CHOICES)
+        data = [{
+            'id': log['id'],
+            'alarm_id': log['alarm_id'],
+            'title': log['alarm_title'],
+            'status': log['status'],
+            'status_display': status_labels.get(log['status'], log['status']),
+            'alarm_time': f"{log['alarm__hour']:02d}:{log['alarm__minute']:02d}" if log['alarm_id'] else None,
+            'triggered_at': log['triggered_at'].isoformat(),
+            'user_action': log['user_action'],
+        } for log in rows]
+        return JsonResponse({'success': True, 'logs': data, 'next_cursor': next_cursor})
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+# An event stream ends after this long and the browser reconnects with Last-Event-ID / Un flujo de eventos termina tras este tiempo y el navegador se reconecta con Last-Event-ID
+EVENT_STREAM_SECONDS = 300
+EVENT_STREAM_KEEPALIVE = 15
+
+
+def _first_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    return int(value) if value else None
+
+
+def _sse_message(event):
+    return f"id: {event['event_id']}\nevent: alarm\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def _event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Keep proxies from buffering the stream / Evitar que los proxies acumulen el flujo
+    return response
+
+
+def alarm_events(request):
+    """Server-sent events for every alarm the dispatcher fires / Eventos enviados por el servidor por cada alarma que dispara el despachador
+
+    Each connection only queries when the dispatch stamp changes. Under WSGI a stream holds a
+    worker thread, so CLOCK_ASYNC_VIEWS routes it to aalarm_events under ASGI. / Cada conexión
+    solo consulta cuando cambia la marca de despacho. Bajo WSGI un flujo ocupa un hilo del
+    worker, así que CLOCK_ASYNC_VIEWS lo dirige a aalarm_events bajo ASGI.
+    """
+    try:
+        last_id = _first_event_id(request)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Last-Event-ID inválido'})
+    if last_id is None:
+        last_id = latest_event_id()
+
+    def stream():
+        nonlocal last_id
+        yield 'retry: 3000\n\n'
+        seen = None
+        deadline = time_module.monotonic() + EVENT_STREAM_SECONDS
+        quiet_since = time_module.monotonic()
+        while time_module.monotonic() < deadline:
+            version = get_version(DISPATCH_VERSION_NAME)
+            if version != seen:
+                seen = version
+                # A burst can exceed one page; read until caught up / Una ráfaga puede superar una página; leer hasta ponerse al día
+                for event in all_triggered_events(after_id=last_id):
+                    last_id = event['event_id']
+                    quiet_since = time_module.monotonic()
+                    yield _sse_message(event)
+            if time_module.monotonic() - quiet_since >= EVENT_STREAM_KEEPALIVE:
+                quiet_since = time_module.monotonic()
+                yield ': keepalive\n\n'
+            time_module.sleep(1)
+
+    return _event_stream_response(stream())
+
+
 def sync_time(request):
     """Manually sync with Colombia time / Sincronizar manualmente con la hora de Colombia"""
     if request.method == 'POST':
         try:
             clock_instance.sync_colombia_time()
+            rollups.increment(sync_operations=1)
             
             return JsonResponse({
                 'success': True,
@@ -477,3 +995,108 @@ def sync_time(request):
             })
     
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+# Async versions of the polling endpoints, routed when CLOCK_ASYNC_VIEWS is on / Versiones asíncronas de los endpoints de sondeo, usadas cuando CLOCK_ASYNC_VIEWS está activo
+# Under ASGI each poll then waits on the event loop instead of holding a worker thread; only
+# writes (firing alarms, flushing rollups, reloading the index) and version stamp reads, which
+# are file I/O with the file-based cache, still hop to a thread. / Bajo ASGI cada sondeo espera
+# en el bucle de eventos en lugar de ocupar un hilo; solo las escrituras (disparar alarmas,
+# escribir acumulados, recargar el índice) y las lecturas de marcas de versión, que son E/S de
+# archivos con la caché en archivos, pasan a un hilo.
+
+async def aget_current_time(request):
+    """Async get_current_time / get_current_time asíncrono"""
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        return JsonResponse(_snapshot_payload(snapshot))
+    try:
+        config, _ = await ClockConfiguration.objects.aget_or_create()
+    except Exception:
+        config = None
+    return JsonResponse(_current_time_payload(_engine_display(config), get_colombia_time(), await sync_to_async(_versions)()))
+
+
+async def acheck_alarms(request):
+    """Async check_alarms / check_alarms asíncrono"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            if getattr(settings, 'CLOCK_SERVER_DISPATCH', False):
+                return JsonResponse(await sync_to_async(_fired_events_payload)(data))
+            await sync_to_async(alarm_index.ensure_current)()
+            segments, matching_alarms, runtime = _due_alarms_queryset(data, blocking=False)
+            if runtime:
+                await sync_to_async(rollups.count_runtime)(runtime)
+            if matching_alarms is None:
+                return JsonResponse({'alarm_triggered': False, 'triggered_alarms': []})
+
+            matching_alarms = [alarm async for alarm in matching_alarms]
+            scheduled_at = {alarm.id: _scheduled_instant(alarm, segments) for alarm in matching_alarms}
+            await sync_to_async(fire_alarms)(matching_alarms, now=timezone.now(), scheduled_at=scheduled_at)
+
+            return JsonResponse(_check_alarms_payload(matching_alarms, scheduled_at))
+
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            })
+
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+@cache_control(no_cache=True)
+@async_condition(_alarms_etag)
+async def alist_alarms(request):
+    """Async list_alarms / list_alarms asíncrono"""
+    if request.method == 'GET':
+        try:
+            limit = parse_limit(request.GET.get('limit'))
+            rows, next_cursor = await akeyset_page(ALARM_LIST_ROWS, ALARM_LIST_ORDER, request.GET.get('cursor'), limit)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': f'Parámetros inválidos: {e}'})
+        return JsonResponse(_alarm_list_payload(rows, next_cursor))
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+@cache_control(no_cache=True)
+@async_condition(_config_etag)
+async def aget_configuration(request):
+    """Async get_configuration / get_configuration asíncrono"""
+    if request.method == 'GET':
+        config, created = await ClockConfiguration.objects.aget_or_create()
+        return JsonResponse(_configuration_payload(config))
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
+
+
+async def aalarm_events(request):
+    """Async alarm_events: idle streams wait on the event loop / alarm_events asíncrono: los flujos inactivos esperan en el bucle de eventos"""
+    try:
+        last_id = _first_event_id(request)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Last-Event-ID inválido'})
+    if last_id is None:
+        last_id = await sync_to_async(latest_event_id)()
+
+    async def stream():
+        nonlocal last_id
+        yield 'retry: 3000\n\n'
+        seen = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + EVENT_STREAM_SECONDS
+        quiet_since = loop.time()
+        while loop.time() < deadline:
+            version = await sync_to_async(get_version)(DISPATCH_VERSION_NAME)
+            if version != seen:
+                seen = version
+                for event in await sync_to_async(all_triggered_events)(after_id=last_id):
+                    last_id = event['event_id']
+                    quiet_since = loop.time()
+                    yield _sse_message(event)
+            if loop.time() - quiet_since >= EVENT_STREAM_KEEPALIVE:
+                quiet_since = loop.time()
+                yield ': keepalive\n\n'
+            await asyncio.sleep(1)
+
+    return _event_stream_response(stream())